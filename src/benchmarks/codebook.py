@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Benchmark of loading code books from the binary (memory mapped) format against loading them from json, run with:
+   python -m benchmarks.codebook [path to corpus] (defaulting to misc/romeo_and_juliet.txt in the root of the repository.)"""
+import json
+import os
+import sys
+import tempfile
+from time import perf_counter
+from compression.codebook import CodeBook, import_json_codebook, load_codebook, save_codebook
+from compression.huffman import Huffman, digits
+
+CORPUS = os.path.join(os.path.dirname(__file__), "..", "..", "misc", "romeo_and_juliet.txt")
+
+
+def best_time(function, repeats: int = 5) -> float:
+    """The fastest of a number of runs of the function."""
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+
+    return min(times)
+
+
+def benchmark_loading(source: str, symbol_length: int, base: int, directory: str) -> dict:
+    """Time loading the code book of the source from both formats, and constructing a huffman code from it."""
+    huffman = Huffman(source, [], symbol_length, base=base)
+    binary_path, json_path = os.path.join(directory, "code_book.hncb"), os.path.join(directory, "code_book.json")
+    save_codebook(binary_path, CodeBook.from_huffman(huffman))
+    with open(json_path, "w") as file:
+        code_book = {sym: digits(int(code), int(length), base) for (sym, length, code) in zip(huffman.symbols, huffman.lengths, huffman.codes)}
+        json.dump({"base": base, "code_book": code_book}, file)
+
+    return {
+        "symbol_length": symbol_length, "base": base, "symbols": len(huffman.symbols),
+        "binary_size": os.path.getsize(binary_path), "json_size": os.path.getsize(json_path),
+        "binary_load": best_time(lambda: load_codebook(binary_path)),
+        "json_load": best_time(lambda: import_json_codebook(json_path)),
+        "binary_huffman": best_time(lambda: Huffman.from_code_book(load_codebook(binary_path))),
+        "json_huffman": best_time(lambda: Huffman.from_code_book(import_json_codebook(json_path))),
+    }
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1] if len(sys.argv) > 1 else CORPUS, "r") as file:
+        source = file.read()
+
+    print(f"{'length':>6} {'base':>4} {'symbols':>8} {'binary [B]':>11} {'json [B]':>9} {'binary [ms]':>12} {'json [ms]':>10} "
+          f"{'binary huffman [ms]':>20} {'json huffman [ms]':>18}")
+    with tempfile.TemporaryDirectory() as directory:
+        for (symbol_length, base) in [(1, 2), (1, 8), (2, 2), (2, 8), (3, 2)]:
+            result = benchmark_loading(source, symbol_length, base, directory)
+            print(f"{symbol_length:>6} {base:>4} {result['symbols']:>8} {result['binary_size']:>11} {result['json_size']:>9} "
+                  f"{result['binary_load'] * 1e3:>12.3f} {result['json_load'] * 1e3:>10.3f} "
+                  f"{result['binary_huffman'] * 1e3:>20.2f} {result['json_huffman'] * 1e3:>18.2f}")
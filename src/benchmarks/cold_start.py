@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Benchmark of the cold start of a short lived process, which imports the pipelines and encodes (and decodes) a single code,
+   with and without the field cache, run with: python -m benchmarks.cold_start"""
+import os
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+from typing import Dict
+
+# The script run by each fresh interpreter, it reports whether galois was imported.
+SCRIPT = """
+import sys
+from compression.huffman import Huffman
+from error_correting.reed_solomon import ReedSolomonCode
+from pipeline import DecodePipeline, EncodePipeline
+source = "romeo, romeo, wherefore art thou romeo? "
+huffman = Huffman(source, sorted(set(source)), 1, base=2)
+rs = ReedSolomonCode(8, 3, 7)
+matrices = list(EncodePipeline(huffman, rs, 2, 2).run([source]))
+assert list(DecodePipeline(huffman, rs).run(matrices)) == [source]
+print("galois" in sys.modules)
+"""
+
+
+def _run(arguments: list, cache: bool) -> subprocess.CompletedProcess:
+    """Run a fresh interpreter (from the source directory), without the field cache unless cache is set."""
+    source = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": source}
+    with tempfile.TemporaryDirectory() as empty:
+        if not cache:
+            env["HN_FIELD_CACHE"] = empty
+        return subprocess.run([sys.executable, *arguments], env=env, cwd=source, capture_output=True, text=True, check=True)
+
+
+def import_times(module: str) -> Dict[str, float]:
+    """The cumulative import time (in seconds) of every module imported by importing the module, from python -X importtime."""
+    times = {}
+    for line in _run(["-X", "importtime", "-c", f"import {module}"], cache=True).stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            times[name.strip()] = int(cumulative) * 1e-6
+
+    return times
+
+
+def cold_start(cache: bool) -> Dict[str, float]:
+    """Time encoding and decoding a single code in a fresh interpreter."""
+    start = perf_counter()
+    result = _run(["-c", SCRIPT], cache)
+    return {"time": perf_counter() - start, "galois": result.stdout.strip() == "True"}
+
+
+if __name__ == "__main__":
+    for module in ["pipeline", "galois"]:
+        times = import_times(module)
+        print(f"python -X importtime -c 'import {module}': {times[module]:.3f} s (galois imported: {'galois' in times})")
+
+    print(f"{'field cache':>11} {'encode + decode [s]':>20} {'galois imported':>16}")
+    for cache in [True, False]:
+        result = cold_start(cache)
+        print(f"{str(cache):>11} {result['time']:>20.3f} {str(result['galois']):>16}")
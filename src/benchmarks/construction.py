@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Benchmark of constructing codes with the uint8 lookup tables of the field (Code.batch), compared to the construction
+   on galois field arrays which it replaced, run with: python -m benchmarks.construction"""
+import galois as gl
+import numpy as np
+from time import perf_counter
+from code import Code
+from helpers import convert_int_to_symbols, repr_matrix
+from masking import compute_mask
+
+
+def construct_galois(data: gl.FieldArray, gf: gl.GF, error_correction_level: int, encoding: int, size: int = 23) -> gl.FieldArray:
+    """The previous construction of Code.batch, which masked the candidates by adding galois field arrays."""
+    codes = Code.__new__(Code)
+    codes._initialize(gf.order, error_correction_level, None, encoding, size)
+    layout = codes.layout
+    masks = layout.masks.view(gf)
+    template = layout.template.reshape(-1)
+
+    matrix = np.empty((data.shape[0], template.shape[0]), dtype=template.dtype)
+    matrix[:] = template
+    matrix[:, layout.data_index] = data
+
+    candidates = matrix.reshape(data.shape[0], 1, size + 2, size + 2).view(gf) + masks
+    cells = candidates.view(np.ndarray).reshape(*candidates.shape[:2], -1)
+    cells[..., layout.fixed_index] = template[layout.fixed_index]
+    cells[..., layout.error_correction_index] = gf(error_correction_level)
+    cells[..., layout.mask_index] = gf(np.stack([convert_int_to_symbols(idx, gf, length=2) for idx in range(masks.shape[0])]))[:, np.newaxis, :]
+    cells[..., layout.encoding_index] = convert_int_to_symbols(encoding, gf, length=2)
+    return candidates[np.arange(data.shape[0]), compute_mask(candidates)]
+
+
+def benchmark_construction(size: int, batch_size: int, repeats: int = 5) -> dict:
+    """Time the construction of a batch of codes by both implementations, per code."""
+    gf = gl.GF(8)
+    data = gf.Random((batch_size, Code.number_of_symbols(size)), seed=size)
+    assert np.array_equal(construct_galois(data, gf, 2, 2, size), Code.batch(data, gf, 2, None, 2, size)[1])
+
+    times = {}
+    for (name, construct) in [("galois", lambda: construct_galois(data, gf, 2, 2, size)), ("tables", lambda: Code.batch(data, gf, 2, None, 2, size))]:
+        construct()
+        start = perf_counter()
+        for _ in range(repeats):
+            construct()
+        times[name] = (perf_counter() - start) / (repeats * batch_size)
+
+    return {"size": size, "batch_size": batch_size, **times}
+
+
+def benchmark_helpers(repeats: int = 1000) -> dict:
+    """Time converting a parameter to symbols, and the terminal representation of a code, per call."""
+    gf = gl.GF(8)
+    start = perf_counter()
+    for value in range(repeats):
+        convert_int_to_symbols(value % 64, gf, length=2)
+    convert_time = (perf_counter() - start) / repeats
+
+    matrix = np.random.default_rng(0).integers(0, 8, size=(25, 25), dtype=np.uint8)
+    start = perf_counter()
+    for _ in range(repeats // 10):
+        repr_matrix(matrix)
+
+    return {"convert_int_to_symbols": convert_time, "repr_matrix": (perf_counter() - start) / (repeats // 10)}
+
+
+if __name__ == "__main__":
+    for (name, time) in benchmark_helpers().items():
+        print(f"{name}: {time * 1e6:.1f} us/call")
+
+    print(f"{'size':>4} {'batch':>5} {'galois [us/code]':>17} {'tables [us/code]':>17} {'speedup':>8}")
+    for size in [23, 31, 47]:
+        for batch_size in [1, 256]:
+            result = benchmark_construction(size, batch_size)
+            print(f"{size:>4} {batch_size:>5} {result['galois'] * 1e6:>17.1f} {result['tables'] * 1e6:>17.1f} {result['galois'] / result['tables']:>7.2f}x")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Benchmark of the huffman code book construction, compression and decompression on the Romeo & Juliet corpus, run with:
+   python -m benchmarks.huffman [path to corpus] (defaulting to misc/romeo_and_juliet.txt in the root of the repository.)"""
+import os
+import sys
+import numpy as np
+from collections import Counter
+from time import perf_counter
+from typing import Dict, List, Tuple
+from compression.huffman import Huffman, canonical_codes, huffman_code_lengths
+
+CORPUS = os.path.join(os.path.dirname(__file__), "..", "..", "misc", "romeo_and_juliet.txt")
+
+
+def split_code_lengths(symbols_ordered_by_frequency: List[Tuple[str, float]], base: int, depth: int = 0) -> Dict[str, int]:
+    """The previous construction, which recursively splits the frequency sorted symbols in base parts of roughly equal weight."""
+    if len(symbols_ordered_by_frequency) == 1:
+        return {sym: depth for (sym, _) in symbols_ordered_by_frequency}
+
+    elif len(symbols_ordered_by_frequency) <= base:
+        return {sym: depth + 1 for (sym, _) in symbols_ordered_by_frequency}
+
+    freqs = [freq for (_, freq) in symbols_ordered_by_frequency]
+    total_freq = sum(freqs)
+    cutoffs = [0]
+    for idx in range(base):
+        cutoffs.append(cutoffs[-1] + 1)
+        while sum(freqs[cutoffs[idx]:cutoffs[idx + 1]]) < (total_freq / base) and cutoffs[-1] < len(freqs):
+            cutoffs[-1] += 1
+
+    lengths = {}
+    for (start, end) in zip(cutoffs[:-1], cutoffs[1:]):
+        if start < end:
+            lengths.update(split_code_lengths(symbols_ordered_by_frequency[start:end], base, depth + 1))
+
+    return lengths
+
+
+def benchmark_construction(source: str, symbol_length: int, base: int) -> dict:
+    """Time both constructions of the code lengths, and compute the compressed size of the source (in base-ary digits)."""
+    counts = Counter(source[i:i + symbol_length] for i in range(0, len(source) - symbol_length + 1, symbol_length))
+    symbols, frequencies = list(counts.keys()), np.array(list(counts.values()), dtype=np.float64)
+
+    start = perf_counter()
+    lengths = huffman_code_lengths(frequencies, base)
+    canonical_codes(symbols, lengths, base)
+    heap_time = perf_counter() - start
+
+    start = perf_counter()
+    split_lengths = split_code_lengths(sorted(counts.items(), key=lambda item: item[1], reverse=True), base)
+    split_time = perf_counter() - start
+
+    return {
+        "symbol_length": symbol_length, "base": base, "symbols": len(symbols),
+        "heap_time": heap_time, "heap_size": int(np.dot(frequencies, lengths)),
+        "split_time": split_time, "split_size": int(sum(counts[sym] * length for (sym, length) in split_lengths.items())),
+    }
+
+
+def benchmark_decompression(source: str, symbol_length: int, base: int) -> dict:
+    """Time the compression of the source, and the table driven decompression of it, both at once and as a stream of 64 chunks."""
+    huffman = Huffman(source, sorted(set(source)), symbol_length, base=base)
+    source = source[:len(source) - len(source) % symbol_length]
+    start = perf_counter()
+    compressed = np.asarray(huffman.compress(source))
+    compress_time = perf_counter() - start
+    huffman.decompress(compressed[:0])  # Construct the decoding tables before timing.
+
+    start = perf_counter()
+    huffman.decompress(compressed)
+    decode_time = perf_counter() - start
+
+    start = perf_counter()
+    for _ in huffman.decompress_stream(np.array_split(compressed, 64)):
+        pass
+    stream_time = perf_counter() - start
+
+    return {"symbol_length": symbol_length, "base": base, "compress_time": compress_time, "decode_time": decode_time, "stream_time": stream_time,
+            "decode_throughput": len(source) / decode_time, "stream_throughput": len(source) / stream_time}
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1] if len(sys.argv) > 1 else CORPUS, "r") as file:
+        source = file.read()
+
+    print(f"Corpus of {len(source)} characters.")
+    print(f"{'length':>6} {'base':>4} {'symbols':>8} {'heap [ms]':>10} {'heap size':>10} {'split [ms]':>11} {'split size':>11}")
+    for (symbol_length, base) in [(1, 2), (1, 3), (1, 8), (2, 2), (2, 8), (3, 2)]:
+        result = benchmark_construction(source, symbol_length, base)
+        print(f"{symbol_length:>6} {base:>4} {result['symbols']:>8} {result['heap_time'] * 1e3:>10.2f} {result['heap_size']:>10} "
+              f"{result['split_time'] * 1e3:>11.2f} {result['split_size']:>11}")
+
+    print(f"\n{'length':>6} {'base':>4} {'compress [ms]':>14} {'decode [ms]':>12} {'decode [MB/s]':>14} {'stream [ms]':>12} {'stream [MB/s]':>14}")
+    for (symbol_length, base) in [(1, 2), (1, 3), (1, 8), (2, 2), (2, 8)]:
+        result = benchmark_decompression(source, symbol_length, base)
+        print(f"{symbol_length:>6} {base:>4} {result['compress_time'] * 1e3:>14.2f} {result['decode_time'] * 1e3:>12.2f} {result['decode_throughput'] / 1e6:>14.2f} "
+              f"{result['stream_time'] * 1e3:>12.2f} {result['stream_throughput'] / 1e6:>14.2f}")
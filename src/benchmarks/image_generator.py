@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Benchmark of rendering codes of size 23 to RGB pixels (and to PNG), compared to the terminal representation built by
+   helpers.repr_matrix, run with: python -m benchmarks.image_generator"""
+import numpy as np
+from time import perf_counter
+from helpers import repr_matrix
+from image_generator import encode_png, render, tile
+
+
+def benchmark_render(module_size: int, batch_size: int = 256, repeats: int = 5) -> dict:
+    """Time rendering a batch of codes, and encoding them as a single PNG sheet."""
+    matrices = np.random.default_rng(module_size).integers(0, 8, size=(batch_size, 25, 25), dtype=np.uint8)
+
+    start = perf_counter()
+    for _ in range(repeats):
+        images = render(matrices, module_size=module_size)
+    render_time = (perf_counter() - start) / repeats
+
+    start = perf_counter()
+    encode_png(tile(images, columns=16), level=1)
+    png_time = perf_counter() - start
+
+    return {"module_size": module_size, "pixels": images[0].shape[0], "render": render_time / batch_size, "png": png_time / batch_size}
+
+
+def benchmark_repr(batch_size: int = 64) -> float:
+    """Time the terminal representation of a code, per code."""
+    matrices = np.random.default_rng(0).integers(0, 8, size=(batch_size, 25, 25), dtype=np.uint8)
+    start = perf_counter()
+    for matrix in matrices:
+        repr_matrix(matrix)
+
+    return (perf_counter() - start) / batch_size
+
+
+if __name__ == "__main__":
+    print(f"repr_matrix: {benchmark_repr() * 1e6:.1f} us/code")
+    print(f"{'module':>6} {'pixels':>7} {'render [us/code]':>17} {'png [us/code]':>14}")
+    for module_size in [1, 4, 8, 16]:
+        result = benchmark_render(module_size)
+        print(f"{result['module_size']:>6} {result['pixels']:>7} {result['render'] * 1e6:>17.1f} {result['png'] * 1e6:>14.1f}")
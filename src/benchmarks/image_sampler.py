@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Benchmark of reading codes back from (synthetic, noisy) 1080p frames, run with: python -m benchmarks.image_sampler"""
+import galois as gl
+import numpy as np
+from time import perf_counter
+from code import Code
+from image_generator import render
+from image_sampler import sample_code
+
+# The shape of the frames the codes are placed in.
+FRAME_SHAPE = (1080, 1920, 3)
+
+
+def benchmark_sampler(size: int, module_size: int, repeats: int = 10) -> dict:
+    """Time sampling a code of the given size (rendered with the given module size) from a noisy frame."""
+    gf = gl.GF(8)
+    rng = np.random.default_rng(size * module_size)
+    matrix = Code.batch(gf(rng.integers(0, 8, size=(1, Code.number_of_symbols(size)))), gf, 2, None, 2, size)[1][0].view(np.ndarray)
+
+    image = render(matrix, module_size=module_size)
+    frame = np.full(FRAME_SHAPE, 200, dtype=np.float64)
+    frame[100:100 + image.shape[0], 300:300 + image.shape[1]] = image
+    frame = np.clip(frame * 0.85 + 15 + rng.normal(0, 12, FRAME_SHAPE), 0, 255).astype(np.uint8)
+
+    start = perf_counter()
+    for _ in range(repeats):
+        sampled = sample_code(frame)
+    sample_time = (perf_counter() - start) / repeats
+
+    return {"size": size, "module_size": module_size, "time": sample_time, "correct": bool(np.array_equal(sampled, matrix))}
+
+
+if __name__ == "__main__":
+    print(f"{'size':>5} {'module':>7} {'time [ms]':>10} {'correct':>8}")
+    for (size, module_size) in [(23, 3), (23, 8), (23, 20), (41, 5), (41, 12)]:
+        result = benchmark_sampler(size, module_size)
+        print(f"{result['size']:>5} {result['module_size']:>7} {result['time'] * 1e3:>10.1f} {str(result['correct']):>8}")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Benchmark of the encode pipeline (text -> huffman -> reed solomon -> HN code) and the decode pipeline in codes per second,
+   encoding the lines of the Romeo & Juliet corpus as labels, run with: python -m benchmarks.pipeline [path to corpus] [number of codes]"""
+import sys
+from itertools import cycle, islice
+from time import perf_counter
+from benchmarks.huffman import CORPUS
+from compression.huffman import Huffman
+from error_correting.reed_solomon import ReedSolomonCode
+from pipeline import DecodePipeline, EncodePipeline
+
+# The labels are the (stripped) lines of the corpus, cut to a length which fits in a code of size 23.
+LABEL_LENGTH = 40
+
+
+def benchmark_pipeline(pipeline: EncodePipeline, labels: list, codes: int) -> dict:
+    """Time encoding the given number of codes (cycling through the labels)."""
+    start = perf_counter()
+    count = sum(1 for _ in pipeline.run(islice(cycle(labels), codes)))
+    total_time = perf_counter() - start
+
+    return {"workers": pipeline.workers, "executor": pipeline.executor, "batch_size": pipeline.batch_size,
+            "time": total_time, "codes_per_second": count / total_time}
+
+
+def benchmark_decode(pipeline: EncodePipeline, labels: list, codes: int, batch_size: int) -> dict:
+    """Time decoding the given number of (clean) codes."""
+    matrices = list(pipeline.run(islice(cycle(labels), codes)))
+    decoder = DecodePipeline(pipeline.huffman, pipeline.rs, batch_size=batch_size)
+
+    start = perf_counter()
+    decoded = list(decoder.run(matrices))
+    total_time = perf_counter() - start
+
+    assert decoded == list(islice(cycle(labels), codes))
+    return {"batch_size": batch_size, "time": total_time, "codes_per_second": codes / total_time}
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1] if len(sys.argv) > 1 else CORPUS, "r") as file:
+        source = file.read()
+    codes = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+
+    labels = [line.strip()[:LABEL_LENGTH] for line in source.splitlines() if line.strip()]
+    huffman = Huffman(source, sorted(set(source)), 1, base=2)
+    rs = ReedSolomonCode(8, 3, 7)
+
+    print(f"Encoding {codes} codes.")
+    print(f"{'executor':>9} {'workers':>8} {'batch':>6} {'time [s]':>9} {'codes/s':>9}")
+    for (batch_size, workers, executor) in [(1, 0, "thread"), (64, 0, "thread"), (256, 0, "thread"), (64, 2, "thread"), (256, 2, "process")]:
+        result = benchmark_pipeline(EncodePipeline(huffman, rs, 2, 2, batch_size=batch_size, workers=workers, executor=executor), labels, codes)
+        print(f"{result['executor']:>9} {result['workers']:>8} {result['batch_size']:>6} {result['time']:>9.2f} {result['codes_per_second']:>9.0f}")
+
+    print(f"\nDecoding {codes} codes.")
+    print(f"{'batch':>6} {'time [s]':>9} {'codes/s':>9}")
+    for batch_size in [1, 64, 256]:
+        result = benchmark_decode(EncodePipeline(huffman, rs, 2, 2, batch_size=256), labels, codes, batch_size)
+        print(f"{result['batch_size']:>6} {result['time']:>9.2f} {result['codes_per_second']:>9.0f}")
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Benchmark of the data placement for codes of sizes 23 through 101, run with: python -m benchmarks.placement"""
+import numpy as np
+from time import perf_counter
+from code import Code
+from layout import gather_data, place_data, placement_index
+
+
+def benchmark_placement(size: int, batch_size: int = 1000, repeats: int = 10) -> dict:
+    """Time the construction of the placement index, and placing / gathering a batch of data using it."""
+    placement_index.cache_clear()
+    start = perf_counter()
+    placement_index(size)
+    index_time = perf_counter() - start
+
+    rng = np.random.default_rng(size)
+    data = rng.integers(0, 8, size=(batch_size, Code.number_of_symbols(size)), dtype=np.uint8)
+    matrices = np.ones((batch_size, size + 2, size + 2), dtype=np.uint8)
+
+    start = perf_counter()
+    for _ in range(repeats):
+        place_data(matrices, data)
+    place_time = (perf_counter() - start) / repeats
+
+    start = perf_counter()
+    for _ in range(repeats):
+        gathered = gather_data(matrices)
+    gather_time = (perf_counter() - start) / repeats
+
+    assert np.array_equal(gathered, data)
+    return {"size": size, "symbols": data.shape[1], "index": index_time, "place": place_time / batch_size, "gather": gather_time / batch_size}
+
+
+if __name__ == "__main__":
+    print(f"{'size':>5} {'symbols':>8} {'index [ms]':>11} {'place [us/code]':>16} {'gather [us/code]':>17}")
+    for size in range(23, 102, 6):
+        result = benchmark_placement(size)
+        print(f"{result['size']:>5} {result['symbols']:>8} {result['index'] * 1e3:>11.3f} {result['place'] * 1e6:>16.2f} {result['gather'] * 1e6:>17.2f}")
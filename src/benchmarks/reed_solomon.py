@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Benchmark of Reed-Solomon decoding on small parameters, run with: python -m benchmarks.reed_solomon"""
+import numpy as np
+from time import perf_counter
+from error_correting.reed_solomon import ReedSolomonCode
+
+
+def corrupt(code: ReedSolomonCode, codewords: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Add t errors to each of the codewords, at random positions."""
+    recived = np.asarray(codewords).copy()
+    for word in recived:
+        positions = rng.permutation(code.n)[:code.t]
+        word[positions] = code.tables.add(word[positions], rng.integers(1, code.gf.order, size=code.t))
+
+    return code.gf(recived)
+
+
+def benchmark_decoding(q: int, k: int, n: int, words: int = 20, batch_size: int = 10000) -> dict:
+    """Time the error correcting pair decoder and the Berlekamp-Massey decoder (per word and batched)."""
+    code = ReedSolomonCode(q, k, n, compute_error_correcting_pair=True)
+    rng = np.random.default_rng(q * n + k)
+    codewords = code.encode(code.gf(rng.integers(0, q, size=(batch_size, k))))
+    recived = corrupt(code, codewords, rng)
+
+    # Warm up the caches (and the JIT compilation of galois) before timing.
+    code.decode_with_error_correcting_pair(recived[0])
+    code.decode(recived[0])
+
+    start = perf_counter()
+    for word in recived[:words]:
+        code.decode_with_error_correcting_pair(word)
+    pair_time = (perf_counter() - start) / words
+
+    start = perf_counter()
+    for word in recived[:words]:
+        code.decode(word)
+    single_time = (perf_counter() - start) / words
+
+    start = perf_counter()
+    decoded, _ = code.decode_batch(recived)
+    batch_time = (perf_counter() - start) / batch_size
+
+    assert np.array_equal(decoded, codewords)
+    return {"q": q, "k": k, "n": n, "pair": pair_time, "single": single_time, "batch": batch_time}
+
+
+if __name__ == "__main__":
+    print(f"{'(q, k, n)':>12} {'pair [ms/word]':>15} {'BM [ms/word]':>13} {'BM batched [us/word]':>21}")
+    for (q, k, n) in [(7, 2, 6), (8, 3, 7), (8, 2, 7), (11, 4, 10), (13, 5, 12)]:
+        result = benchmark_decoding(q, k, n)
+        print(f"{str((q, k, n)):>12} {result['pair'] * 1e3:>15.3f} {result['single'] * 1e3:>13.3f} {result['batch'] * 1e6:>21.3f}")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Load generator for the worker server, which starts a server on a temporary unix socket and measures the latency (p50 and
+   p99) and the throughput of encode and decode requests sent by concurrent clients, encoding the lines of the Romeo & Juliet
+   corpus as labels, run with: python -m benchmarks.server [path to corpus] [number of workers]"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+from itertools import cycle, islice
+from time import perf_counter, sleep
+from benchmarks.huffman import CORPUS
+from benchmarks.pipeline import LABEL_LENGTH
+from compression.codebook import CodeBook, save_codebook
+from compression.huffman import Huffman
+from server import WorkerClient
+
+# The longest the server may take to start (and warm up its workers), in seconds.
+STARTUP_TIMEOUT = 120
+
+
+async def _client(path: str, kind: str, batches: list) -> list:
+    """Send the batches one at a time over a single connection, returning the latency of each request."""
+    client = await WorkerClient.connect(path)
+    latencies = []
+    for batch in batches:
+        start = perf_counter()
+        await (client.encode(batch) if kind == "encode" else client.decode(batch))
+        latencies.append(perf_counter() - start)
+
+    await client.close()
+    return latencies
+
+
+async def benchmark_server(path: str, kind: str, items: list, clients: int, requests: int, batch_size: int) -> dict:
+    """Time the given number of requests (of batch_size items each) from each of the concurrent clients."""
+    batches = [list(islice(cycle(items), i * batch_size, (i + 1) * batch_size)) for i in range(requests)]
+    start = perf_counter()
+    latencies = np.concatenate(await asyncio.gather(*(_client(path, kind, batches) for _ in range(clients))))
+    total_time = perf_counter() - start
+
+    return {"kind": kind, "clients": clients, "batch_size": batch_size, "p50": float(np.percentile(latencies, 50)),
+            "p99": float(np.percentile(latencies, 99)), "codes_per_second": clients * requests * batch_size / total_time}
+
+
+def start_server(directory: str, source: str, workers: int) -> subprocess.Popen:
+    """Start a server (in a separate process) whose huffman code is constructed from the source, and wait for its socket."""
+    code_book = os.path.join(directory, "code_book.hncb")
+    save_codebook(code_book, CodeBook.from_huffman(Huffman(source, sorted(set(source)), 1, base=2)))
+
+    path = os.path.join(directory, "server.sock")
+    src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen([sys.executable, "-m", "server", path, code_book, "--workers", str(workers)], cwd=src)
+    deadline = perf_counter() + STARTUP_TIMEOUT
+    while not os.path.exists(path):
+        if server.poll() is not None or perf_counter() > deadline:
+            server.kill()
+            raise RuntimeError("The server didn't start")
+        sleep(0.05)
+
+    return server
+
+
+async def main(source: str, workers: int) -> None:
+    """Benchmark encoding and decoding for a few numbers of clients and batch sizes."""
+    labels = [line.strip()[:LABEL_LENGTH] for line in source.splitlines() if line.strip()]
+    with tempfile.TemporaryDirectory() as directory:
+        server = start_server(directory, source, workers)
+        try:
+            path = os.path.join(directory, "server.sock")
+            client = await WorkerClient.connect(path)
+            matrices = await client.encode(labels[:256])
+            await client.close()
+
+            print(f"{workers} workers")
+            print(f"{'kind':>6} {'clients':>8} {'batch':>6} {'p50 [ms]':>9} {'p99 [ms]':>9} {'codes/s':>9}")
+            for (kind, items) in [("encode", labels), ("decode", matrices)]:
+                for (clients, batch_size) in [(1, 1), (8, 1), (1, 64), (8, 64)]:
+                    result = await benchmark_server(path, kind, items, clients, max(1, 512 // batch_size), batch_size)
+                    print(f"{kind:>6} {clients:>8} {batch_size:>6} {result['p50'] * 1e3:>9.2f} {result['p99'] * 1e3:>9.2f} {result['codes_per_second']:>9.0f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1] if len(sys.argv) > 1 else CORPUS, "r") as file:
+        source = file.read()
+
+    asyncio.run(main(source, int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1))
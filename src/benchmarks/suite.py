@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""Benchmark suite of every stage of the HN toolchain, with fixed seeds, storing the results as json, run with:
+   python -m benchmarks.suite [--corpus path] [--output results.json] [--compare baseline.json] [--profile directory] [--only name]
+
+Every benchmark reports the best and mean time of a number of repeats, the throughput (items per second) and the peak memory
+allocated during a single run (traced by tracemalloc, which numpy reports its allocations to). With --profile every benchmark
+is also run under cProfile, the statistics are dumped to the directory (as name.prof) and the hot spots (the functions with
+the most internal time, and the lines allocating the most memory) are stored with the results."""
+from __future__ import annotations
+import argparse
+import cProfile
+import json
+import os
+import platform
+import pstats
+import tracemalloc
+import galois as gl
+import numpy as np
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple
+from benchmarks.huffman import CORPUS
+from code import Code
+from compression.huffman import Huffman
+from error_correting.blocks import BlockCode
+from error_correting.reed_solomon import ReedSolomonCode
+from helpers import convert_int_to_symbols
+from image_generator import render
+from image_sampler import sample_code
+from masking import compute_mask, compute_masking_score, compute_masking_scores
+from pipeline import DecodePipeline, EncodePipeline
+from qr_code import QRCode
+
+# The seed of every benchmark, such that runs are comparable.
+SEED = 2023
+
+# The version of the format of the results, which is bumped whenever the fields of a result change.
+RESULTS_VERSION = 1
+
+# The number of hot spots stored per benchmark in profiling mode.
+HOT_SPOTS = 15
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """A benchmark of a single stage. The setup (which isn't timed) returns the function to time, along with the number of
+       items (codes, symbols, words, ...) the function processes, such that the throughput is items per second."""
+    name: str
+    stage: str
+    params: Dict[str, Any]
+    setup: Callable[[np.random.Generator], Tuple[Callable[[], Any], int]]
+    unit: str
+
+
+def _corpus(path: str, length: int = 1 << 18) -> Tuple[str, str]:
+    """The corpus the compression is benchmarked on, and where it came from. Without the bundled corpus, a corpus of
+       random words is generated (with word frequencies following Zipf's law) from the fixed seed."""
+    if os.path.exists(path):
+        with open(path, "r") as file:
+            return file.read(), os.path.basename(path)
+
+    rng = np.random.default_rng(SEED)
+    letters = np.array(list("etaoinshrdlcumwfgypbvkjxqz"))
+    vocabulary = ["".join(rng.choice(letters, size=rng.integers(1, 10))) for _ in range(2000)]
+    words = rng.zipf(1.3, size=length // 4) % len(vocabulary)
+    return " ".join(vocabulary[word] for word in words)[:length], f"zipf(seed={SEED})"
+
+
+def _code_matrices(gf: gl.GF, size: int, count: int, rng: np.random.Generator) -> np.ndarray:
+    """The (masked) matrices of count codes of the given size, with random data."""
+    data = gf(rng.integers(0, gf.order, size=(count, Code.number_of_symbols(size))))
+    return Code.batch(data, gf, error_correction_level=2, mask=None, encoding=2, size=size)[1]
+
+
+def _masking_score(rng: np.random.Generator):
+    """Score codes one at a time."""
+    matrices = rng.integers(0, 8, size=(1000, 25, 25), dtype=np.uint8)
+    return lambda: [compute_masking_score(matrix) for matrix in matrices], matrices.shape[0]
+
+
+def _masking_scores(rng: np.random.Generator):
+    """Score the candidates (one per mask) of a batch of codes at once."""
+    matrices = rng.integers(0, 8, size=(1000, 3, 25, 25), dtype=np.uint8)
+    return lambda: compute_masking_scores(matrices), matrices.shape[0] * matrices.shape[1]
+
+
+def _mask_selection(size: int):
+    """Select the best mask of a batch of codes of the given size."""
+    def setup(rng: np.random.Generator):
+        candidates = rng.integers(0, 8, size=(256, 3, size + 2, size + 2), dtype=np.uint8)
+        return lambda: compute_mask(candidates), candidates.shape[0]
+    return setup
+
+
+def _code_construction(size: int, batch_size: int):
+    """Construct a batch of codes of the given size."""
+    def setup(rng: np.random.Generator):
+        gf = gl.GF(8)
+        data = gf(rng.integers(0, 8, size=(batch_size, Code.number_of_symbols(size))))
+        return lambda: Code.batch(data, gf, error_correction_level=2, mask=None, encoding=2, size=size), batch_size
+    return setup
+
+
+def _convert_int_to_symbols(rng: np.random.Generator):
+    """Convert values to their (two) symbols one at a time, as done for the parameters of every code."""
+    gf = gl.GF(8)
+    values = rng.integers(0, 64, size=1000)
+    return lambda: [convert_int_to_symbols(int(value), gf, length=2) for value in values], values.shape[0]
+
+
+def _rs_encode(q: int, k: int, n: int):
+    """Encode a batch of messages."""
+    def setup(rng: np.random.Generator):
+        code = ReedSolomonCode(q, k, n)
+        messages = code.gf(rng.integers(0, q, size=(10000, k)))
+        return lambda: code.encode(messages), messages.shape[0]
+    return setup
+
+
+def _rs_decode(q: int, k: int, n: int):
+    """Decode a batch of words, each with t errors."""
+    def setup(rng: np.random.Generator):
+        code = ReedSolomonCode(q, k, n)
+        recived = np.asarray(code.encode(code.gf(rng.integers(0, q, size=(10000, k))))).copy()
+
+        # Every word gets t errors at random positions.
+        positions = np.argsort(rng.random(recived.shape), axis=1)[:, :code.t]
+        rows = np.arange(recived.shape[0])[:, np.newaxis]
+        recived[rows, positions] = code.tables.add(recived[rows, positions], rng.integers(1, q, size=positions.shape))
+        recived = code.gf(recived)
+        return lambda: code.decode_batch(recived), recived.shape[0]
+    return setup
+
+
+def _blocks(operation: str, size: int, workers: int):
+    """Encode or decode a batch of codes of the given size split into interleaved blocks, each block with t errors when decoding."""
+    def setup(rng: np.random.Generator):
+        block_code = BlockCode(ReedSolomonCode(8, 3, 7), Code.number_of_symbols(size), workers=workers)
+        messages = rng.integers(0, 8, size=(256, block_code.capacity), dtype=np.uint8)
+        if operation == "encode":
+            return lambda: block_code.encode_symbols(messages), messages.shape[0]
+
+        data = block_code.encode_symbols(messages)
+        data[:, :block_code.rs.t * block_code.blocks] ^= rng.integers(1, 8, size=(data.shape[0], block_code.rs.t * block_code.blocks), dtype=np.uint8)
+        return lambda: block_code.decode_symbols(data), data.shape[0]
+    return setup
+
+
+def _qr_code(source: str, k: int, batch_size: int):
+    """Construct a batch of QR style codes, whose payloads are slices of the source."""
+    def setup(rng: np.random.Generator):
+        starts = rng.integers(0, len(source) - 16, size=batch_size)
+        payloads = [source[start:start + 16] for start in starts]
+        return lambda: QRCode.batch(payloads, k=k), batch_size
+    return setup
+
+
+def _huffman(source: str, operation: str, symbol_length: int, base: int):
+    """Build the huffman code of the source, or compress or decompress (the whole symbols of) the source with it."""
+    def setup(rng: np.random.Generator):
+        alphabeth = sorted(set(source))
+        if operation == "build":
+            return lambda: Huffman(source, alphabeth, symbol_length, base=base), len(source)
+
+        huffman = Huffman(source, alphabeth, symbol_length, base=base)
+        message = source[:len(source) - len(source) % symbol_length]
+        if operation == "compress":
+            return lambda: huffman.compress(message), len(message)
+
+        compressed = np.asarray(huffman.compress(message))
+        huffman.decompress(compressed[:0])  # Construct the decoding tables before timing.
+        return lambda: huffman.decompress(compressed), len(message)
+    return setup
+
+
+def _pipeline(source: str, operation: str):
+    """Encode labels (lines of the source) into codes, or decode the codes back into labels."""
+    def setup(rng: np.random.Generator):
+        lines = [line.strip()[:40] for line in source.splitlines() if line.strip()] or [source[i:i + 40] for i in range(0, 40 * 512, 40)]
+        labels = [lines[idx] for idx in rng.integers(0, len(lines), size=512)]
+        encoder = EncodePipeline(Huffman(source, sorted(set(source)), 1, base=2), ReedSolomonCode(8, 3, 7), 2, 2, batch_size=256)
+        if operation == "encode":
+            return lambda: list(encoder.run(labels)), len(labels)
+
+        matrices = list(encoder.run(labels))
+        decoder = DecodePipeline(encoder.huffman, encoder.rs, batch_size=256)
+        return lambda: list(decoder.run(matrices)), len(labels)
+    return setup
+
+
+def _render(rng: np.random.Generator):
+    """Render a batch of codes to pixels."""
+    matrices = _code_matrices(gl.GF(8), 23, 256, rng).view(np.ndarray)
+    return lambda: render(matrices, module_size=8), matrices.shape[0]
+
+
+def _sample(rng: np.random.Generator):
+    """Read a code back from a 1080p frame."""
+    image = render(_code_matrices(gl.GF(8), 23, 1, rng)[0].view(np.ndarray), module_size=8)
+    frame = np.full((1080, 1920, 3), 200, dtype=np.uint8)
+    frame[100:100 + image.shape[0], 300:300 + image.shape[1]] = image
+    return lambda: sample_code(frame), 1
+
+
+def benchmarks(source: str) -> List[Benchmark]:
+    """Every benchmark of the suite, (the compression benchmarks are run on the given source.)"""
+    suite = [
+        Benchmark("masking_score", "masking", {"codes": 1000, "size": 23}, _masking_score, "matrices"),
+        Benchmark("masking_scores", "masking", {"codes": 1000, "masks": 3, "size": 23}, _masking_scores, "matrices"),
+        Benchmark("convert_int_to_symbols", "helpers", {"values": 1000, "length": 2}, _convert_int_to_symbols, "values"),
+        Benchmark("render", "image", {"codes": 256, "size": 23, "module_size": 8}, _render, "codes"),
+        Benchmark("sample_1080p", "image", {"size": 23, "module_size": 8}, _sample, "frames"),
+    ]
+    for size in [23, 41, 71]:
+        suite.append(Benchmark(f"mask_selection_{size}", "masking", {"codes": 256, "size": size}, _mask_selection(size), "codes"))
+        for batch_size in [1, 256]:
+            suite.append(Benchmark(f"code_{size}_batch_{batch_size}", "code", {"size": size, "batch_size": batch_size},
+                                   _code_construction(size, batch_size), "codes"))
+
+    for (q, k, n) in [(8, 3, 7), (8, 2, 7), (11, 4, 10), (13, 5, 12), (16, 8, 15)]:
+        suite.append(Benchmark(f"rs_encode_{q}_{k}_{n}", "reed_solomon", {"q": q, "k": k, "n": n, "words": 10000}, _rs_encode(q, k, n), "words"))
+        suite.append(Benchmark(f"rs_decode_{q}_{k}_{n}", "reed_solomon", {"q": q, "k": k, "n": n, "words": 10000}, _rs_decode(q, k, n), "words"))
+
+    for k in [20, 33]:
+        suite.append(Benchmark(f"qr_code_{k}_batch_256", "code", {"k": k, "batch_size": 256, "base": 7}, _qr_code(source, k, 256), "codes"))
+
+    for operation in ["encode", "decode"]:
+        for workers in [0, 4]:
+            suite.append(Benchmark(f"blocks_{operation}_71_workers_{workers}", "reed_solomon", {"codes": 256, "size": 71, "workers": workers},
+                                   _blocks(operation, 71, workers), "codes"))
+
+    for (symbol_length, base) in [(1, 2), (1, 8), (2, 2)]:
+        for operation in ["build", "compress", "decompress"]:
+            suite.append(Benchmark(f"huffman_{operation}_{symbol_length}_{base}", "huffman", {"symbol_length": symbol_length, "base": base},
+                                   _huffman(source, operation, symbol_length, base), "characters"))
+
+    for operation in ["encode", "decode"]:
+        suite.append(Benchmark(f"pipeline_{operation}", "pipeline", {"codes": 512, "size": 23, "q": 8, "k": 3, "n": 7},
+                               _pipeline(source, operation), "codes"))
+
+    return suite
+
+
+def _hot_spots(profile: cProfile.Profile) -> List[Dict[str, Any]]:
+    """The functions with the most internal time."""
+    stats = pstats.Stats(profile).stats
+    entries = sorted(stats.items(), key=lambda item: -item[1][2])[:HOT_SPOTS]
+    return [{"function": f"{os.path.basename(file)}:{line}({name})", "calls": calls, "tottime": tottime, "cumtime": cumtime}
+            for ((file, line, name), (_, calls, tottime, cumtime, _)) in entries]
+
+
+def run_benchmark(benchmark: Benchmark, repeats: int = 5, profile_directory: str | None = None) -> Dict[str, Any]:
+    """Run the benchmark (after a warm up run), returning its result."""
+    function, items = benchmark.setup(np.random.default_rng(SEED))
+    function()
+
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+
+    # The memory is traced in a separate run, since tracing slows down the allocations.
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    allocations = tracemalloc.take_snapshot().statistics("lineno")[:HOT_SPOTS] if profile_directory else []
+    tracemalloc.stop()
+
+    result = {"name": benchmark.name, "stage": benchmark.stage, "params": benchmark.params, "unit": benchmark.unit, "items": items,
+              "repeats": repeats, "best": min(times), "mean": float(np.mean(times)), "throughput": items / min(times), "peak_memory": peak}
+
+    if profile_directory:
+        profile = cProfile.Profile()
+        profile.runcall(function)
+        profile.dump_stats(os.path.join(profile_directory, f"{benchmark.name}.prof"))
+        result["hot_spots"] = _hot_spots(profile)
+        result["allocations"] = [{"line": str(stat.traceback), "size": stat.size, "count": stat.count} for stat in allocations]
+
+    return result
+
+
+def run_suite(source: str, corpus: str, only: List[str] | None = None, repeats: int = 5, profile_directory: str | None = None,
+              report: Callable[[Dict[str, Any]], None] = lambda result: None) -> Dict[str, Any]:
+    """Run the benchmarks (whose name contains one of the given strings, if any), returning the results of the suite."""
+    if profile_directory:
+        os.makedirs(profile_directory, exist_ok=True)
+
+    results = []
+    for benchmark in benchmarks(source):
+        if only and not any(name in benchmark.name for name in only):
+            continue
+
+        results.append(run_benchmark(benchmark, repeats, profile_directory))
+        report(results[-1])
+
+    return {"version": RESULTS_VERSION, "seed": SEED, "corpus": corpus, "python": platform.python_version(), "numpy": np.__version__,
+            "galois": gl.__version__, "machine": platform.machine(), "results": results}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[Tuple[str, float, float]]:
+    """The best time of each benchmark in both runs, (only the benchmarks present in both are compared.)"""
+    previous = {result["name"]: result for result in baseline["results"]}
+    return [(result["name"], previous[result["name"]]["best"], result["best"]) for result in results["results"] if result["name"] in previous]
+
+
+def _print_result(result: Dict[str, Any]) -> None:
+    """Print a row of the table of results."""
+    print(f"{result['name']:<28} {result['best'] * 1e3:>10.3f} {result['throughput']:>14.0f} {result['unit']:<11} {result['peak_memory'] / 2 ** 20:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the HN toolchain.")
+    parser.add_argument("--corpus", default=CORPUS, help="The corpus the compression is benchmarked on.")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where the results are stored (as json).")
+    parser.add_argument("--compare", help="The results of a previous run to compare against.")
+    parser.add_argument("--profile", help="Profile every benchmark, storing the statistics in this directory.")
+    parser.add_argument("--only", nargs="*", help="Only run the benchmarks whose name contains one of these strings.")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    source, corpus = _corpus(args.corpus)
+    print(f"Corpus: {corpus} ({len(source)} characters), seed: {SEED}")
+    print(f"{'benchmark':<28} {'best [ms]':>10} {'throughput':>14} {'[per s]':<11} {'peak [MB]':>10}")
+    results = run_suite(source, corpus, args.only, args.repeats, args.profile, report=_print_result)
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+
+        print(f"\n{'benchmark':<28} {'before [ms]':>12} {'after [ms]':>11} {'speedup':>8}")
+        for (name, before, after) in compare(results, baseline):
+            print(f"{name:<28} {before * 1e3:>12.3f} {after * 1e3:>11.3f} {before / after:>8.2f}")
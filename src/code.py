@@ -1,9 +1,27 @@
 #!/usr/bin/env python3
-import galois as gl
+from __future__ import annotations
 import numpy as np
-from helpers import convert_int_to_symbols, repr_matrix
+from typing import TYPE_CHECKING, Optional, Tuple
+from field import field_tables, galois_field
+from helpers import convert_symbols_to_int, int_to_symbols, repr_matrix
+from instrumentation import count, instrumented, is_enabled, observe, timed
+from layout import layout_template
 from masking import compute_mask, compute_masking_score
 
+if TYPE_CHECKING:
+    import galois as gl
+
+# The upper bounds of the buckets of the masking scores of the constructed codes.
+MASKING_SCORE_BUCKETS = tuple(range(700, 1500, 50))
+
+
+def majority_vote(copies: np.ndarray) -> np.ndarray:
+    """The most common value among the copies of shape (N, copies, ...) of each of N values, ties are won by the earliest copy."""
+    copies = np.asarray(copies)
+    agreement = np.sum(copies[:, :, np.newaxis] == copies[:, np.newaxis, :], axis=2)
+    return np.take_along_axis(copies, np.argmax(agreement, axis=1)[:, np.newaxis], axis=1)[:, 0]
+
+
 class Code:
     """Constructs a HN code."""
 
@@ -15,127 +33,174 @@ class Code:
         size_of_timing_strip = size - 6 - 8
         return size ** 2 - size_of_big_locator - 2 * size_of_small_locator - 8 * size_of_timing_strip
 
-    def __init__(self, data: gl.FieldArray, gf: gl.GF, error_correction_level: int, mask: int, encoding: int, size: int = 23):
-        """Initializese a HN code with the given parameters."""
+    def __init__(self, data: gl.FieldArray, gf: gl.GF, error_correction_level: int, mask: Optional[int], encoding: int, size: int = 23):
+        """Initializese a HN code with the given parameters, if the mask is None the best mask is chosen."""
         if data.shape[0] != self.number_of_symbols(size):
             raise ValueError(f"Expected data array to have size {self.number_of_symbols(size)} but got {data.shape[0]}")
 
+        self._initialize(gf.order, error_correction_level, mask, encoding, size)
         self.gf = gf
         self.data = data
+
+        # Compute masking information.
+        mask_indices, matrices = self._construct(np.asarray(self.data)[np.newaxis])
+        self.mask_idx = int(mask_indices[0])
+        self.matrix = matrices[0].view(gf)
+
+        if is_enabled():
+            observe("hn_masking_score", compute_masking_score(self.matrix), "The masking score of each constructed code.", MASKING_SCORE_BUCKETS)
+
+    @classmethod
+    def batch(cls, data: gl.FieldArray, gf: gl.GF, error_correction_level: int, mask: Optional[int], encoding: int,
+              size: int = 23) -> Tuple[np.ndarray, gl.FieldArray]:
+        """Construct the matrices of N HN codes at once, given data of shape (N, number_of_symbols(size)). Returns the index
+           of the mask used by each code, along with the matrices of shape (N, size + 2, size + 2)."""
+        mask_indices, matrices = cls.batch_symbols(np.asarray(gf(data)), gf.order, error_correction_level, mask, encoding, size)
+        return mask_indices, matrices.view(gf)
+
+    @classmethod
+    def batch_symbols(cls, data: np.ndarray, order: int, error_correction_level: int, mask: Optional[int], encoding: int,
+                      size: int = 23) -> Tuple[np.ndarray, np.ndarray]:
+        """Construct the matrices of N HN codes like batch, given the data as a plain integer array of symbols of GF(order).
+           The matrices are returned as a plain uint8 array, so the field (of galois) is never constructed."""
+        data = np.asarray(data)
+        if data.ndim != 2 or data.shape[1] != cls.number_of_symbols(size):
+            raise ValueError(f"Expected data array to have shape (N, {cls.number_of_symbols(size)}) but got {data.shape}")
+        elif data.size and (data.min() < 0 or data.max() >= order):
+            raise ValueError(f"Expected the data to be symbols of GF({order})")
+
+        codes = cls.__new__(cls)
+        codes._initialize(order, error_correction_level, mask, encoding, size)
+        return codes._construct(data)
+
+    @classmethod
+    def from_matrix(cls, matrix: gl.FieldArray, gf: gl.GF) -> "Code":
+        """Read a HN code from its matrix of shape (size + 2, size + 2), recovering its parameters and (unmasked) data."""
+        data, error_correction_levels, mask_indices, encodings = cls.read_batch(gf(matrix)[np.newaxis], gf)
+        code = cls.__new__(cls)
+        code._initialize(gf.order, int(error_correction_levels[0]), int(mask_indices[0]), int(encodings[0]), matrix.shape[0] - 2)
+        code.gf = gf
+        code.data = data[0]
+        code.mask_idx = code.mask
+        code.matrix = gf(matrix)
+        return code
+
+    @staticmethod
+    def read_parameters(matrices: np.ndarray, order: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Read the error correction level, the index of the mask and the encoding of N codes of shape (N, size + 2, size + 2),
+           over the field of the given order. Each parameter is stored three times, so every symbol is given by the majority
+           vote of its copies."""
+        layout = layout_template(order, matrices.shape[-1] - 2)
+        cells = np.asarray(matrices).reshape(matrices.shape[0], -1)
+        error_correction_levels = majority_vote(cells[:, layout.error_correction_index])
+        mask_indices = convert_symbols_to_int(majority_vote(cells[:, layout.mask_index]), order)
+        encodings = convert_symbols_to_int(majority_vote(cells[:, layout.encoding_index]), order)
+        return error_correction_levels.astype(np.int64), mask_indices, encodings
+
+    @classmethod
+    def read_batch(cls, matrices: gl.FieldArray, gf: gl.GF) -> Tuple[gl.FieldArray, np.ndarray, np.ndarray, np.ndarray]:
+        """Read N codes of shape (N, size + 2, size + 2) at once, returning the unmasked data of shape (N, number_of_symbols)
+           along with the error correction level, the index of the mask and the encoding of each code."""
+        data, error_correction_levels, mask_indices, encodings = cls.read_symbols(np.asarray(gf(matrices)), gf.order)
+        return data.view(gf), error_correction_levels, mask_indices, encodings
+
+    @classmethod
+    @instrumented("code_reading")
+    def read_symbols(cls, matrices: np.ndarray, order: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Read N codes like read_batch, given the matrices as a plain integer array of symbols of GF(order). The data is
+           returned as a plain uint8 array."""
+        matrices = np.asarray(matrices)
+        if matrices.ndim != 3 or matrices.shape[1] != matrices.shape[2]:
+            raise ValueError(f"Expected matrices of shape (N, size + 2, size + 2), but got {matrices.shape}")
+
+        layout = layout_template(order, matrices.shape[-1] - 2)
+        error_correction_levels, mask_indices, encodings = cls.read_parameters(matrices, order)
+        invalid = np.flatnonzero(mask_indices >= layout.masks.shape[0])
+        if invalid.shape[0]:
+            raise ValueError(f"The codes {invalid.tolist()} have invalid masks {mask_indices[invalid].tolist()}")
+
+        # The mask is removed from the data cells only, by subtracting the data cells of the mask of each code.
+        data = matrices.reshape(matrices.shape[0], -1)[:, layout.data_index]
+        masks = layout.masks.reshape(layout.masks.shape[0], -1)[:, layout.data_index]
+        return field_tables(order).subtract(data, masks[mask_indices]), error_correction_levels, mask_indices, encodings
+
+    def _initialize(self, order: int, error_correction_level: int, mask: int, encoding: int, size: int) -> None:
+        """Store the parameters shared by every code with the given settings, and fetch the cached layout."""
+        self.order = order
         self.error_correction_level = error_correction_level
         self.mask = mask
         self.encoding = encoding
         self.size = size
 
-        n = self.gf.order
-        self.masks = [
-            self.gf([[(i + j) % n for i in range(self.size + 2)] for j in range(self.size + 2)]),
-            self.gf([[(i * j) % n for i in range(self.size + 2)] for j in range(self.size + 2)]),
-            self.gf([[(i * j - (i + j)) % n for i in range(self.size + 2)] for j in range(self.size + 2)]),
-        ]
-
-        # Compute masking information.
-        self.mask_idx = self._compute_mask()
-        self.matrix = self.gf.Ones((self.size + 2, self.size + 2))
-        self._add_data()
-        self.matrix += self.masks[self.mask_idx]
-        self._add_locator_and_timing_pattern()
-        self._add_parameters_and_calibration_colors()
-
-        # Add white where it is needed
-        self.matrix[0, :] = self.gf.Ones((self.size  + 2))
-        self.matrix[self.size + 1, :] = self.gf.Ones((self.size  + 2))
-        self.matrix[:, 0] = self.gf.Ones((self.size  + 2))
-        self.matrix[:, self.size + 1] = self.gf.Ones((self.size  + 2))
-        # Arround the large indicator
-        self.matrix[:, 8] = self.gf.Ones((self.size  + 2))
-        self.matrix[8, :] = self.gf.Ones((self.size  + 2))
-
-
-        # Arround the small indicators
-        self.matrix[6, -7:] = self.gf.Ones((7))
-        self.matrix[-7, :9] = self.gf.Ones((9))
-        self.matrix[:9, -7] = self.gf.Ones((9))
-        self.matrix[-7:, 6] = self.gf.Ones((7))
-
-        # Arrund information patterns
-        self.matrix[9:-7, 5] = self.gf.Ones(self.size - 8 - 6)
-        self.matrix[5, 9:-7] = self.gf.Ones(self.size - 8 - 6)
-
-        print(compute_masking_score(self.matrix))
-
-    def _compute_mask(self) -> int:
-        """Compute the best mask (maximizing constrast between neighbouring pixels.)"""
-        best_idx, best_score = 0, np.inf
-        self.matrix = self.gf.Ones((self.size + 2, self.size + 2))
-        for idx, mask in enumerate(self.masks):
-            self._add_data()
-            self.matrix += mask
-            self._add_parameters_and_calibration_colors()
-            self._add_locator_and_timing_pattern()
-
-            if compute_masking_score(self.matrix) < best_score:
-                best_idx = idx
-
-        return best_idx
+        self.layout = layout_template(self.order, self.size)
+        self.tables = field_tables(self.order)
+        if self.mask is not None and not 0 <= self.mask < self.layout.masks.shape[0]:
+            raise ValueError(f"Expected the mask to be None or one of 0, ..., {self.layout.masks.shape[0] - 1}, but got {self.mask}")
+
+        # The codes are constructed as plain uint8 arrays (using the lookup tables of the field), which are only viewed as
+        # field arrays once constructed. Every candidate carries the index of the mask applied to it.
+        self.error_correction_symbol = int_to_symbols(self.error_correction_level, self.order, length = 1)
+        self.masking_symbols = np.stack([int_to_symbols(idx, self.order, length = 2) for idx in range(self.layout.masks.shape[0])])
+        self.encoding_symbols = int_to_symbols(self.encoding, self.order, length = 2)
+
+    @property
+    def masks(self) -> gl.FieldArray:
+        """The masks of the code, of shape (masks, size + 2, size + 2)."""
+        return self.layout.masks.view(self.gf)
+
+    @instrumented("code_construction")
+    def _construct(self, data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Construct the matrices for a stack of data of shape (N, number_of_symbols), returning the index
+           of the mask chosen for each code along with the masked matrices of shape (N, size + 2, size + 2)."""
+        layout = self.layout
+        template = layout.template.reshape(-1)
+
+        # 1. Scatter the data into copies of the template.
+        matrix = np.empty((data.shape[0], template.shape[0]), dtype=template.dtype)
+        matrix[:] = template
+        matrix[:, layout.data_index] = data
+
+        # 2. Every candidate (one per mask) of every code is laid out as a single (N, masks, size + 2, size + 2) stack,
+        #    after which the fixed pattern and the parameters are written on top of the masked data.
+        masks = layout.masks.reshape(1, layout.masks.shape[0], -1)
+        cells = self.tables.add(matrix[:, np.newaxis, :], masks)
+        cells[..., layout.fixed_index] = template[layout.fixed_index]
+        cells[..., layout.error_correction_index] = self.error_correction_symbol
+        cells[..., layout.mask_index] = self.masking_symbols[:, np.newaxis, :]
+        cells[..., layout.encoding_index] = self.encoding_symbols
+
+        candidates = cells.reshape(*cells.shape[:2], self.size + 2, self.size + 2)
+        mask_indices = self._compute_mask(candidates)
+        count("hn_codes_constructed_total", data.shape[0], "The number of constructed codes.")
+        return mask_indices, candidates[np.arange(data.shape[0]), mask_indices]
+
+    def _compute_mask(self, candidates: np.ndarray) -> np.ndarray:
+        """Compute the best mask of each code (maximizing constrast between neighbouring pixels), unless a mask is given."""
+        if self.mask is not None:
+            return np.full(candidates.shape[0], self.mask, dtype=np.intp)
+
+        with timed("mask_selection"):
+            mask_indices = compute_mask(candidates)
+
+        if is_enabled():
+            for (idx, selected) in enumerate(np.bincount(mask_indices, minlength=candidates.shape[1])):
+                count("hn_masks_selected_total", int(selected), "The number of codes for which each mask was selected.", mask=idx)
+
+        return mask_indices
 
     def _add_mask(self):
         """Adds the mask to the data matrix."""
-        mask = self.masks[self.mask_idx]
+        mask = self.masks[self.mask_idx].copy()
 
         mask[:8, :8] = self.gf.Ones((8, 8))
         print(repr_matrix(mask))
 
-    def _add_locator_and_timing_pattern(self) -> None:
-        """Create a matrix with the locator and timing patterns."""
-        # 1. Add locators to matrix
-        large_locator = self.gf.Zeros((7, 7)) - self.gf(np.pad(self.gf.Ones((5, 5)), 1)) + self.gf(np.pad(self.gf.Ones((3, 3)), 2))
-        small_locator = self.gf.Zeros((5, 5)) - self.gf(np.pad(self.gf.Ones((3, 3)), 1)) + self.gf(np.pad(self.gf.Ones((1, 1)), 2))
-
-        # NOTE: Remember that we have padding around the edge of the code.
-        self.matrix[1:8, 1:8] = large_locator
-        self.matrix[1:6, -6:-1] = small_locator
-        self.matrix[-6:-1, 1:6] = small_locator
-
-        # 2. Add timing information
-        timing_pattern = self.gf([idx % 2 for idx in range(self.size - 8 - 6)])
-        self.matrix[7, 9:-7] = timing_pattern
-        self.matrix[9:-7, 7] = timing_pattern
-
-    def _add_parameters_and_calibration_colors(self) -> None:
-        """Add parameters and calibration colors to the matrix."""
-        # 1. Add calibration symbols:
-        rgb = self.gf([2, 3, 5])
-        for pos in [((7, 7, 7), (-4, -3, -2)), ((6, 6, 6), (12, 13, 14)), ((12, 13, 14), (6, 6, 6)), ((-4, -3, -2), (7, 7, 7))]:
-            self.matrix[pos] = rgb
-
-        # 2. Add error correction symbols
-        for pos in [(9, 6), (-8, 6), (6, 15)]:
-            self.matrix[pos] = self.error_correction_level
-
-        # 3. Add masking symbols
-        masking_symbols = convert_int_to_symbols(self.mask, self.gf, length = 2)
-        for pos in [((6, 6), (-8, -9)), ((10, 11), (6, 6)), ((-5, -6), (7, 7))]:
-            self.matrix[pos] = masking_symbols
-
-        # 4. Add encoding symbols
-        encoding_symbols = convert_int_to_symbols(self.encoding, self.gf, length = 2)
-        for pos in [((6, 6), (10, 11)), ((7, 7), (-5, -6)), ((-9, -10), (6, 6))]:
-            self.matrix[pos] = encoding_symbols
-
-    def _add_data(self) -> None:
-        """Add the data to the matrix."""
-        a, b, c = np.split(self.data, [15 * 15, 15 * 15 + 4 * 9])
-        self.matrix[-16:-1, -16:-1] = np.reshape(a, (15, 15))
-        self.matrix[-16:-7, 1:5] = np.reshape(b, (9, 4))
-        self.matrix[1:5, -16:-7] = np.reshape(c, (9, 4)).T
-
     def __repr__(self) -> str:
         """Convert the HN code to a matrix of pixels."""
         return repr_matrix(self.matrix)
 
 
 if __name__ == "__main__":
-    gf = gl.GF(8)
-    code = Code(gf.Random(shape=(Code.number_of_symbols(23),)), gf, error_correction_level=2, mask = 4, encoding = 2)
+    gf = galois_field(8)
+    code = Code(gf.Random(shape=(Code.number_of_symbols(23),)), gf, error_correction_level=2, mask = None, encoding = 2)
     print(code)
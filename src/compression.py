@@ -1 +0,0 @@
-#!/usr/bin/env python3
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import json
+import numpy as np
+from dataclasses import dataclass
+from typing import List
+
+# Binary code book files start with the magic bytes followed by the (little endian) header fields:
+#   magic (4 bytes), version (uint16), base (uint16), symbol length (uint16), reserved (uint16), number of symbols (uint64),
+# padded to HEADER_SIZE bytes. The header is followed by the code lengths (uint8, one per symbol, in canonical order),
+# padded to a multiple of 4 bytes, and the code points of the symbols (uint32, symbol length per symbol).
+CODEBOOK_MAGIC = b"HNCB"
+CODEBOOK_VERSION = 1
+HEADER_SIZE = 32
+
+_HEADER = np.dtype([("magic", "S4"), ("version", "<u2"), ("base", "<u2"), ("symbol_length", "<u2"), ("reserved", "<u2"), ("symbols", "<u8")])
+
+
+@dataclass(frozen=True)
+class CodeBook:
+    """A canonical code book, given by the code length of each symbol with the symbols in canonical order (by length
+       and then by symbol), since the codes themselves are determined by the lengths. The arrays may be memory mapped."""
+    base: int
+    symbol_length: int
+    lengths: np.ndarray  # (symbols,) code lengths.
+    points: np.ndarray   # (symbols, symbol_length) code points of the characters of each symbol.
+
+    @property
+    def symbols(self) -> List[str]:
+        """The symbols of the code book, in canonical order."""
+        text = np.asarray(self.points, dtype="<u4").tobytes().decode("utf-32-le")
+        return [text[i:i + self.symbol_length] for i in range(0, len(text), self.symbol_length)]
+
+    @classmethod
+    def from_huffman(cls, huffman) -> CodeBook:
+        """The code book of a huffman code, (whose symbols must be strings of the symbol length.)"""
+        return cls.from_symbols(huffman.symbols, huffman.lengths, huffman.base)
+
+    @classmethod
+    def from_symbols(cls, symbols: List[str], lengths: np.ndarray, base: int) -> CodeBook:
+        """The code book of the symbols (strings of equal length) with the given code lengths, which are sorted into canonical order."""
+        symbol_length = len(symbols[0]) if symbols else 1
+        if any(not isinstance(sym, str) or len(sym) != symbol_length for sym in symbols):
+            raise ValueError("Expected the symbols of the code book to be strings of equal length")
+
+        lengths = np.asarray(lengths, dtype=np.int64)
+        if lengths.shape[0] and (lengths.min() < 1 or lengths.max() > np.iinfo(np.uint8).max):
+            raise ValueError(f"Expected code lengths between 1 and {np.iinfo(np.uint8).max}")
+
+        order = sorted(range(len(symbols)), key=lambda idx: (lengths[idx], symbols[idx]))
+        text = "".join(symbols[idx] for idx in order)
+        points = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).reshape(len(symbols), symbol_length)
+        return cls(base=base, symbol_length=symbol_length, lengths=lengths[order].astype(np.uint8), points=points)
+
+
+def save_codebook(path: str, code_book: CodeBook) -> None:
+    """Store the code book in the binary code book format."""
+    header = np.zeros(1, dtype=_HEADER)
+    header[0] = (CODEBOOK_MAGIC, CODEBOOK_VERSION, code_book.base, code_book.symbol_length, 0, code_book.lengths.shape[0])
+    padding = (-code_book.lengths.shape[0]) % 4
+
+    with open(path, "wb") as file:
+        file.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+        file.write(np.asarray(code_book.lengths, dtype=np.uint8).tobytes() + b"\0" * padding)
+        file.write(np.asarray(code_book.points, dtype="<u4").tobytes())
+
+
+def load_codebook(path: str) -> CodeBook:
+    """Memory map a code book stored in the binary code book format, the arrays of the code book are read only views of the file."""
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    if data.shape[0] < HEADER_SIZE:
+        raise ValueError(f"{path} is too short to be a code book")
+
+    header = data[:_HEADER.itemsize].view(_HEADER)[0]
+    if header["magic"] != CODEBOOK_MAGIC:
+        raise ValueError(f"{path} isn't a code book (got the magic bytes {bytes(header['magic'])!r})")
+    elif header["version"] != CODEBOOK_VERSION:
+        raise ValueError(f"Unsupported code book version {header['version']}, expected {CODEBOOK_VERSION}")
+
+    number_of_symbols, symbol_length = int(header["symbols"]), int(header["symbol_length"])
+    start = HEADER_SIZE + number_of_symbols + (-number_of_symbols) % 4
+    if data.shape[0] != start + 4 * number_of_symbols * symbol_length:
+        raise ValueError(f"Expected the code book {path} to have {start + 4 * number_of_symbols * symbol_length} bytes, but it has {data.shape[0]}")
+
+    return CodeBook(base=int(header["base"]), symbol_length=symbol_length, lengths=data[HEADER_SIZE:HEADER_SIZE + number_of_symbols],
+                    points=data[start:].view("<u4").reshape(number_of_symbols, symbol_length))
+
+
+def import_json_codebook(path: str) -> CodeBook:
+    """Import a code book stored as json (as written by the genetic algorithm), i.e. {"base": .., "code_book": {symbol: digits}}.
+       Only the code lengths are kept, so the code words are replaced by the canonical codes of the same lengths."""
+    with open(path, "r") as file:
+        obj = json.load(file)
+
+    code_book = obj["code_book"]
+    return CodeBook.from_symbols(list(code_book.keys()), np.array([len(code) for code in code_book.values()], dtype=np.int64), int(obj["base"]))
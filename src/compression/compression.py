@@ -1 +1,38 @@
 #!/usr/bin/env python3
+import numpy as np
+from compression.packing import PackedBuffer, digit_bits, pack_fields, symbol_bits, unpack_fields
+
+# The payload is preceded by its number of digits, stored as a big endian integer of this many bytes.
+LENGTH_HEADER_BYTES = 4
+
+
+def number_of_frame_symbols(payload_bytes: int, order: int) -> int:
+    """The number of symbols of GF(order) needed to frame a payload of the given number of (packed) bytes."""
+    return -(-8 * (LENGTH_HEADER_BYTES + payload_bytes) // symbol_bits(order))
+
+
+def frame_payload(packed: PackedBuffer, order: int) -> np.ndarray:
+    """Convert a packed payload to a stream of symbols of GF(order), preceded by a header holding its number of digits."""
+    if packed.length >= 256 ** LENGTH_HEADER_BYTES:
+        raise ValueError(f"Can't frame a payload of {packed.length} digits")
+
+    header = np.frombuffer(packed.length.to_bytes(LENGTH_HEADER_BYTES, "big"), dtype=np.uint8)
+    stream = np.concatenate([header, packed.data])
+    return unpack_fields(stream, symbol_bits(order), number_of_frame_symbols(packed.nbytes, order))
+
+
+def unframe_payload(symbols: np.ndarray, order: int, base: int) -> PackedBuffer:
+    """Recover the packed payload (of base-ary digits) from a stream of symbols of GF(order) constructed by frame_payload,
+       symbols following the payload (such as padding) are ignored."""
+    symbols = np.asarray(symbols).reshape(-1)
+    # Only whole bytes of the stream hold the frame, a trailing partial byte is padding.
+    stream = pack_fields(symbols, symbol_bits(order))[:symbols.shape[0] * symbol_bits(order) // 8]
+    if stream.shape[0] < LENGTH_HEADER_BYTES:
+        raise ValueError("The symbol stream is too short to hold the length of the payload")
+
+    length = int.from_bytes(stream[:LENGTH_HEADER_BYTES].tobytes(), "big")
+    payload_bytes = -(-length * digit_bits(base) // 8)
+    if stream.shape[0] < LENGTH_HEADER_BYTES + payload_bytes:
+        raise ValueError(f"Expected a payload of {length} digits, but the symbol stream is too short")
+
+    return PackedBuffer(data=stream[LENGTH_HEADER_BYTES:LENGTH_HEADER_BYTES + payload_bytes], length=length, base=base)
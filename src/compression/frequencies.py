@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import numpy as np
+from typing import List, Tuple
+
+# Code points are below 0x110000 (21 bits), so symbols of up to 3 characters are packed into a single int64.
+_RADIX = 0x110000
+_MAXIMUM_PACKED_LENGTH = 3
+
+
+def _code_points(source: str, symbol_length: int) -> np.ndarray:
+    """The code points of each (disjoint) symbol of the source, of shape (symbols, symbol_length), a trailing partial symbol is ignored."""
+    count = len(source) // symbol_length
+    return np.frombuffer(source[:count * symbol_length].encode("utf-32-le"), dtype=np.uint32).reshape(count, symbol_length)
+
+
+def _pack(points: np.ndarray) -> np.ndarray:
+    """Pack the code points of each symbol into a single sortable key, which orders symbols like the strings they represent."""
+    if points.shape[1] <= _MAXIMUM_PACKED_LENGTH:
+        keys = np.zeros(points.shape[0], dtype=np.int64)
+        for column in points.T:
+            keys *= _RADIX
+            keys += column
+
+        return keys
+
+    # Longer symbols are compared as big endian bytes, which also orders them by their code points.
+    return np.ascontiguousarray(points, dtype=">u4").view(np.dtype((np.void, 4 * points.shape[1]))).reshape(-1)
+
+
+def _count(points: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum the counts of equal symbols, returning the distinct symbols (sorted) and their total counts."""
+    _, first, inverse = np.unique(_pack(points), return_index=True, return_inverse=True)
+    return points[first], np.bincount(inverse.reshape(-1), weights=counts, minlength=first.shape[0]).astype(np.int64)
+
+
+class FrequencyIndex:
+    """A sparse index of how often each symbol (a string of symbol_length characters) occurs, only storing the symbols
+    which have been seen. Counts from new sources can be merged into the index, and the index can be stored on disk,
+    such that code books can be rebuilt from a growing corpus without recounting it."""
+
+    def __init__(self, symbol_length: int):
+        """Initialize an empty index of symbols of the given length."""
+        if symbol_length < 1:
+            raise ValueError(f"Expected a positive symbol length, but got {symbol_length}")
+
+        self.symbol_length = symbol_length
+        self.points = np.zeros((0, symbol_length), dtype=np.uint32)  # (symbols, symbol_length) code points, sorted.
+        self.counts = np.zeros(0, dtype=np.int64)                     # (symbols,) the number of occurrences.
+
+    @classmethod
+    def from_source(cls, source: str, symbol_length: int) -> FrequencyIndex:
+        """Count the (disjoint) symbols of the source."""
+        index = cls(symbol_length)
+        index.update(source)
+        return index
+
+    def __len__(self) -> int:
+        """The number of distinct symbols in the index."""
+        return self.counts.shape[0]
+
+    @property
+    def symbols(self) -> List[str]:
+        """The symbols of the index, in sorted order."""
+        text = self.points.astype("<u4").tobytes().decode("utf-32-le")
+        return [text[i:i + self.symbol_length] for i in range(0, len(text), self.symbol_length)]
+
+    @property
+    def total(self) -> int:
+        """The total number of symbols counted."""
+        return int(np.sum(self.counts))
+
+    def frequencies(self) -> np.ndarray:
+        """The relative frequency of each symbol of the index."""
+        return self.counts / max(self.total, 1)
+
+    def _add(self, points: np.ndarray, counts: np.ndarray) -> None:
+        """Merge the given symbols and counts into the index."""
+        self.points, self.counts = _count(np.concatenate([self.points, points]), np.concatenate([self.counts, counts]))
+
+    def update(self, source: str) -> None:
+        """Count the (disjoint) symbols of the source, and add them to the index."""
+        points = _code_points(source, self.symbol_length)
+        self._add(points, np.ones(points.shape[0], dtype=np.int64))
+
+    def add_symbols(self, symbols: List[str]) -> None:
+        """Add the symbols to the index (with a count of zero) if they aren't already present, such that they are given codes."""
+        symbols = [sym for sym in symbols if len(sym) == self.symbol_length]
+        self._add(_code_points("".join(symbols), self.symbol_length), np.zeros(len(symbols), dtype=np.int64))
+
+    def merge(self, other: FrequencyIndex) -> None:
+        """Add the counts of the other index to this index."""
+        if other.symbol_length != self.symbol_length:
+            raise ValueError(f"Can't merge an index of symbol length {other.symbol_length} into one of symbol length {self.symbol_length}")
+
+        self._add(other.points, other.counts)
+
+    def save(self, path: str) -> None:
+        """Store the index as a .npz file."""
+        np.savez(path, symbol_length=self.symbol_length, points=self.points, counts=self.counts)
+
+    @classmethod
+    def load(cls, path: str) -> FrequencyIndex:
+        """Load an index stored by save."""
+        with np.load(path) as stored:
+            index = cls(int(stored["symbol_length"]))
+            index.points, index.counts = stored["points"].astype(np.uint32), stored["counts"].astype(np.int64)
+
+        return index
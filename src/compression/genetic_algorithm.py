@@ -1,62 +1,180 @@
 #!/usr/bin/env python3
-from src.compression.huffman import Huffman, Symbol
-from math import ceil
+from __future__ import annotations
+from compression.codebook import CodeBook, save_codebook
+from compression.huffman import Symbol, canonical_codes, digits
+from instrumentation import count, set_gauge, timed
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from math import ceil, log
 import numpy as np
 import json
-import galois as gl
-from typing import List
+from typing import List, Tuple
 
+# The message of the worker processes, attached to the shared memory by _attach_message.
+_message: np.ndarray | None = None
+_message_memory: shared_memory.SharedMemory | None = None
+
+
+def _attach_message(name: str, shape: Tuple[int, ...], dtype: str) -> None:
+    """Attach a worker process to the (symbol indicies of the) message stored in shared memory."""
+    global _message, _message_memory
+    _message_memory = shared_memory.SharedMemory(name=name)
+    _message = np.ndarray(shape, dtype=dtype, buffer=_message_memory.buf)
+
+
+def _count_symbols(start: int, stop: int, number_of_symbols: int) -> np.ndarray:
+    """Count the occurrences of each symbol in the given slice of the shared message."""
+    return np.bincount(_message[start:stop], minlength=number_of_symbols)
+
+
+def kraft_sums(lengths: np.ndarray, base: int) -> np.ndarray:
+    """Compute the Kraft sums (sum of base^-length) of each row of code lengths, a prefix code with the given
+       code lengths exists if and only if its Kraft sum is at most 1."""
+    return np.sum(float(base) ** -np.asarray(lengths, dtype=np.float64), axis=-1)
+
+
+class FitnessEvaluator:
+    """Evaluates the size of the compressed message for code books given by the code length of each symbol.
+
+    The sizes only depend on how often each symbol occurs (the size is the sum of frequency x code length), so the message
+    is counted once (by a pool of processes for large messages, which share the (symbol indicies of the) message through
+    shared memory), after which every evaluation of a generation is a single product of the code lengths and the frequencies."""
+
+    def __init__(self, message_ids: np.ndarray, number_of_symbols: int, processes: int | None = None, chunk_size: int = 1 << 20):
+        """Count the frequencies of the symbols in the message (given as symbol indicies). A single count is cheaper than
+           starting a pool, so the message is only counted by a pool of the given number of processes if asked for, and
+           if it spans more than one chunk."""
+        self.number_of_symbols = number_of_symbols
+        message_ids = np.ascontiguousarray(message_ids, dtype=np.min_scalar_type(max(number_of_symbols - 1, 0)))
+
+        if processes is None or processes <= 1 or message_ids.shape[0] <= chunk_size:
+            self.frequencies = np.bincount(message_ids, minlength=number_of_symbols)
+            return
+
+        memory = shared_memory.SharedMemory(create=True, size=max(message_ids.nbytes, 1))
+        try:
+            np.ndarray(message_ids.shape, dtype=message_ids.dtype, buffer=memory.buf)[:] = message_ids
+            starts = list(range(0, message_ids.shape[0], chunk_size))
+            # Forking a process after galois (and numba) has started its threads can leave the pool hanging at exit.
+            with ProcessPoolExecutor(processes, mp_context=get_context("spawn"), initializer=_attach_message,
+                                     initargs=(memory.name, message_ids.shape, message_ids.dtype.str)) as pool:
+                counts = pool.map(_count_symbols, starts, [start + chunk_size for start in starts], [number_of_symbols] * len(starts))
+                self.frequencies = np.sum(list(counts), axis=0)
+        finally:
+            memory.close()
+            memory.unlink()
+
+    def __call__(self, lengths: np.ndarray) -> np.ndarray:
+        """Compute the size of the compressed message (in digits) for each row of code lengths, of shape (agents, symbols)."""
+        return np.asarray(lengths, dtype=np.int64) @ self.frequencies
 
 
 class Genetic_Algorithm:
     """A genetic algorithm for optimizing the code books for huffman"""
 
-    def __init__ (self, symbol_length: int, number_of_agents: int, permutation_prob: float, base: int = 8):
+    def __init__ (self, symbol_length: int, number_of_agents: int, permutation_prob: float, base: int = 8, processes: int | None = None, seed: int | None = None):
         """"Initialize a list of agents (code_books). That will later be optimized"""
         self.symbol_length = symbol_length
         self.permuation_prob = permutation_prob
-        self.code_books = [{} for _ in range(number_of_agents)]
-        self.scores = [np.inf for _ in range(number_of_agents)]
+        self.base = base
+        self.processes = processes
+        self.rng = np.random.default_rng(seed)
+
+        # Every agent is given by the code length of each symbol, since a (canonical) code book is determined by its lengths.
+        self.number_of_agents = number_of_agents
+        self.lengths = np.zeros((number_of_agents, 0), dtype=np.int64)
+        self.scores = np.full(number_of_agents, np.inf)
+
+    def _symbol_ids(self, message: List[Symbol]) -> Tuple[List[Symbol], np.ndarray]:
+        """Split the message into (disjoint) symbols, returning the distinct symbols and the index of each symbol of the message."""
+        symbols = [message[i:i + self.symbol_length] for i in range(0, len(message) - self.symbol_length + 1, self.symbol_length)]
+        distinct, ids = np.unique(np.array(symbols), return_inverse=True)
+        return distinct.tolist(), ids.reshape(-1)
+
+    def _repair(self, lengths: np.ndarray) -> np.ndarray:
+        """Lengthen random codes of each agent until the code lengths satisfy the Kraft inequality."""
+        lengths = lengths.copy()
+        for agent in np.flatnonzero(kraft_sums(lengths, self.base) > 1.0):
+            while kraft_sums(lengths[agent], self.base) > 1.0:
+                lengths[agent, self.rng.integers(lengths.shape[1])] += 1
+
+        return lengths
+
+    def _initial_agents(self, number_of_symbols: int) -> np.ndarray:
+        """Construct random agents, by mutating the fixed length code book."""
+        fixed_length = max(1, ceil(log(max(number_of_symbols, 1), self.base) - 1e-9))
+        lengths = np.full((self.number_of_agents, number_of_symbols), fixed_length, dtype=np.int64)
+        return self._repair(self._mutate(lengths))
+
+    def _mutate(self, lengths: np.ndarray) -> np.ndarray:
+        """Mutate each code length with the permutation probability, either by swapping it with the code length of a
+           random symbol or by changing it by one."""
+        lengths = lengths.copy()
+        agents, symbols = np.nonzero(self.rng.random(lengths.shape) < self.permuation_prob)
+        others = self.rng.integers(0, lengths.shape[1], size=agents.shape[0])
+        swap = self.rng.random(agents.shape[0]) < 0.5
+
+        swapped = lengths[agents[swap], symbols[swap]]
+        lengths[agents[swap], symbols[swap]] = lengths[agents[swap], others[swap]]
+        lengths[agents[swap], others[swap]] = swapped
+        lengths[agents[~swap], symbols[~swap]] += self.rng.choice([-1, 1], size=np.count_nonzero(~swap))
+
+        return np.maximum(lengths, 1)
 
     def compute_offspring(self, uncompressed_size: int) -> None:
         """Computes the new agents based on the scores."""
-        # NOTE: might need to be reversed.
-        against_identity = [(uncompressed_size - score) / uncompressed_size for score in self.scores]
-        total_against_identity = sum(against_identity)
-        probs = [rel_score  / total_against_identity for rel_score in against_identity]
-        offspring = []
-        for _ in range(len(self.code_books)):
-            x, y = np.random.choice(self.code_books, probs, replace=False)
-            offspring.append()
+        # Parents are picked with a probability proportional to how much they compress the message, the best agent survives.
+        against_identity = np.maximum(uncompressed_size - self.scores, 0.0) + 1e-9
+        probs = against_identity / np.sum(against_identity)
+        parents = np.array([self.rng.choice(self.number_of_agents, size=2, replace=False, p=probs) for _ in range(self.number_of_agents)])
 
-        self.code_books = offspring
+        # Uniform crossover between the code lengths of the two parents, followed by mutation.
+        inherit = self.rng.random(self.lengths.shape) < 0.5
+        offspring = np.where(inherit, self.lengths[parents[:, 0]], self.lengths[parents[:, 1]])
+        offspring = self._repair(self._mutate(offspring))
+        offspring[0] = self.lengths[np.argmin(self.scores)]
 
+        self.lengths = offspring
 
-    def recompute_scores(self, message: List[Symbol]) -> None:
+    def recompute_scores(self, evaluator: FitnessEvaluator) -> None:
         """Check how well each code_book performs for compression."""
-        for idx, code_book in enumerate(self.code_books):
-            huffman = Huffman(code_book, symbol_length=self.symbol_length, will_be_decompressed=False)
-            self.scores[idx] = huffman.compress(message).shape[0]
+        self.scores = evaluator(self.lengths).astype(np.float64)
+
+    def _report(self, best_size: float, uncompressed_size: int) -> None:
+        """Report the progress of an iteration, i.e. the best size of the compressed message (in digits) and the ratio to the original size."""
+        set_gauge("hn_genetic_algorithm_best_size", best_size, "The best size of the compressed message (in digits).")
+        set_gauge("hn_genetic_algorithm_compression_ratio", best_size / uncompressed_size, "The best size relative to the uncompressed size.")
+
+    def code_book(self, symbols: List[Symbol], lengths: np.ndarray) -> dict:
+        """The canonical code book (mapping each symbol to the digits of its code) given the code lengths."""
+        ordered, ordered_lengths, codes = canonical_codes(symbols, lengths, self.base)
+        return {sym: digits(int(code), int(length), self.base) for (sym, length, code) in zip(ordered, ordered_lengths, codes)}
 
     def run(self, message: List[Symbol], alphabeth: List[Symbol], encoding: str, max_iter: int = 2):
-        """Run the genetic algorithm and return the best code_book as a json file."""
+        """Run the genetic algorithm and return the best code_book, which is also stored as a json file and a binary code book file."""
+        symbols, ids = self._symbol_ids(message)
+        evaluator = FitnessEvaluator(ids, len(symbols), self.processes)
+        self.lengths = self._initial_agents(len(symbols))
+
         # Perform the iterations.
-        uncompressed_size = len(message) * (ceil(len(alphabeth) / self.base))
-        for iter in range(1, max_iter + 1):
-            print(f"Now at iteration: {iter}")
-            self.recompute_scores(message)
-            new_best = min(self.scores)
-            print(f"  Best size: {new_best} [symbols]")
-            print(f"   - Compared to original: {new_best / uncompressed_size * 100} %")
-            self.compute_of_spring()
-
-        # Store the best code_book as a json file.
-        self.recompute_scores(message)
-        max_idx = self.scores.index(min(self.scores))
-        best_code_book = self.code_boks[max_idx]
-        final_best = min(self.scores)
-        print(f"Final best size: {final_best} [symbols]")
-        print(f" - Compared to orignial: {final_best / uncompressed_size * 100} %")
+        uncompressed_size = ids.shape[0] * self.symbol_length * max(1, ceil(log(max(len(alphabeth), 2), self.base) - 1e-9))
+        for _ in range(max_iter):
+            with timed("genetic_algorithm_iteration"):
+                self.recompute_scores(evaluator)
+                self._report(min(self.scores), uncompressed_size)
+                self.compute_offspring(uncompressed_size)
+            count("hn_genetic_algorithm_iterations_total", 1, "The number of iterations of the genetic algorithm.")
+
+        # Store the best code_book as a json file (and in the binary format, which can be memory mapped.)
+        self.recompute_scores(evaluator)
+        max_idx = int(np.argmin(self.scores))
+        best_code_book = self.code_book(symbols, self.lengths[max_idx])
+        self._report(min(self.scores), uncompressed_size)
         with open(f"{encoding}.json", "w+") as file:
             obj = {"base": self.base, "code_book": {key: list(val) for (key, val) in best_code_book.items()}}
             json.dump(obj, file)
+
+        if all(isinstance(sym, str) for sym in symbols):
+            save_codebook(f"{encoding}.hncb", CodeBook.from_symbols(symbols, self.lengths[max_idx], self.base))
+
+        return best_code_book
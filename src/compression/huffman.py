@@ -1,14 +1,252 @@
 from __future__ import annotations
 import os
-import galois as gl
 import numpy as np
-from math import ceil
-from typing import Any, List, Dict, Tuple
-from itertools import combinations_with_replacement
-from collections import ChainMap
+import heapq
+from math import ceil, isqrt, log2
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, List, Dict, Iterable, Iterator, Sequence, Tuple
+from compression.codebook import CodeBook
+from compression.frequencies import FrequencyIndex
+from compression.packing import PackedBuffer
+from field import galois_field
+from instrumentation import count, instrumented
+
+if TYPE_CHECKING:
+    import galois as gl
 
 Symbol = List[Any]
 
+# The largest number of entries in the table used to look up the index of a symbol (of characters) given its code points.
+KEY_TABLE_SIZE = 1 << 22
+
+
+def huffman_code_lengths(frequencies: np.ndarray, base: int = 2) -> np.ndarray:
+    """Compute the code lengths of an optimal base-ary huffman code for symbols with the given frequencies.
+
+       The base lightest nodes are merged using a heap, after padding with zero frequency dummy nodes
+       such that every merge (including the last) combines exactly base nodes, (n - 1) % (base - 1) = 0."""
+    n = frequencies.shape[0]
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    elif n == 1:
+        return np.ones(1, dtype=np.int64)
+
+    number_of_dummies = (-(n - 1)) % (base - 1)
+    heap = [(float(freq), idx) for idx, freq in enumerate(frequencies)] + [(0.0, n + idx) for idx in range(number_of_dummies)]
+    heapq.heapify(heap)
+
+    parents = np.zeros(n + number_of_dummies + (n + number_of_dummies - 1) // (base - 1), dtype=np.int64)
+    next_node = n + number_of_dummies
+    while len(heap) > 1:
+        total = 0.0
+        for _ in range(base):
+            freq, node = heapq.heappop(heap)
+            parents[node] = next_node
+            total += freq
+
+        heapq.heappush(heap, (total, next_node))
+        next_node += 1
+
+    # Nodes are created after their children, so the depths can be found by walking from the root.
+    depths = np.zeros(next_node, dtype=np.int64)
+    for node in range(next_node - 2, -1, -1):
+        depths[node] = depths[parents[node]] + 1
+
+    return depths[:n]
+
+
+def canonical_codes(symbols: List[Symbol], lengths: np.ndarray, base: int = 2) -> Tuple[List[Symbol], np.ndarray, np.ndarray]:
+    """Assign canonical codes given the code length of each symbol. The symbols are ordered by (length, symbol),
+       and each code is the previous code plus one, extended by zeros to the next length. Hence the code book
+       is determined by the code lengths alone. Returns the ordered symbols, their lengths and their codes (as integers)."""
+    order = sorted(range(len(symbols)), key=lambda idx: (lengths[idx], symbols[idx]))
+    ordered_lengths = np.asarray(lengths, dtype=np.int64)[order]
+
+    return [symbols[idx] for idx in order], ordered_lengths, canonical_code_values(ordered_lengths, base)
+
+
+def canonical_code_values(ordered_lengths: np.ndarray, base: int = 2) -> np.ndarray:
+    """Compute the canonical codes (as integers) given the code lengths of the symbols in canonical order. The first
+       code of each length is (first code + number of codes) of the previous length times the base, and the codes of a
+       length are consecutive."""
+    ordered_lengths = np.asarray(ordered_lengths, dtype=np.int64)
+    longest = int(ordered_lengths[-1]) if ordered_lengths.shape[0] else 0
+    if longest * log2(base) > 62:
+        codes = np.zeros(ordered_lengths.shape[0], dtype=object)
+        for idx in range(1, ordered_lengths.shape[0]):
+            codes[idx] = (codes[idx - 1] + 1) * base ** int(ordered_lengths[idx] - ordered_lengths[idx - 1])
+
+        return codes
+
+    counts = np.bincount(ordered_lengths, minlength=longest + 1)
+    first = np.zeros(longest + 1, dtype=np.int64)
+    for length in range(int(ordered_lengths[0]) + 1 if ordered_lengths.shape[0] else 1, longest + 1):
+        first[length] = (first[length - 1] + counts[length - 1]) * base
+
+    starts = np.cumsum(counts) - counts
+    return first[ordered_lengths] + np.arange(ordered_lengths.shape[0]) - starts[ordered_lengths]
+
+
+def digits(code: int, length: int, base: int = 2) -> List[int]:
+    """The base-ary digits of the code, (most significant digit first) padded to the given length."""
+    return [(code // base ** (length - 1 - idx)) % base for idx in range(length)]
+
+
+class HuffmanDecoder:
+    """A table driven decoder for prefix codes, where each table lookup resolves (up to) table_digits digits.
+
+    Codes longer than table_digits continue in sub tables (one level per table_digits digits), all tables are stored in
+    flat arrays where each entry holds the index of the decoded symbol and the length of its code, or the offset of the
+    sub table to continue in. Decoding computes the table entry at every position of the message at once, after which
+    the message is decoded by jumping from code to code, using one table hit per symbol."""
+
+    def __init__(self, code_words: List[Sequence[int]], symbols: List[Symbol], base: int = 2, table_digits: int | None = None):
+        """Construct the decoding tables for the given code words (as lists of digits) and their symbols."""
+        self.symbols = list(symbols)
+        self._symbol_table = np.empty(len(self.symbols), dtype=object)
+        self._symbol_table[:] = self.symbols
+        self.base = base
+        self.max_length = max((len(word) for word in code_words), default=1)
+        self.table_digits = table_digits or max(1, min(self.max_length, int(12 / log2(base))))
+        self.levels = ceil(self.max_length / self.table_digits)
+
+        # Entries have length 0 if they aren't the prefix of any code word (and child -1 unless they point to a sub table.)
+        self._symbol, self._length, self._child = [], [], []
+        self._construct_table([(tuple(word), idx) for (idx, word) in enumerate(code_words)], level=0)
+        self._symbol = np.array(self._symbol, dtype=np.int64)
+        self._length = np.array(self._length, dtype=np.int64)
+        self._child = np.array(self._child, dtype=np.int64)
+
+    def _construct_table(self, code_words: List[Tuple[Tuple[int, ...], int]], level: int) -> int:
+        """Construct the table for code words sharing their first level * table_digits digits, returning its offset."""
+        width, offset = self.table_digits, len(self._symbol)
+        size = self.base ** width
+        self._symbol.extend([-1] * size)
+        self._length.extend([0] * size)
+        self._child.extend([-1] * size)
+
+        prefixes: Dict[int, List[Tuple[Tuple[int, ...], int]]] = {}
+        for (word, idx) in code_words:
+            rest = word[level * width:]
+            value = sum(digit * self.base ** (width - 1 - i) for (i, digit) in enumerate(rest[:width]))
+            if len(rest) <= width:
+                # Every window starting with the rest of the code word decodes to its symbol.
+                start, span = value, self.base ** (width - len(rest))
+                self._symbol[offset + start:offset + start + span] = [idx] * span
+                self._length[offset + start:offset + start + span] = [len(word)] * span
+            else:
+                prefixes.setdefault(value, []).append((word, idx))
+
+        for (value, words) in prefixes.items():
+            self._child[offset + value] = self._construct_table(words, level + 1)
+
+        return offset
+
+    def _resolve(self, message: np.ndarray, positions: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Compute the symbol (index) and code length of the code word starting at each of the first positions of the message."""
+        padded = np.zeros(positions + self.levels * self.table_digits, dtype=np.int32)
+        padded[:min(message.shape[0], padded.shape[0])] = message[:padded.shape[0]]
+
+        # The windows are computed with Horner's rule (in place), which is faster than a product with the powers.
+        number_of_windows = padded.shape[0] - self.table_digits + 1
+        windows = np.zeros(number_of_windows, dtype=np.int32)
+        for idx in range(self.table_digits):
+            windows *= self.base
+            windows += padded[idx:idx + number_of_windows]
+
+        # Only the (few) positions which continue in a sub table are resolved at the deeper levels.
+        entry = windows[:positions].astype(np.int64)
+        pending = np.arange(positions)
+        for level in range(1, self.levels):
+            child = self._child[entry[pending]]
+            continues = child >= 0
+            pending = pending[continues]
+            if pending.shape[0] == 0:
+                break
+
+            entry[pending] = child[continues] + windows[pending + level * self.table_digits]
+
+        return self._symbol[entry], self._length[entry]
+
+    def _walk(self, lengths: np.ndarray, stop: int) -> Tuple[np.ndarray, int]:
+        """Jump from code word to code word, starting at position 0 until reaching (or passing) the stop position,
+           returning the positions of the code words along with the position after the last one.
+
+           The jumps are vectorized by splitting the message in blocks, which are all walked at once from their first
+           position. Prefix codes resynchronize quickly, so the walk from the true entry point of a block (the exit of the
+           previous block) usually joins the speculative walk after a few code words, from where on the two agree."""
+        # Balance the number of (vectorized) jumps within a block against the number of blocks which are linked one by one.
+        block_size = max(2 * self.max_length, isqrt(4 * stop))
+        starts = np.arange(0, stop, block_size)
+        ends = np.minimum(starts + block_size, stop)
+        invalid = stop + self.max_length
+
+        # Positions past the stop position jump to themselves, so every position reached can be looked up.
+        jumps = np.arange(invalid + 1)
+        jumps[:stop] = np.where(lengths[:stop] > 0, jumps[:stop] + lengths[:stop], invalid)
+
+        # 1. Speculatively walk every block from its first position, marking the code words on the way.
+        path = np.zeros(invalid + 1, dtype=bool)
+        exits = starts.copy()
+        active = exits < ends
+        while active.any():
+            path[exits[active]] = True
+            exits = np.where(active, jumps[exits], exits)
+            active = exits < ends
+
+        # 2. Walk each block from its true entry point until joining the speculative walk, and correct the marks before it.
+        position = 0
+        for (block, (start, end)) in enumerate(zip(starts.tolist(), ends.tolist())):
+            if position >= invalid:
+                raise ValueError("Couldn't decompress the recived message.")
+
+            walked = []
+            while position < end and not path[position]:
+                walked.append(position)
+                position = int(jumps[position])
+
+            joined = min(position, end)
+            path[start:joined] = False
+            path[walked] = True
+            if position < end:
+                position = int(exits[block])
+
+        positions = np.flatnonzero(path[:stop])
+        if position >= invalid or np.any(lengths[positions] == 0):
+            raise ValueError("Couldn't decompress the recived message.")
+
+        return positions, position
+
+    def decode(self, message: np.ndarray) -> List[Symbol]:
+        """Decode the entire message (an array of digits)."""
+        message = np.asarray(message, dtype=np.int64)
+        symbols, lengths = self._resolve(message, message.shape[0])
+        positions, position = self._walk(lengths, message.shape[0])
+        if position != message.shape[0]:
+            raise ValueError("Couldn't decompress the recived message.")
+
+        return self._symbol_table[symbols[positions]].tolist()
+
+    def decode_stream(self, chunks: Iterable[np.ndarray]) -> Iterator[List[Symbol]]:
+        """Decode a message given as an iterable of chunks (arrays of digits), yielding the symbols decoded from each chunk.
+           Digits of a code word which is split between chunks are carried over to the next chunk."""
+        pending = np.zeros(0, dtype=np.int64)
+        for chunk in chunks:
+            buffer = np.concatenate([pending, np.asarray(chunk, dtype=np.int64)])
+
+            # Only code words which are guaranteed to be complete are decoded, the rest is carried over.
+            safe = buffer.shape[0] - self.max_length + 1
+            if safe <= 0:
+                pending = buffer
+                continue
+
+            symbols, lengths = self._resolve(buffer, safe)
+            positions, position = self._walk(lengths, safe)
+            pending = buffer[position:]
+            yield self._symbol_table[symbols[positions]].tolist()
+
+        yield self.decode(pending)
+
 
 class Huffman:
     """Huffman coding for compression."""
@@ -16,83 +254,170 @@ class Huffman:
     # We use binary compression, the compressed bits are later converted to base 8
     def __init__(self, source: List[Any], alphabeth: List[Any], symbol_length: int, base: int = 2):
         """Intialize the hufffman code, given the alphabeth and symbol length."""
-        # 1. Construct frequency map by iterating over each symbol of the given length
+        # 1. Count each (disjoint) symbol of the given length, the symbols of the alphabeth (of the symbol length) are
+        #    given codes even if they aren't in the source.
+        index = FrequencyIndex.from_source(source, symbol_length)
+        index.add_symbols(list(alphabeth))
 
-        frequencies = {"".join(sym): 0.0 for sym in combinations_with_replacement(alphabeth, symbol_length)}
-        n = ceil(len(source) / symbol_length)
-        for (idx, sym) in enumerate([source[i : i + symbol_length] for i in range(len(source) - symbol_length + 1)]):
-            if idx % symbol_length != 0:  # Skip symbols which aren't disjoint.
-                continue
+        # 2. Construct the code book
+        self._initialize(index, base)
 
-            frequencies[str(sym)] = frequencies.get(sym, 0) + 1 / n
+    @classmethod
+    def from_frequency_index(cls, index: FrequencyIndex, base: int = 2) -> Huffman:
+        """Construct the huffman code of the symbols counted by the (possibly stored and merged) frequency index."""
+        huffman = cls.__new__(cls)
+        huffman._initialize(index, base)
+        return huffman
 
-        # 2. Construct the code book
-        symbols_ordered_by_frequency = sorted(frequencies.items(), key = lambda item: item[1], reverse=True)
-        self.symbol_length = symbol_length
+    @classmethod
+    def from_code_book(cls, code_book: CodeBook) -> Huffman:
+        """Construct the huffman code of a (stored) canonical code book, without recomputing the code lengths."""
+        huffman = cls.__new__(cls)
+        huffman.symbol_length = code_book.symbol_length
+        huffman.base = code_book.base
+        huffman._assign_codes(code_book.symbols, np.asarray(code_book.lengths, dtype=np.int64))
+        return huffman
+
+    @instrumented("huffman_build")
+    def _initialize(self, index: FrequencyIndex, base: int) -> None:
+        """Construct the code book given the frequency index."""
+        self.symbol_length = index.symbol_length
         self.base = base
-        self.gf = gl.GF(base)
-        self.code_book = self._construct_huffman_codebook(symbols_ordered_by_frequency)
-        # self.reversed_code_book = {val: sym for (sym, val) in self.code_book.items()}
+        self._construct_huffman_codebook(dict(zip(index.symbols, index.frequencies())))
+
+    def _construct_huffman_codebook(self, frequencies: Dict[Symbol, float]) -> None:
+        """Construct a canonical huffman code book given the frequency of each symbol."""
+        symbols = list(frequencies.keys())
+        lengths = huffman_code_lengths(np.fromiter(frequencies.values(), dtype=np.float64, count=len(symbols)), self.base)
+        self._assign_codes(*canonical_codes(symbols, lengths, self.base)[:2])
+
+    def _assign_codes(self, symbols: List[Symbol], ordered_lengths: np.ndarray) -> None:
+        """Assign the canonical codes to the symbols, given in canonical order along with their code lengths."""
+        self.symbols, self.lengths = symbols, ordered_lengths
+        self.codes = canonical_code_values(ordered_lengths, self.base)
+        self._construct_code_table()
+
+    @cached_property
+    def gf(self) -> type[gl.FieldArray]:
+        """The field of the digits of the code words, (which is only constructed when compressing to field arrays.)"""
+        return galois_field(self.base)
+
+    @cached_property
+    def code_book(self) -> Dict[Symbol, gl.FieldArray]:
+        """The code word of each symbol."""
+        return {sym: self.gf(self._code_table[idx, :length]) for (idx, (sym, length)) in enumerate(zip(self.symbols, self.lengths))}
+
+    def _construct_code_table(self) -> None:
+        """Construct the flat tables used for compression: the digits of each code word (padded with zeros to the longest
+           code word) along with a mask of the digits in use, and the index of each symbol."""
+        longest = int(self.lengths[-1]) if len(self.symbols) else 0
+        self._code_mask = np.arange(longest)[np.newaxis, :] < self.lengths[:, np.newaxis]
+        if self.codes.dtype == object:
+            self._code_table = np.zeros((len(self.symbols), longest), dtype=np.uint8)
+            for (idx, (length, code)) in enumerate(zip(self.lengths, self.codes)):
+                self._code_table[idx, :length] = digits(code, int(length), self.base)
+        else:
+            # The digit at position j of a code of length l is (code // base^(l - 1 - j)) % base.
+            exponents = np.maximum(self.lengths[:, np.newaxis] - 1 - np.arange(longest)[np.newaxis, :], 0)
+            table = (self.codes[:, np.newaxis] // self.base ** exponents) % self.base
+            self._code_table = np.where(self._code_mask, table, 0).astype(np.uint8)
 
-    def _construct_huffman_codebook(self, symbols_ordered_by_frequency: List[Tuple[Symbol, float]], path: List[int] = []) -> Dict[Symbol, gl.FieldArray]:
-        """Construct a huffman code book given the information provided."""
-        # Termination criteria:
-        if len(symbols_ordered_by_frequency) == 1:
-            return {sym: self.gf(path) for (sym, _) in symbols_ordered_by_frequency}
+        self._symbol_index = {sym: idx for (idx, sym) in enumerate(self.symbols)}
 
-        elif len(symbols_ordered_by_frequency) <= self.base:
-            return  {sym: self.gf([*path, idx]) for idx, (sym, _) in enumerate(symbols_ordered_by_frequency)}
+        # Strings are identified by the code points of their characters, combined into a single integer key (using the
+        # largest code point of the code book plus one as the radix) which indexes a dense table of symbol indicies.
+        self._key_table = None
+        if len(self.symbols) and all(isinstance(sym, str) and len(sym) == self.symbol_length for sym in self.symbols):
+            self._radix = max(ord(char) for sym in self.symbols for char in sym) + 1
+            if self._radix ** self.symbol_length <= KEY_TABLE_SIZE:
+                # The last entry is hit by the key -1, of symbols containing characters outside the code book.
+                self._key_table = np.full(self._radix ** self.symbol_length + 1, -1, dtype=np.int32)
+                self._key_table[self._keys("".join(self.symbols))] = np.arange(len(self.symbols))
 
-        total_freq = sum(map(lambda tup: tup[1], symbols_ordered_by_frequency))
-        cutoff_indicies = self._cuttof_indicies([freq for (_, freq) in symbols_ordered_by_frequency], total_freq)
-        split_symbols_ordered_by_frequency = [symbols_ordered_by_frequency[start : end] for (start, end) in zip(cutoff_indicies[:-1], cutoff_indicies[1:])]
-        code_books = [self._construct_huffman_codebook(sym_and_freq, path = [*path, idx]) for idx, sym_and_freq in enumerate(split_symbols_ordered_by_frequency)]
+    def _keys(self, message: str) -> np.ndarray:
+        """Combine the code points of each (disjoint) symbol of the message into a single integer, or -1 if it contains a
+           character beyond the radix."""
+        points = np.frombuffer(message.encode("utf-32-le"), dtype=np.uint32).reshape(-1, self.symbol_length)
+        keys = np.zeros(points.shape[0], dtype=np.int64)
+        for column in points.T:
+            keys *= self._radix
+            keys += column
 
-        return dict(ChainMap(*list(filter(lambda code_book: code_book is not None, code_books))))
+        keys[np.any(points >= self._radix, axis=1)] = -1
+        return keys
 
-    def _cuttof_indicies(self, freqs: List[float], total_freq: float) -> Tuple[int]:
-        """Compute the cuttoff indicies given the list of frequenciese and the total frequency."""
-        cutoffs = [0]
-        for idx in range(self.base):
-            cutoffs.append(cutoffs[-1] + 1)
-            while sum(freqs[cutoffs[idx]:cutoffs[idx + 1]]) < (total_freq / self.base) and cutoffs[-1] < len(freqs):
-                cutoffs[-1] += 1
+    def symbol_ids(self, message: List[Any]) -> np.ndarray:
+        """Map each (disjoint) symbol of the message to its index in the code book, the length of the message must be a
+           multiple of the symbol length (a trailing partial symbol can't be compressed)."""
+        if len(message) % self.symbol_length != 0:
+            raise ValueError(f"Expected a message whose length is a multiple of {self.symbol_length}, but got {len(message)}")
 
-            #cutoffs[-1] -= # for some reason it overshoots
+        number_of_symbols = len(message) // self.symbol_length
+        if isinstance(message, str) and self._key_table is not None:
+            ids = self._key_table[self._keys(message)]
+            missing = np.flatnonzero(ids < 0)
+            if missing.shape[0] != 0:
+                sym = message[missing[0] * self.symbol_length:(missing[0] + 1) * self.symbol_length]
+                raise ValueError(f"Got the symbol {sym}, but it was not found in the code book!")
+
+            return ids
 
-        return cutoffs
+        try:
+            return np.fromiter((self._symbol_index[message[i:i + self.symbol_length]] for i in range(0, number_of_symbols * self.symbol_length, self.symbol_length)),
+                               dtype=np.int64, count=number_of_symbols)
+        except KeyError as error:
+            raise ValueError(f"Got the symbol {error.args[0]}, but it was not found in the code book!") from None
 
+    @instrumented("huffman_compress")
     def compress(self, message: List[Any]) -> gl.FieldArray:
         """Compress the message and return it as a galois array."""
-        buffer = []
+        ids = self.symbol_ids(message)
+        count("hn_huffman_symbols_compressed_total", ids.shape[0], "The number of symbols compressed by huffman codes.")
+        return self._code_table[ids][self._code_mask[ids]].view(self.gf)
 
-        # Iterate through each block of NON OVERLAPPING information of the message (of synmbol length)
-        for (start_idx, sym) in enumerate([message[i:i + self.symbol_length] for i in range(len(message) - self.symbol_length + 1)]):
-            if start_idx % self.symbol_length != 0:
-                continue
+    def compress_many(self, messages: List[List[Any]]) -> List[gl.FieldArray]:
+        """Compress each of the messages, the code words of every message are gathered at once into a single buffer,
+           which the returned galois arrays are views of."""
+        return [compressed.view(self.gf) for compressed in self._compress_many(messages)]
 
-            if sym in self.code_book.keys():
-                buffer.append(self.code_book[sym])
-            else:
-                raise ValueError(f"Got the symbol {sym}, but it was not found in the code book!")
+    @instrumented("huffman_compress")
+    def _compress_many(self, messages: List[List[Any]]) -> List[np.ndarray]:
+        """Compress each of the messages into (views of a single buffer of) plain arrays of digits."""
+        if len(messages) == 0:
+            return []
 
-        return np.concatenate(buffer)
+        ids = [self.symbol_ids(message) for message in messages]
+        sizes = [int(np.sum(self.lengths[message_ids])) for message_ids in ids]
+        ids = np.concatenate(ids)
+        count("hn_huffman_symbols_compressed_total", ids.shape[0], "The number of symbols compressed by huffman codes.")
+        buffer = self._code_table[ids][self._code_mask[ids]]
 
-    def decompress(self, recived_message: gl.FieldArray) -> List[Any]:
-        """Decompresses the recived message."""
-        buffer = []
-        start, end = 0, 1
-        while end != recived_message.shape[0]:
-            if recived_message[start : end] in self.reversed_code_book.keys():
-                buffer.append(self.reversed_code_book[recived_message[start : end]])
-                start = end
+        return np.split(buffer, np.cumsum(sizes)[:-1])
 
-            end += 1
+    def compress_packed(self, message: List[Any]) -> PackedBuffer:
+        """Compress the message into a packed buffer, (with log2(base) bits per digit.)"""
+        return PackedBuffer.from_digits(self._compress_many([message])[0], self.base)
 
-        if start != end:
-            raise ValueError("Couldn't decompress the recived message.")
+    def compress_many_packed(self, messages: List[List[Any]]) -> List[PackedBuffer]:
+        """Compress each of the messages into a packed buffer."""
+        return [PackedBuffer.from_digits(compressed, self.base) for compressed in self._compress_many(messages)]
+
+    @cached_property
+    def decoder(self) -> HuffmanDecoder:
+        """The table driven decoder of the code book."""
+        return HuffmanDecoder([row[:length] for (row, length) in zip(self._code_table.tolist(), self.lengths.tolist())], self.symbols, self.base)
+
+    @instrumented("huffman_decompress")
+    def decompress(self, recived_message: gl.FieldArray | PackedBuffer) -> List[Any]:
+        """Decompresses the recived message (given as digits or as a packed buffer)."""
+        if isinstance(recived_message, PackedBuffer):
+            recived_message = recived_message.digits()
+
+        return self.decoder.decode(np.asarray(recived_message))
 
-        return buffer
+    def decompress_stream(self, chunks: Iterable[gl.FieldArray]) -> Iterator[List[Any]]:
+        """Decompresses a recived message given in chunks, yielding the symbols as soon as they are decoded."""
+        return self.decoder.decode_stream(np.asarray(chunk) for chunk in chunks)
 
 if __name__ == "__main__":
     print("Compressing Romeo & Juliet script. (Consisting only of ascii characters)")
@@ -2,8 +2,11 @@
 from __future__ import annotations
 from dataclasses import dataclass
 import numpy as np
-import galois as gl
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any, List
+from compression.huffman import HuffmanDecoder
+
+if TYPE_CHECKING:
+    import galois as gl
 
 Symbol = Any
 
@@ -14,7 +17,7 @@ class HuffmanNode:
     freq: float
     children: [HuffmanNode]
 
-    @property()
+    @property
     def total_frequency (self) -> float:
         """Compute the total frequency of the branch"""
         return self.freq + sum(child.total_frequency for child in self.children)
@@ -29,7 +32,8 @@ class Compression:
         self.symbol_length = symbol_length
         self.code_book = code_book
         if will_be_decompressed:
-            self.reversed_code_book = {val: key for (key, val) in self.code_book.items()}
+            self.decoder = HuffmanDecoder([np.asarray(code) for code in self.code_book.values()], list(self.code_book.keys()),
+                                          base=max((type(code).order for code in self.code_book.values()), default=2))
 
     def compress(self, message: List[Symbol]) -> gl.FieldArray:
         """Compress the message and return it as a galois array."""
@@ -49,16 +53,4 @@ class Compression:
 
     def decompress(self, recived_message: gl.FieldArray) -> List[Symbol]:
         """Decompresses the recived message."""
-        buffer = []
-        start, end = 0, 1
-        while end != recived_message.shape[0]:
-            if recived_message[start : end] in self.reversed_code_book.keys():
-                buffer.append(self.reversed_code_book[recived_message[start : end]])
-                start = end
-
-            end += 1
-
-        if start != end:
-            raise ValueError("Couldn't decompress the recived message.")
-
-        return buffer
+        return self.decoder.decode(np.asarray(recived_message))
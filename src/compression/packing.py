@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import numpy as np
+from dataclasses import dataclass
+from math import ceil, gcd, log2
+
+
+def _group(bits: int) -> tuple:
+    """The number of bytes and fields of the smallest group of whole bytes holding whole fields of the given width."""
+    group_bits = 8 * bits // gcd(8, bits)
+    return group_bits // 8, group_bits // bits
+
+
+def pack_fields(values: np.ndarray, bits: int) -> np.ndarray:
+    """Pack the values (each below 2^bits) into a stream of bytes, as consecutive fields of the given width (most
+       significant bit first), the last byte is padded with zeros."""
+    if not 1 <= bits <= 8:
+        raise ValueError(f"Expected fields of 1 to 8 bits, but got {bits}")
+
+    values = np.asarray(values).reshape(-1)
+    if bits == 8:
+        return values.astype(np.uint8)
+
+    # Fields are packed a group at a time, each group of fields fills a whole number of bytes (and at most 8).
+    group_bytes, group_fields = _group(bits)
+    padded = np.zeros(ceil(values.shape[0] / group_fields) * group_fields, dtype=np.uint64)
+    padded[:values.shape[0]] = values
+    words = np.zeros(padded.shape[0] // group_fields, dtype=np.uint64)
+    for field in padded.reshape(-1, group_fields).T:
+        words <<= np.uint64(bits)
+        words |= field
+
+    shifts = (8 * np.arange(group_bytes - 1, -1, -1)).astype(np.uint64)
+    data = (words[:, np.newaxis] >> shifts).astype(np.uint8).reshape(-1)
+    return data[:ceil(values.shape[0] * bits / 8)]
+
+
+def unpack_fields(data: np.ndarray, bits: int, count: int) -> np.ndarray:
+    """Read count fields of the given width from a stream of bytes packed by pack_fields."""
+    if not 1 <= bits <= 8:
+        raise ValueError(f"Expected fields of 1 to 8 bits, but got {bits}")
+
+    data = np.asarray(data, dtype=np.uint8).reshape(-1)
+    if bits == 8:
+        return data[:count]
+
+    group_bytes, group_fields = _group(bits)
+    padded = np.zeros(ceil(data.shape[0] / group_bytes) * group_bytes, dtype=np.uint64)
+    padded[:data.shape[0]] = data
+    words = np.zeros(padded.shape[0] // group_bytes, dtype=np.uint64)
+    for byte in padded.reshape(-1, group_bytes).T:
+        words <<= np.uint64(8)
+        words |= byte
+
+    shifts = (bits * np.arange(group_fields - 1, -1, -1)).astype(np.uint64)
+    fields = ((words[:, np.newaxis] >> shifts) & np.uint64((1 << bits) - 1)).astype(np.uint8).reshape(-1)
+    return fields[:count]
+
+
+@dataclass(frozen=True)
+class PackedBuffer:
+    """A compressed payload of base-ary digits, stored as a stream of bytes holding ceil(log2(base)) bit fields, i.e. one
+    bit per digit for binary payloads. The stream can be read back as digits, or regrouped as the symbols of GF(2^m)."""
+    data: np.ndarray  # (ceil(length * bits / 8),) uint8
+    length: int       # The number of digits.
+    base: int
+
+    @property
+    def bits(self) -> int:
+        """The width of the field of each digit."""
+        return digit_bits(self.base)
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the packed digits."""
+        return self.data.nbytes
+
+    def __len__(self) -> int:
+        """The number of digits."""
+        return self.length
+
+    @classmethod
+    def from_digits(cls, digits: np.ndarray, base: int) -> PackedBuffer:
+        """Pack the base-ary digits."""
+        digits = np.asarray(digits).reshape(-1)
+        return cls(data=pack_fields(digits, digit_bits(base)), length=digits.shape[0], base=base)
+
+    @classmethod
+    def from_symbols(cls, symbols: np.ndarray, order: int, length: int, base: int) -> PackedBuffer:
+        """The packed buffer of length digits, given (the start of) its symbol stream in GF(order) as returned by symbols."""
+        bits = digit_bits(base)
+        data = pack_fields(symbols, symbol_bits(order))
+        if data.shape[0] * 8 < length * bits:
+            raise ValueError(f"Expected at least {ceil(length * bits / symbol_bits(order))} symbols, but got {np.asarray(symbols).size}")
+
+        return cls(data=data[:ceil(length * bits / 8)], length=length, base=base)
+
+    def digits(self) -> np.ndarray:
+        """Unpack the digits."""
+        return unpack_fields(self.data, self.bits, self.length)
+
+    def number_of_symbols(self, order: int) -> int:
+        """The number of symbols of GF(order) needed to hold the packed digits."""
+        return ceil(self.length * self.bits / symbol_bits(order))
+
+    def symbols(self, order: int) -> np.ndarray:
+        """Regroup the packed bits as a stream of symbols of GF(order) (where order is a power of two), the last symbol is
+           padded with zeros. For GF(256) the symbols are a view of the packed bytes."""
+        return unpack_fields(self.data, symbol_bits(order), self.number_of_symbols(order))
+
+
+def digit_bits(base: int) -> int:
+    """The width of the field of a base-ary digit, digits are packed in at most a byte (so base is at most 256)."""
+    if not 2 <= base <= 256:
+        raise ValueError(f"Expected the base of the digits to be between 2 and 256, but got {base}")
+
+    return max(1, ceil(log2(base)))
+
+
+def symbol_bits(order: int) -> int:
+    """The number of bits of a symbol of GF(order), which must be a power of two (at most 256)."""
+    bits = int(round(log2(order))) if order > 1 else 0
+    if not 1 <= bits <= 8 or 2 ** bits != order:
+        raise ValueError(f"Expected the order of the field to be a power of two (at most 256), but got {order}")
+
+    return bits
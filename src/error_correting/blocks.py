@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable, Tuple
+from error_correting.reed_solomon import ReedSolomonCode
+
+# The fewest words each thread decodes, below which the blocks are decoded in the calling thread.
+MIN_WORDS_PER_WORKER = 1024
+
+
+@dataclass(frozen=True)
+class BlockStats:
+    """The number of symbols corrected in each block of a batch of codes (of shape (N, blocks)), where -1 marks a block
+       which couldn't be decoded."""
+    corrected: np.ndarray
+
+    @property
+    def failed_blocks(self) -> np.ndarray:
+        """The number of blocks of each code which couldn't be decoded."""
+        return np.count_nonzero(self.corrected < 0, axis=1)
+
+    @property
+    def failed(self) -> np.ndarray:
+        """Whether any block of each code couldn't be decoded."""
+        return self.failed_blocks > 0
+
+    @property
+    def corrected_symbols(self) -> np.ndarray:
+        """The number of symbols corrected in each code, (in the blocks which were decoded.)"""
+        return np.sum(np.maximum(self.corrected, 0), axis=1)
+
+    @property
+    def worst_block(self) -> np.ndarray:
+        """The most symbols corrected in a single block of each code, (or -1 if a block couldn't be decoded.)"""
+        return np.where(self.failed, -1, np.max(self.corrected, axis=1, initial=0))
+
+
+class BlockCode:
+    """Splits messages into blocks of a reed solomon code, such that a message of blocks * k symbols is encoded as blocks
+    codewords which fill (the first blocks * n of) length symbols. If interleaved is set, the symbols of the codewords are
+    interleaved, i.e. symbol j of block b is placed at j * blocks + b, so a burst of errors is spread over the blocks.
+
+    Every block of a batch is encoded (and decoded) as a single batch of the reed solomon code, optionally split between
+    a pool of threads when there are enough of them."""
+
+    def __init__(self, rs: ReedSolomonCode, length: int, interleaved: bool = True, workers: int = 0):
+        """Construct the block code of the reed solomon code, for codes holding the given number of symbols."""
+        self.rs = rs
+        self.length = length
+        self.interleaved = interleaved
+        self.workers = workers
+
+        self.blocks = length // rs.n
+        if self.blocks == 0:
+            raise ValueError(f"A codeword of length {rs.n} doesn't fit in {length} symbols")
+
+    @property
+    def capacity(self) -> int:
+        """The number of message symbols of each code."""
+        return self.blocks * self.rs.k
+
+    @cached_property
+    def index(self) -> np.ndarray:
+        """The position of each symbol of the codewords, of shape (blocks, n)."""
+        positions = np.arange(self.blocks * self.rs.n)
+        index = positions.reshape(self.rs.n, self.blocks).T if self.interleaved else positions.reshape(self.blocks, self.rs.n)
+        index = np.ascontiguousarray(index)
+        index.flags.writeable = False
+        return index
+
+    def _map(self, function: Callable[[slice], Tuple[np.ndarray, ...]], words: int) -> Tuple[np.ndarray, ...]:
+        """Apply the function to (slices of) the given number of words, split between the threads if there are enough words."""
+        chunks = min(self.workers, words // MIN_WORDS_PER_WORKER)
+        if chunks <= 1:
+            return function(slice(0, words))
+
+        bounds = np.linspace(0, words, chunks + 1).astype(np.intp)
+        with ThreadPoolExecutor(chunks) as pool:
+            results = list(pool.map(function, [slice(start, stop) for (start, stop) in zip(bounds[:-1], bounds[1:])]))
+
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+    def encode_symbols(self, messages: np.ndarray) -> np.ndarray:
+        """Encode a batch of messages of shape (N, capacity) (as plain integer arrays), returning the symbols of the codes
+           of shape (N, length), padded with zeros."""
+        messages = np.asarray(messages)
+        if messages.ndim != 2 or messages.shape[1] != self.capacity:
+            raise ValueError(f"Expected messages of shape (N, {self.capacity}), but got {messages.shape}")
+
+        words = messages.reshape(-1, self.rs.k)
+        (codewords,) = self._map(lambda rows: (self.rs.encode_symbols(words[rows]),), words.shape[0])
+
+        data = np.zeros((messages.shape[0], self.length), dtype=codewords.dtype)
+        data[:, self.index.reshape(-1)] = codewords.reshape(messages.shape[0], -1)
+        return data
+
+    def decode_symbols(self, data: np.ndarray, erasures: np.ndarray | None = None) -> Tuple[np.ndarray, BlockStats]:
+        """Decode a batch of codes of shape (N, length) (as plain integer arrays), where erasures optionally flags the
+           unreliable symbols. Returns the messages of shape (N, capacity) along with the corrections of every block,
+           the message of a block which couldn't be decoded is read from its (uncorrected) symbols."""
+        data = np.asarray(data)
+        if data.ndim != 2 or data.shape[1] != self.length:
+            raise ValueError(f"Expected codes of shape (N, {self.length}), but got {data.shape}")
+
+        words = data[:, self.index].reshape(-1, self.rs.n)
+        if erasures is not None:
+            erasures = np.asarray(erasures, dtype=bool)[:, self.index].reshape(-1, self.rs.n)
+
+        decoded, corrected = self._map(lambda rows: self.rs.decode_symbols(words[rows], None if erasures is None else erasures[rows]),
+                                       words.shape[0])
+
+        messages = self.rs.extract_message_symbols(decoded).reshape(data.shape[0], self.capacity)
+        return messages, BlockStats(corrected.reshape(data.shape[0], self.blocks))
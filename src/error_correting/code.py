@@ -1,27 +1,63 @@
 #!/usr/bin/env python3
-import galois as gl
-from functools import cached_property
+from __future__ import annotations
+from field import field_tables
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, Tuple
 import numpy as np
 import math
 
-Word = gl.FieldArray
+if TYPE_CHECKING:
+    import galois as gl
 
-def gauss_elimination(A):
+    Word = gl.FieldArray
+
+# The maximal number of parity check matrices which are kept in memory at once.
+PARITY_CHECK_CACHE_SIZE = 64
+
+def gauss_elimination(A: gl.FieldArray) -> Tuple[gl.FieldArray, np.ndarray]:
+    """Compute the reduced row echelon form of A over its finite field (without modifying A),
+       returning it along with the indicies of the pivot columns."""
+    A = A.copy()
     row, col = A.shape
-    if row == 0 or col == 0:
-        return A
-    for i in range(min(row, col)):
-        max_element = abs(A[i, i])
-        max_row = i
-        for k in range(i+1, row):
-            if abs(A[k, i]) > max_element:
-                max_element = abs(A[k, i])
-                max_row = k
-        A[[i, max_row]] = A[[max_row, i]]
-        for k in range(i+1, row):
-            factor = A[k, i]/A[i, i]
-            A[k, :] -= factor * A[i, :]
-    return A
+    pivots = []
+    for j in range(col):
+        i = len(pivots)
+        if i == row:
+            break
+
+        # Any nonzero element can be used as a pivot, since there's no rounding in a finite field.
+        nonzero = np.flatnonzero(A[i:, j])
+        if nonzero.shape[0] == 0:
+            continue
+
+        A[[i, i + nonzero[0]]] = A[[i + nonzero[0], i]]
+        A[i] /= A[i, j]
+        others = np.arange(row) != i
+        A[others] -= A[others, j][:, np.newaxis] * A[i][np.newaxis, :]
+        pivots.append(j)
+
+    return A, np.array(pivots, dtype=np.intp)
+
+
+@lru_cache(maxsize=PARITY_CHECK_CACHE_SIZE)
+def _parity_check_matrix(gf: gl.GF, k: int, n: int, generator: bytes) -> np.ndarray:
+    """Compute a parity check matrix of the code generated by the given (k x n) generator matrix (stored as bytes).
+
+       Row reduction brings G on the systematic form [I | P] (up to a permutation of the columns, if the first k columns
+       of G are dependent), from which the parity check matrix is H = [-P^T | I]."""
+    G = gf(np.frombuffer(generator, dtype=gf.dtypes[0]).reshape(k, n))
+    echellon, pivots = gauss_elimination(G)
+    if pivots.shape[0] != k:
+        raise ValueError(f"Expected a generator matrix of rank {k}, but it has rank {pivots.shape[0]}")
+
+    others = np.setdiff1d(np.arange(n), pivots)
+    H = gf.Zeros((n - k, n))
+    H[:, pivots] = -echellon[:, others].T
+    H[:, others] = gf.Identity(n - k)
+
+    H = np.asarray(H)
+    H.flags.writeable = False
+    return H
 
 
 class Code:
@@ -48,6 +84,14 @@ class Code:
 
     @cached_property
     def H(self) -> gl.FieldArray:
-        """A parity check matrix for the code"""
-        echellon = gauss_elimination(self.G)
-        return np.concatenate(echellon[self.k:].T, np.identity(self.k))
+        """A parity check matrix for the code, which is shared between every code with the same generator matrix."""
+        generator = np.ascontiguousarray(self.G, dtype=self.gf.dtypes[0])
+        return _parity_check_matrix(self.gf, self.k, self.n, generator.tobytes()).view(self.gf)
+
+    def syndromes(self, recived: Word) -> np.ndarray:
+        """Compute the syndromes H r of a (batch of) recived words of shape (..., n), as an array of shape (..., n - k)."""
+        return field_tables(self.gf.order).matmul(recived, np.asarray(self.H).T)
+
+    def is_codeword(self, recived: Word) -> np.ndarray:
+        """Check which of the (batch of) recived words of shape (..., n) are codewords."""
+        return ~np.any(self.syndromes(recived), axis=-1)
@@ -1,61 +1,320 @@
 #!/usr/bin/env python3
-import galois as gl
+from __future__ import annotations
 import numpy as np
-from error_correting.code import Word, Code
-from typing import Iterable, List
-from itertools import combinations_with_replacement
+from error_correting.code import Code, gauss_elimination
+from field import cached_array, field_tables, galois_field
+from instrumentation import count, instrumented, is_enabled
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+from itertools import product
+
+if TYPE_CHECKING:
+    import galois as gl
+    from error_correting.code import Word
 
 def find_zero_indicies (xs: Iterable[Word]) -> List[int]:
     """Find the indicies with all zeros"""
-    zeros = [i for i in range(len(xs))]
-    for x in xs:
-        for idx in zeros:
-            if x[idx] != 0:
-                zeros.remove(idx)
-
-    return zeros
+    return list(np.flatnonzero(~np.any(np.stack(xs) != 0, axis=0)))
 
 class ReedSolomonCode(Code):
-    """A reed solomon code is a cyclic code (meaning it's good for burst errors)."""
+    """A reed solomon code is a cyclic code (meaning it's good for burst errors).
+
+    The code evaluates the message polynomial in the points 1, a, a^2, ..., a^(n - 1), (where a is the primitive element
+    of the field), or if systematic is set, the message is followed by the remainder of m(x) x^(n - k) modulo the
+    generator polynomial g(x) = (x - a)(x - a^2)...(x - a^(n - k)). Both are encoded through the lookup tables of the field.
+
+    The field (of galois) is only constructed when field arrays are used, the *_symbols methods work on plain integer arrays
+    and the generator matrices of the codes of the default configurations are loaded from the field cache."""
 
-    def __init__(self, q: int, k: int, n: int, compute_error_correcting_pair: bool = False):
+    def __init__(self, q: int, k: int, n: int, compute_error_correcting_pair: bool = False, systematic: bool = False):
         """Construct a generator matrix of a reed solomon code."""
-        if k > n or n > q:
-            raise ValueError(f"Expeceted 1 <= k <= n <= q, but got: k = {k}, n = {n} and q = {q}")
+        if not (1 <= k <= n < q):
+            raise ValueError(f"Expeceted 1 <= k <= n < q, but got: k = {k}, n = {n} and q = {q}")
+
+        self.tables = field_tables(q)
+        self.systematic = systematic
+        if systematic:
+            self._generator_table = cached_array(self.cache_name(q, k, n, systematic, "generator"), lambda: self._systematic_generator_matrix(k, n))
+        else:
+            self._generator_table = self.tables.exp[np.multiply.outer(np.arange(k), np.arange(n)) % (q - 1)]
 
-        self.gf = gl.GF(q)
-        self.G = self.gf([[p ** i for p in range(k)] for i in range(n)])
         if compute_error_correcting_pair:
             self.A = ReedSolomonCode(q, (self.t + 1), n)
             self.B_dual = ReedSolomonCode(q, (k + self.t), n)
 
+    @staticmethod
+    def cache_name(q: int, k: int, n: int, systematic: bool, table: str) -> str:
+        """The name of a table of the code in the field cache."""
+        return f"rs{q}_{k}_{n}_{'systematic' if systematic else 'evaluation'}_{table}"
+
+    def compute_tables(self) -> Dict[str, np.ndarray]:
+        """Compute (using galois) the tables of the code which are stored in the field cache."""
+        if self.systematic:
+            return {"generator": self._systematic_generator_matrix(self.k, self.n)}
+
+        return {"recovery": self._compute_message_recovery_matrix()}
+
+    @property
+    def k(self) -> int:
+        """The dimension of the reed solomon code."""
+        return self._generator_table.shape[0]
+
+    @property
+    def n(self) -> int:
+        """The length of the reed solomon code."""
+        return self._generator_table.shape[1]
+
+    @cached_property
+    def gf(self) -> type[gl.FieldArray]:
+        """The field of the code."""
+        return galois_field(self.tables.order)
+
+    @cached_property
+    def G(self) -> gl.FieldArray:
+        """The generator matrix of the code."""
+        return self.gf(self._generator_table)
+
+    def _generator_polynomial(self, k: int, n: int) -> gl.Poly:
+        """The generator polynomial g(x) = (x - a)(x - a^2)...(x - a^(n - k)) of the systematic code."""
+        import galois as gl
+        return gl.Poly.Roots(self.gf.primitive_element ** np.arange(1, n - k + 1), field=self.gf)
+
+    @cached_property
+    def generator_polynomial(self) -> gl.Poly:
+        """The generator polynomial of the systematic code."""
+        return self._generator_polynomial(self.k, self.n)
+
+    def _systematic_generator_matrix(self, k: int, n: int) -> np.ndarray:
+        """Construct the generator matrix [I | P] where row i encodes the message x^(k - 1 - i), i.e.
+           P[i] holds the coefficients of -(x^(n - 1 - i) mod g(x)), in descending order."""
+        import galois as gl
+        generator_polynomial = self._generator_polynomial(k, n)
+        G = self.gf.Zeros((k, n))
+        G[:, :k] = self.gf.Identity(k)
+        # Without parity symbols (k = n) the generator matrix is the identity, (the remainders are all zero.)
+        if n > k:
+            for i in range(k):
+                remainder = (gl.Poly.Degrees([n - 1 - i], field=self.gf) % generator_polynomial).coeffs
+                G[i, n - remainder.shape[0]:] = -remainder
+
+        G = np.asarray(G)
+        G.flags.writeable = False
+        return G
+
+    def _compute_message_recovery_matrix(self) -> np.ndarray:
+        """Compute the inverse of the first k columns of G, (using galois.)"""
+        return np.asarray(np.linalg.inv(self.G[:, :self.k]))
+
+    @cached_property
+    def _message_recovery_matrix(self) -> np.ndarray:
+        """The inverse of the first k columns of G, which maps the first k symbols of a codeword back to the message."""
+        return cached_array(self.cache_name(self.tables.order, self.k, self.n, self.systematic, "recovery"), self._compute_message_recovery_matrix)
+
+    def _as_symbols(self, words: Word | np.ndarray) -> np.ndarray:
+        """The words as a plain array of field elements, raising a ValueError (as galois does) for anything else."""
+        words = np.asarray(words)
+        if not np.issubdtype(words.dtype, np.integer) or (words.size and (words.min() < 0 or words.max() >= self.tables.order)):
+            raise ValueError(f"Expected integers in 0, ..., {self.tables.order - 1} (elements of GF({self.tables.order}))")
+
+        return words.astype(self.tables.dtype, copy=False)
+
     def encode(self, message: Word) -> Word:
-        """Encode a word using the generator matrix."""
-        return message.T @ self.gen
+        """Encode a message of shape (k,) or a batch of messages of shape (batch, k), using the generator matrix."""
+        return self.gf(self.encode_symbols(message))
+
+    @instrumented("rs_encode")
+    def encode_symbols(self, message: np.ndarray) -> np.ndarray:
+        """Encode a message (or a batch of messages) given as a plain integer array, returning a plain array."""
+        message = self._as_symbols(message)
+        if message.shape[-1] != self.k:
+            raise ValueError(f"Expected messages of length {self.k}, but got shape {message.shape}")
+
+        return self.tables.matmul(message, self._generator_table)
+
+    def extract_message(self, codeword: Word) -> Word:
+        """Recover the message (of shape (..., k)) from a codeword (of shape (..., n))."""
+        return self.gf(self.extract_message_symbols(codeword))
+
+    def extract_message_symbols(self, codeword: np.ndarray) -> np.ndarray:
+        """Recover the message from a codeword given as a plain integer array, returning a plain array."""
+        codeword = np.asarray(codeword)
+        if self.systematic:
+            return codeword[..., :self.k]
+
+        return self.tables.matmul(codeword[..., :self.k], self._message_recovery_matrix)
+
+    @cached_property
+    def _point_logs(self) -> np.ndarray:
+        """The logarithms of the points x_i associated with each position of a codeword."""
+        positions = np.arange(self.n)
+        return (self.n - 1 - positions) if self.systematic else positions
+
+    @cached_property
+    def _multipliers(self) -> np.ndarray:
+        """The column multipliers v_i of the parity check matrix H[j, i] = v_i x_i^j (j = 0, ..., n - k - 1).
+           For the systematic code v_i = x_i since c(a^j) = 0 for j = 1, ..., n - k, and for the evaluation code
+           v_i = 1 / prod_{l != i} (x_i - x_l), which spans the dual of the code."""
+        points = self.tables.exp[self._point_logs]
+        if self.systematic:
+            return points
+
+        differences = self.tables.subtract(points[:, np.newaxis], points[np.newaxis, :])
+        differences[np.diag_indices(self.n)] = 1
+        products = np.ones(self.n, dtype=self.tables.dtype)
+        for column in differences.T:
+            products = self.tables.multiply(products, column)
+
+        return self.tables.inverse[products]
+
+    @cached_property
+    def syndrome_matrix(self) -> np.ndarray:
+        """A parity check matrix of the form H[j, i] = v_i x_i^j, such that the syndromes are power sums of the errors."""
+        powers = self.tables.exp[np.multiply.outer(np.arange(self.n - self.k), self._point_logs) % (self.tables.order - 1)]
+        return self.tables.multiply(powers, self._multipliers)
+
+    @cached_property
+    def _inverse_point_powers(self) -> np.ndarray:
+        """The powers x_i^-j for j = 0, ..., n - k, used to evaluate polynomials in the inverse points (Chien search)."""
+        return self.tables.exp[np.multiply.outer(np.arange(self.n - self.k + 1), -self._point_logs) % (self.tables.order - 1)]
+
+    def _power_sums(self, recived: Word) -> np.ndarray:
+        """Compute the syndromes of a batch of recived words of shape (..., n) with respect to the syndrome matrix."""
+        return self.tables.matmul(recived, self.syndrome_matrix.T)
+
+    def decode(self, recived: Word, erasures: np.ndarray | None = None) -> Word:
+        """Decode the recived word (or batch of words), where erasures optionally flags the positions known to be unreliable."""
+        decoded, corrected = self.decode_batch(recived, erasures)
+        if np.any(corrected < 0):
+            raise ValueError(f"Couldn't decode the recived word, as it has more than {self.t} errors.")
+
+        return decoded
+
+    def decode_batch(self, recived: Word, erasures: np.ndarray | None = None) -> Tuple[Word, np.ndarray]:
+        """Decode a batch of recived words of shape (..., n) using Berlekamp-Massey, Chien search and Forney's formula.
+
+        Any number of errors (e) and erasures (f) with 2e + f <= n - k are corrected. Returns the decoded words along with
+        the number of corrected symbols of each word, or -1 if the word couldn't be decoded (in which case it's returned as is)."""
+        decoded, corrected = self.decode_symbols(recived, erasures)
+        return self.gf(decoded), corrected
+
+    @instrumented("rs_decode")
+    def decode_symbols(self, recived: np.ndarray, erasures: np.ndarray | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Decode a batch of recived words given as a plain integer array, returning the decoded words as a plain array."""
+        recived = self._as_symbols(recived)
+        words = recived.reshape(-1, self.n)
+        erasures = np.zeros(words.shape, dtype=bool) if erasures is None else np.broadcast_to(erasures, recived.shape).reshape(-1, self.n)
+
+        # 1. Codewords are rejected early (after a single matmul), only the remaining words are decoded.
+        S = self._power_sums(words)
+        decoded, corrected = words.copy(), np.zeros(words.shape[0], dtype=np.int64)
+        dirty = np.any(S, axis=1)
+        if np.any(dirty):
+            decoded[dirty], corrected[dirty] = self._decode_errata(words[dirty], S[dirty], erasures[dirty])
+
+        if is_enabled():
+            count("hn_rs_words_decoded_total", words.shape[0], "The number of words decoded by reed solomon codes.")
+            count("hn_rs_symbols_corrected_total", int(np.sum(np.maximum(corrected, 0))), "The number of symbols corrected by reed solomon codes.")
+            count("hn_rs_decoding_failures_total", int(np.count_nonzero(corrected < 0)), "The number of words which couldn't be decoded.")
+
+        return decoded.reshape(recived.shape), corrected.reshape(recived.shape[:-1])
+
+    def _decode_errata(self, words: np.ndarray, S: np.ndarray, erasures: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Decode the words with nonzero syndromes S, returning the decoded words and the number of corrected symbols."""
+        tables, N = self.tables, self.n - self.k
+        psi = self._berlekamp_massey(S, erasures)
+
+        # 2. Chien search, the roots of the errata locator are the inverses of the points of the errata.
+        inverse_powers = self._inverse_point_powers
+        located = tables.matmul(psi, inverse_powers) == 0
+
+        # 3. Forney's formula: Y_i = -x_i omega(x_i^-1) / psi'(x_i^-1) where omega(z) = S(z) psi(z) mod z^(n - k).
+        padded = np.concatenate([S, np.zeros((S.shape[0], 1), dtype=S.dtype)], axis=1)
+        omega = tables.sum(tables.multiply(psi[:, np.newaxis, :N], padded[:, self._convolution_index]), axis=-1)
+        derivative = tables.multiply(psi[:, 1:], (np.arange(1, N + 1) % self.tables.characteristic).astype(tables.dtype))
+        numerator = tables.multiply(tables.matmul(omega, inverse_powers[:N]), self.tables.exp[self._point_logs % (self.tables.order - 1)])
+        denominator = tables.matmul(derivative, inverse_powers[:N])
+        located &= denominator != 0
+
+        errors = tables.multiply(tables.negative[numerator], tables.inverse[tables.multiply(denominator, self._multipliers)])
+        errors[~located] = 0
+        decoded = tables.subtract(words, errors)
+
+        # 4. A word is decoded if every root of the errata locator was found, and the result is a codeword.
+        degree = N - np.argmax(psi[:, ::-1] != 0, axis=1)
+        success = (np.count_nonzero(located, axis=1) == degree) & ~np.any(self._power_sums(decoded), axis=1)
+        decoded[~success] = words[~success]
+
+        return decoded, np.where(success, np.count_nonzero(errors, axis=1), -1)
+
+    @cached_property
+    def _convolution_index(self) -> np.ndarray:
+        """Indicies into the syndromes (padded with a single zero), such that S[index[j, i]] = S[j - i] (or 0 when i > j)."""
+        N = self.n - self.k
+        j, i = np.meshgrid(np.arange(N), np.arange(N), indexing="ij")
+        return np.where(i <= j, j - i, N)
+
+    def _berlekamp_massey(self, S: np.ndarray, erasures: np.ndarray) -> np.ndarray:
+        """Compute the errata locator psi(z) = prod (1 - x_i z) (as ascending coefficients) of each word, given its syndromes
+           and erasures. The iterations start from the erasure locator, as in the errors and erasures version of Berlekamp-Massey."""
+        tables, N = self.tables, self.n - self.k
+        batch = np.arange(S.shape[0])
+
+        # 1. Construct the erasure locators, one factor (1 - x_i z) at a time.
+        locator = np.zeros((S.shape[0], N + 2), dtype=tables.dtype)
+        locator[:, 0] = 1
+        for position, point in enumerate(self.tables.exp[self._point_logs % (self.tables.order - 1)]):
+            factor = tables.subtract(locator[:, 1:], tables.multiply(locator[:, :-1], point))
+            locator[erasures[:, position], 1:] = factor[erasures[:, position]]
+
+        rho = np.count_nonzero(erasures, axis=1)
+        psi, previous, length = locator[:, :N + 1].copy(), locator[:, :N + 1].copy(), rho.copy()
+        syndromes = np.concatenate([S, np.zeros((S.shape[0], 1), dtype=S.dtype)], axis=1)
+
+        # 2. Berlekamp-Massey, a word is only updated once r exceeds its number of erasures.
+        for r in range(1, N + 1):
+            index = r - 1 - np.arange(N + 1)
+            discrepancy = tables.sum(tables.multiply(psi, syndromes[:, np.where(index >= 0, index, N)]), axis=1)
+            active = (r > rho) & (discrepancy != 0)
+            shifted = np.zeros_like(previous)
+            shifted[:, 1:] = previous[:, :-1]
+
+            update = active & (2 * length <= r + rho - 1)
+            candidate = tables.subtract(psi, tables.multiply(shifted, discrepancy[:, np.newaxis]))
+            previous = np.where((update)[:, np.newaxis], tables.multiply(psi, tables.inverse[discrepancy][:, np.newaxis]),
+                                np.where((r > rho)[:, np.newaxis], shifted, previous))
+            psi = np.where(active[:, np.newaxis], candidate, psi)
+            length = np.where(update, r - length + rho, length)
+
+        return psi
+
+    def decode_with_error_correcting_pair(self, recived: Word) -> Word:
+        """Decode the recived word. Usign error correcting pairs (by enumerating the codewords of A)."""
+        if self.systematic:
+            raise ValueError("Error correcting pairs are only constructed for the evaluation form of the code.")
 
-    def decode(self, recived: Word) -> Word:
-        """Decode the recived word. Usign error correcting pairs."""
         # 1. Check if the recived vector is already in the code.
-        if not np.any(self.H @ recived):
+        if self.is_codeword(recived):
             return recived
 
         # 1. Compute M_ecp
-        m_ecp = [a for a in self.A.generate_codewords() if (not np.any(self.B_dual.H @ (a * recived)))]
+        m_ecp = [a for a in self.A.generate_codewords() if self.B_dual.is_codeword(a * recived)]
 
         # 2. Find Z(M_ecp)
         zero_positions = find_zero_indicies(m_ecp)
 
-        #  3. Find error
-        He = self.H[zero_positions] # FIXME: This is generally not square
-        error = np.linalg.solve(He, self.H @ recived)
+        # 3. Find error, by solving He e = s (which has a unique solution since the error positions are a subset of Z(M_ecp).)
+        He = self.H[:, zero_positions]
+        reduced, pivots = gauss_elimination(np.concatenate([He, self.gf(self.syndromes(recived))[:, np.newaxis]], axis=1))
+        error = self.gf.Zeros(len(zero_positions))
+        error[pivots[pivots < len(zero_positions)]] = reduced[:np.count_nonzero(pivots < len(zero_positions)), -1]
 
         # 4. Remoce error
-        for i, j in enumerate(zero_positions):
-            recived[j] -= error[i]
+        recived = recived.copy()
+        recived[zero_positions] -= error
 
         return recived
 
     def generate_codewords(self) -> Iterable[Word]:
         """Construct a iterator over all of the codewords in self."""
-        for word in combinations_with_replacement(self.gf.elements, self.k):
-            yield self.gf(word).T @ self.G
+        for word in product(self.gf.elements, repeat=self.k):
+            yield self.gf(word) @ self.G
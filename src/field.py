@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import numpy as np
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict
+
+if TYPE_CHECKING:
+    import galois as gl
+
+# The directory of the precomputed tables (stored as .npy files, which are memory mapped when loaded), shipped with the
+# package for the fields and codes of the default configurations. It's regenerated by running: python -m field
+FIELD_CACHE_DIRECTORY = os.environ.get("HN_FIELD_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "field_cache"))
+
+# The orders of the fields, and the (q, k, n) reed solomon codes, whose tables are stored in the field cache.
+CACHED_FIELDS = (2, 7, 8)
+CACHED_CODES = ((8, 3, 7),)
+
+# The tables of a field, in the order they're stored.
+TABLE_NAMES = ("exp", "log", "addition", "multiplication", "negative", "inverse")
+
+
+def galois_field(order: int) -> type[gl.FieldArray]:
+    """The galois field array class of the given order. Importing galois (and compiling the field) takes seconds, so
+       it's only done when a field array is actually needed."""
+    import galois as gl
+    return gl.GF(order)
+
+
+def cache_path(name: str) -> str:
+    """The path of the cached array of the given name."""
+    return os.path.join(FIELD_CACHE_DIRECTORY, f"{name}.npy")
+
+
+def cached_array(name: str, compute: Callable[[], np.ndarray]) -> np.ndarray:
+    """Load the (read only, memory mapped) array of the given name from the field cache, or compute it if it isn't cached."""
+    path = cache_path(name)
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r")
+
+    return compute()
+
+
+@dataclass(frozen=True)
+class FieldTables:
+    """Precomputed log / antilog and operation tables for GF(q), where field elements are stored as plain
+       integer arrays (using the integer representation of galois) and every operation is a table lookup."""
+    order: int
+    characteristic: int
+    exp: np.ndarray             # (2 * (q - 1),) antilog table exp[i] = a^i (of the primitive element a), repeated twice.
+    log: np.ndarray             # (q,) log table, log[exp[i]] = i, (log[0] is undefined and set to 0.)
+    addition: np.ndarray        # (q, q) addition table.
+    multiplication: np.ndarray  # (q, q) multiplication table.
+    negative: np.ndarray        # (q,) additive inverses.
+    inverse: np.ndarray         # (q,) multiplicative inverses, (inverse[0] is undefined and set to 0.)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """The dtype used to store field elements."""
+        return self.exp.dtype
+
+    def add(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Add the field elements a and b (elementwise, with broadcasting)."""
+        if self.characteristic == 2:
+            # Addition in GF(2^m) is the xor of the integer representations, which is cheaper than a lookup.
+            return np.bitwise_xor(np.asarray(a), np.asarray(b)).astype(self.dtype, copy=False)
+
+        return self.addition[a, b]
+
+    def subtract(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Subtract the field elements b from a (elementwise, with broadcasting)."""
+        if self.characteristic == 2:
+            return self.add(a, b)
+
+        return self.addition[a, self.negative[b]]
+
+    def multiply(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Multiply the field elements a and b (elementwise, with broadcasting)."""
+        return self.multiplication[a, b]
+
+    def power(self, a: np.ndarray, exponent: np.ndarray) -> np.ndarray:
+        """Raise the nonzero field elements a to the given integer powers (elementwise, with broadcasting)."""
+        return self.exp[(self.log[a].astype(np.int64) * exponent) % (self.order - 1)]
+
+    def sum(self, a: np.ndarray, axis: int = -1) -> np.ndarray:
+        """Sum the field elements along the given axis."""
+        a = np.asarray(a, dtype=self.dtype)
+        if self.characteristic == 2:
+            return np.bitwise_xor.reduce(a, axis=axis)
+        elif self.characteristic == self.order:
+            return (np.sum(a, axis=axis, dtype=np.int64) % self.order).astype(self.dtype)
+
+        a = np.moveaxis(a, axis, 0)
+        total = np.zeros(a.shape[1:], dtype=self.dtype)
+        for term in a:
+            total = self.addition[total, term]
+
+        return total
+
+    def matmul(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Compute the matrix product of the field elements a (of shape (..., k)) and b (of shape (k, n))."""
+        return self.sum(self.multiplication[np.asarray(a)[..., :, np.newaxis], np.asarray(b)], axis=-2)
+
+
+def _characteristic(order: int) -> int:
+    """The characteristic of the field of the given (prime power) order, i.e. its smallest prime factor."""
+    return next(p for p in range(2, order + 1) if order % p == 0)
+
+
+def compute_field_tables(order: int) -> Dict[str, np.ndarray]:
+    """Compute the tables of the field of the given order using galois, (by the names of TABLE_NAMES.)"""
+    gf = galois_field(order)
+    dtype = np.min_scalar_type(order - 1)
+    elements = np.arange(order)
+
+    exp = np.asarray(gf.primitive_element ** np.arange(order - 1)).astype(dtype)
+    log = np.zeros(order, dtype=np.int64)
+    log[exp] = np.arange(order - 1)
+
+    # Products of nonzero elements are found by adding logarithms, products with zero are zero.
+    multiplication = exp[np.add.outer(log, log) % (order - 1)]
+    multiplication[0, :] = 0
+    multiplication[:, 0] = 0
+
+    addition = np.asarray(gf(elements)[:, np.newaxis] + gf(elements)[np.newaxis, :]).astype(dtype)
+    inverse = exp[(-log) % (order - 1)]
+    inverse[0] = 0
+
+    return {
+        "exp": np.concatenate([exp, exp]),
+        "log": log,
+        "addition": addition,
+        "multiplication": multiplication,
+        "negative": np.argmin(addition, axis=1).astype(dtype),
+        "inverse": inverse,
+    }
+
+
+@lru_cache(maxsize=None)
+def field_tables(order: int) -> FieldTables:
+    """Construct (or fetch the cached) lookup tables for the field of the given order, the tables of the fields of
+       CACHED_FIELDS are loaded from the field cache (without importing galois.)"""
+    if all(os.path.exists(cache_path(f"gf{order}_{name}")) for name in TABLE_NAMES):
+        tables = {name: np.load(cache_path(f"gf{order}_{name}"), mmap_mode="r") for name in TABLE_NAMES}
+    else:
+        tables = compute_field_tables(order)
+        for array in tables.values():
+            array.flags.writeable = False
+
+    return FieldTables(order=order, characteristic=_characteristic(order), **tables)
+
+
+if __name__ == "__main__":
+    from error_correting.reed_solomon import ReedSolomonCode
+
+    os.makedirs(FIELD_CACHE_DIRECTORY, exist_ok=True)
+    for order in CACHED_FIELDS:
+        for (name, array) in compute_field_tables(order).items():
+            np.save(cache_path(f"gf{order}_{name}"), array)
+
+    for (q, k, n) in CACHED_CODES:
+        for systematic in (False, True):
+            for (name, array) in ReedSolomonCode(q, k, n, systematic=systematic).compute_tables().items():
+                np.save(cache_path(ReedSolomonCode.cache_name(q, k, n, systematic, name)), array)
@@ -1,31 +1,40 @@
 #!/usr/bin/env python3
-import galois as gl
-import math
+from __future__ import annotations
+import numpy as np
+from typing import TYPE_CHECKING
 from colorama import Back, Style
 
+if TYPE_CHECKING:
+    import galois as gl
+
+
+def int_to_symbols(n: int, order: int, length: int) -> np.ndarray:
+    """Convert n to its length symbols (digits of base order, most significant first) as a plain uint8 array."""
+    if not 0 <= n < order ** length:
+        raise ValueError(f"Cannot convert {n} to {length} symbols of GF({order})")
+
+    return ((n // order ** np.arange(length - 1, -1, -1, dtype=np.int64)) % order).astype(np.uint8)
+
 
 def convert_int_to_symbols(n: int, gf: gl.GF, length: int) -> gl.FieldArray:
     """Convert n to a set of symbols."""
-    if n > gf.order ** length:
-        raise ValueError(f"Cannot convert {n} to {length} symbols of GF({gf.properties.order})")
+    return int_to_symbols(n, gf.order, length).astype(gf.dtypes[0], copy=False).view(gf)
+
 
-    res = n
-    symbols = [0 for _ in range(length)]
-    for idx in range(length, 0, -1):
-        symbols[idx - 1] = math.floor(n / (gf.order ** idx))
-        res = n % (gf.order ** idx)
-        if res == 0:
-            break
+def convert_symbols_to_int(symbols: np.ndarray, order: int) -> np.ndarray:
+    """Convert symbols of shape (..., length) (as constructed by convert_int_to_symbols) back to integers of shape (...)."""
+    symbols = np.asarray(symbols, dtype=np.int64)
+    return symbols @ (order ** np.arange(symbols.shape[-1] - 1, -1, -1, dtype=np.int64))
 
-    symbols[-1] = res
 
-    return gf(symbols)
+# The terminal colors of each symbol (two characters wide).
+_COLORS = np.array([Style.RESET_ALL + "  ", Back.WHITE + "  ", Back.RED + "  ", Back.GREEN + "  ", Back.YELLOW + "  ", Back.BLUE + "  ", Back.MAGENTA + "  ", Back.CYAN + "  "])
 
 
 def repr_matrix(mat: gl.FieldArray) -> str:
     """Return a matrix of pixels (QR style) to the terminal."""
-    color_mapping = {0: Style.RESET_ALL + "  ", 1: Back.WHITE + "  ", 2: Back.RED + "  ", 3: Back.GREEN + "  ", 4: Back.YELLOW + "  ", 5: Back.BLUE + "  ", 6: Back.MAGENTA + "  ", 7: Back.CYAN + "  "}
-    rows = ["".join((color_mapping[int(cell)] for cell in row)) for row in mat]
+    cells = _COLORS[np.asarray(mat, dtype=np.intp)]
+    rows = ["".join(row) for row in cells.tolist()]
     buffer = "\n " + f"{Style.RESET_ALL}\n ".join(rows) + f"{Style.RESET_ALL}\n"
 
     return buffer
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+import numpy as np
+import struct
+import zlib
+from math import ceil
+
+# The RGB color of each symbol, matching the terminal colors of helpers.repr_matrix (0 is black and 1 is white).
+PALETTE = np.array([
+    [0, 0, 0],
+    [255, 255, 255],
+    [255, 0, 0],
+    [0, 255, 0],
+    [255, 255, 0],
+    [0, 0, 255],
+    [255, 0, 255],
+    [0, 255, 255],
+], dtype=np.uint8)
+
+# The symbol of the quiet zone around each code, and of the background of a sheet.
+BACKGROUND = 1
+
+
+def render(matrices: np.ndarray, module_size: int = 8, quiet_zone: int = 2, palette: np.ndarray = PALETTE) -> np.ndarray:
+    """Render a code matrix of shape (rows, cols), or a batch of shape (..., rows, cols), to RGB pixels of shape
+       (..., (rows + 2 quiet_zone) module_size, (cols + 2 quiet_zone) module_size, 3). Every module is a square
+       of module_size pixels, and the code is surrounded by a quiet zone of the given number of (white) modules."""
+    matrices = np.asarray(matrices)
+    if module_size < 1 or quiet_zone < 0:
+        raise ValueError(f"Expected a positive module size and a non negative quiet zone, but got {module_size} and {quiet_zone}")
+    elif matrices.size and matrices.max() >= palette.shape[0]:
+        raise ValueError(f"Expected symbols below {palette.shape[0]}, but got {matrices.max()}")
+
+    # The palette is applied to the modules, each row of modules is widened to a row of pixels, which is then copied to
+    # the module_size rows of pixels (copying whole rows is much faster than broadcasting each module to its block.)
+    padding = [(0, 0)] * (matrices.ndim - 2) + [(quiet_zone, quiet_zone)] * 2
+    colors = palette[np.pad(matrices, padding, constant_values=BACKGROUND)]
+    *batch, rows, cols, _ = colors.shape
+    pixels = np.empty((*batch, rows, module_size, cols * module_size, palette.shape[1]), dtype=palette.dtype)
+    pixels[...] = np.repeat(colors, module_size, axis=-2)[..., :, np.newaxis, :, :]
+
+    return pixels.reshape(*batch, rows * module_size, cols * module_size, palette.shape[1])
+
+
+def tile(images: np.ndarray, columns: int, background: np.ndarray = PALETTE[BACKGROUND]) -> np.ndarray:
+    """Arrange a batch of images of shape (N, height, width, 3) in a sheet of the given number of columns (filled row by
+       row), the cells of the last row without an image are filled with the background."""
+    images = np.asarray(images)
+    number_of_images, height, width, channels = images.shape
+    rows = max(1, ceil(number_of_images / columns))
+
+    cells = np.empty((rows * columns, height, width, channels), dtype=images.dtype)
+    cells[:number_of_images] = images
+    cells[number_of_images:] = background
+    return cells.reshape(rows, columns, height, width, channels).transpose(0, 2, 1, 3, 4).reshape(rows * height, columns * width, channels)
+
+
+def write_ppm(path: str, image: np.ndarray) -> None:
+    """Store the RGB image of shape (height, width, 3) as a binary PPM file."""
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    with open(path, "wb") as file:
+        file.write(f"P6\n{image.shape[1]} {image.shape[0]}\n255\n".encode("ascii"))
+        file.write(image.tobytes())
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    """A PNG chunk, i.e. the length, the type, the data and the CRC of the type and data."""
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(image: np.ndarray, level: int = 6) -> bytes:
+    """Encode the RGB image of shape (height, width, 3) as a PNG file (8 bit truecolor, without filtering)."""
+    image = np.asarray(image, dtype=np.uint8)
+    height, width, _ = image.shape
+
+    # Every scanline starts with the filter type, 0 (none) is enough since the modules compress well as runs of pixels.
+    scanlines = np.zeros((height, 1 + 3 * width), dtype=np.uint8)
+    scanlines[:, 1:] = image.reshape(height, -1)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", header) + _png_chunk(b"IDAT", zlib.compress(scanlines.tobytes(), level))
+            + _png_chunk(b"IEND", b""))
+
+
+def write_png(path: str, image: np.ndarray, level: int = 6) -> None:
+    """Store the RGB image of shape (height, width, 3) as a PNG file."""
+    with open(path, "wb") as file:
+        file.write(encode_png(image, level))
+
+
+def save_image(path: str, image: np.ndarray) -> None:
+    """Store the RGB image as a PNG or PPM file, depending on the extension of the path."""
+    if path.lower().endswith(".png"):
+        write_png(path, image)
+    elif path.lower().endswith(".ppm"):
+        write_ppm(path, image)
+    else:
+        raise ValueError(f"Expected a path ending in .png or .ppm, but got {path}")
+
+
+if __name__ == "__main__":
+    import galois as gl
+    from code import Code
+
+    gf = gl.GF(8)
+    _, matrices = Code.batch(gf.Random((12, Code.number_of_symbols(23))), gf, error_correction_level=2, mask=None, encoding=2)
+    save_image("codes.png", tile(render(matrices.view(np.ndarray)), columns=4))
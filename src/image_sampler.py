@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import numpy as np
+from typing import List, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+from layout import CALIBRATION_POSITIONS, CALIBRATION_SYMBOLS
+
+# The run lengths (in modules) of a scan line through the center of the large (7 x 7) and the small (5 x 5) locators.
+LARGE_LOCATOR_RATIOS = np.array([1, 1, 3, 1, 1])
+SMALL_LOCATOR_RATIOS = np.array([1, 1, 1, 1, 1])
+
+
+def _runs(dark: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """The runs of dark and light pixels of every row of dark, given by their (flat) starts, their lengths and whether they're dark,
+       where every row is terminated by a light pixel (such that no dark run continues onto the next row.)"""
+    rows, cols = dark.shape
+    padded = np.zeros((rows, cols + 1), dtype=np.int8)
+    padded[:, :cols] = dark
+    flat = padded.reshape(-1)
+    starts = np.concatenate([[0], np.flatnonzero(flat[1:] != flat[:-1]) + 1])
+    lengths = np.diff(np.append(starts, flat.shape[0]))
+    return starts, lengths, flat[starts] == 1
+
+
+def _find_patterns(runs: Tuple[np.ndarray, np.ndarray, np.ndarray], width: int, ratios: np.ndarray,
+                   tolerance: float = 0.5) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find every sequence of dark, light, dark, ... runs (of rows of the given width) whose lengths match the ratios. Returns
+       the row, the (sub pixel) column of the center of the middle run, and the width of a module of each match."""
+    starts, lengths, is_dark = runs
+    if starts.shape[0] < ratios.shape[0]:
+        return np.zeros(0, dtype=np.intp), np.zeros(0), np.zeros(0)
+
+    # Consider every window of consecutive runs which starts with a dark run, and lies within a single row.
+    windows = sliding_window_view(lengths, ratios.shape[0])
+    first = np.flatnonzero(is_dark[:windows.shape[0]])
+    first = first[starts[first] // (width + 1) == starts[first + ratios.shape[0] - 1] // (width + 1)]
+    windows = windows[first]
+
+    units = windows.sum(axis=1) / ratios.sum()
+    matches = np.all(np.abs(windows - units[:, np.newaxis] * ratios) <= np.maximum(tolerance * units, 1.0)[:, np.newaxis], axis=1)
+    first, units = first[matches], units[matches]
+
+    middle = first + ratios.shape[0] // 2
+    return starts[first] // (width + 1), starts[middle] % (width + 1) + lengths[middle] / 2, units
+
+
+def find_locators(dark: np.ndarray, ratios: np.ndarray, runs: Tuple[tuple, tuple] | None = None) -> List[Tuple[float, float, float, int]]:
+    """Find the centers of the locators with the given ratios, as the points where a horizontal and a vertical match cross.
+       Returns the (row, col, module size, number of confirming matches) of each locator, the most confirmed first. The runs
+       of the rows and of the columns of dark can be passed, when looking for several kinds of locators in the same image."""
+    horizontal_runs, vertical_runs = (_runs(dark), _runs(dark.T)) if runs is None else runs
+    rows, cols, units = _find_patterns(horizontal_runs, dark.shape[1], ratios)
+    other_cols, other_rows, _ = _find_patterns(vertical_runs, dark.shape[0], ratios)
+
+    # A horizontal match is confirmed by a vertical match through the same pixel (or one of its vertical neighbours).
+    vertical = np.unique(np.round(other_rows).astype(np.int64) * dark.shape[1] + other_cols)
+    keys = rows * dark.shape[1] + np.round(cols).astype(np.int64)
+    confirmed = np.isin(keys, vertical) | np.isin(keys - dark.shape[1], vertical) | np.isin(keys + dark.shape[1], vertical)
+    points = np.stack([rows[confirmed], cols[confirmed], units[confirmed]], axis=1)
+
+    # The few confirmed points are grouped by their distance to the first point of each group.
+    groups: List[List[np.ndarray]] = []
+    for point in points:
+        for group in groups:
+            if np.hypot(*(point[:2] - group[0][:2])) < 2 * group[0][2]:
+                group.append(point)
+                break
+        else:
+            groups.append([point])
+
+    locators = [(*np.mean(group, axis=0)[:2], float(np.median([point[2] for point in group])), len(group)) for group in groups]
+    return sorted(locators, key=lambda locator: -locator[3])
+
+
+def _timing_fit(line: np.ndarray, start: float, pitch: float) -> Tuple[float, float]:
+    """Refine the start and pitch of the grid along a timing strip, given the dark pixels of the line, by fitting a line
+       through the positions of the edges between modules (which lie at whole multiples of the pitch from the start.)"""
+    edges = np.flatnonzero(np.diff(line.astype(np.int8))) + 0.5
+    if edges.shape[0] < 2:
+        return start, pitch
+
+    modules = np.round((edges - start) / pitch)
+    if np.unique(modules).shape[0] < 2:
+        return start, pitch
+
+    pitch, start = np.polyfit(modules, edges, 1)
+    return float(start), float(pitch)
+
+
+def _sample_modules(image: np.ndarray, ys: np.ndarray, xs: np.ndarray, radius: int) -> np.ndarray:
+    """The mean color of the (2 radius + 1)^2 pixels around each module center, of shape (rows, cols, channels)."""
+    offsets = np.arange(-radius, radius + 1)
+    ys = np.clip(np.round(ys).astype(np.intp)[:, np.newaxis] + offsets, 0, image.shape[0] - 1)
+    xs = np.clip(np.round(xs).astype(np.intp)[:, np.newaxis] + offsets, 0, image.shape[1] - 1)
+    return image[ys[:, np.newaxis, :, np.newaxis], xs[np.newaxis, :, np.newaxis, :]].astype(np.float32).mean(axis=(2, 3))
+
+
+def calibrate(samples: np.ndarray) -> np.ndarray:
+    """Estimate the color of each symbol of GF(8) from the (sampled) colors of the fixed pattern. Black, white, red, green
+       and blue are measured, yellow, magenta and cyan are the sums of the measured primaries (relative to black)."""
+    size = samples.shape[0]
+    black = samples[3:6, 3:6].reshape(-1, samples.shape[2]).mean(axis=0)
+    white = np.concatenate([samples[0], samples[-1], samples[8, :8]]).mean(axis=0)
+
+    primaries = np.zeros((len(CALIBRATION_SYMBOLS), samples.shape[2]), dtype=np.float32)
+    for (rows, cols) in CALIBRATION_POSITIONS:
+        primaries += samples[np.mod(rows, size), np.mod(cols, size)]
+    red, green, blue = primaries / len(CALIBRATION_POSITIONS)
+
+    return np.stack([black, white, red, green, red + green - black, blue, red + blue - black, green + blue - black])
+
+
+def sample_code(image: np.ndarray) -> np.ndarray:
+    """Read the matrix of symbols of a code from an (axis aligned) grayscale image of shape (height, width), or an RGB image of
+       shape (height, width, 3). Raises a ValueError if the locators of the code can't be found."""
+    image = np.asarray(image)
+    image = image[..., np.newaxis] if image.ndim == 2 else image
+
+    # 1. Only the locators and the timing strips are black, everything brighter (in any channel) than halfway is light.
+    peak = image[..., 0]
+    for channel in range(1, image.shape[2]):
+        peak = np.maximum(peak, image[..., channel])
+    lo, hi = int(peak[::4, ::4].min()), int(peak[::4, ::4].max())
+    dark = peak < (lo + hi) / 2
+
+    # 2. The large locator, and the small locators to its right (one module higher) and below it (one module to the left).
+    runs = (_runs(dark), _runs(dark.T))
+    large = find_locators(dark, LARGE_LOCATOR_RATIOS, runs)
+    if not large:
+        raise ValueError("Couldn't find the large locator")
+    y, x, unit, _ = large[0]
+
+    small = [(sy, sx) for (sy, sx, sunit, _) in find_locators(dark, SMALL_LOCATOR_RATIOS, runs) if abs(sunit - unit) < 0.3 * unit]
+    right = [(sy, sx) for (sy, sx) in small if sx > x + 8 * unit and abs(sy - (y - unit)) < 2 * unit]
+    below = [(sy, sx) for (sy, sx) in small if sy > y + 8 * unit and abs(sx - (x - unit)) < 2 * unit]
+    if not right or not below:
+        raise ValueError("Couldn't find the small locators")
+
+    # 3. The centers of the locators are 4 modules (and the small ones 3 modules) from the edges of the matrix of size + 2 modules.
+    size = int(round((right[0][1] - x) / unit)) + 8
+    pitch_x, pitch_y = (right[0][1] - x) / (size - 8), (below[0][0] - y) / (size - 8)
+    start_x, start_y = x - 4.5 * pitch_x, y - 4.5 * pitch_y
+
+    # 4. The timing strips (row and column 7, between the separators) have an edge between every pair of modules.
+    first, last = start_x + 8.5 * pitch_x, start_x + (size - 6.5) * pitch_x
+    columns = np.arange(int(first), int(last))
+    start_x, pitch_x = _timing_fit(dark[int(round(start_y + 7.5 * pitch_y)), columns], start_x - columns[0], pitch_x)
+    start_x += columns[0]
+
+    first, last = start_y + 8.5 * pitch_y, start_y + (size - 6.5) * pitch_y
+    rows = np.arange(int(first), int(last))
+    start_y, pitch_y = _timing_fit(dark[rows, int(round(start_x + 7.5 * pitch_x))], start_y - rows[0], pitch_y)
+    start_y += rows[0]
+
+    # 5. Each module is classified as the symbol of the nearest calibrated color.
+    centers = np.arange(size) + 0.5
+    samples = _sample_modules(image, start_y + centers * pitch_y, start_x + centers * pitch_x, max(0, int(min(pitch_x, pitch_y) / 4)))
+    colors = calibrate(samples)
+    distances = np.sum((samples[:, :, np.newaxis, :] - colors) ** 2, axis=-1)
+    return np.argmin(distances, axis=-1).astype(np.uint8)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import os
+import threading
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple
+
+# The upper bounds (in seconds) of the buckets of the stage durations, from 10 us to 10 s.
+DURATION_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# The histogram every stage reports its duration to, labelled by the name of the stage.
+STAGE_DURATION = "hn_stage_duration_seconds"
+
+# Instrumentation is disabled unless enabled by enable(), or by setting the environment variable.
+_enabled = os.environ.get("HN_INSTRUMENTATION", "") not in ("", "0")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def enable(enabled: bool = True) -> None:
+    """Enable (or disable) the instrumentation."""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    """Whether the instrumentation is enabled, the metrics are only updated if it is."""
+    return _enabled
+
+
+class Counter:
+    """A value which only increases, such as the number of constructed codes."""
+    kind = "counter"
+
+    def __init__(self):
+        """Initialize the counter at zero."""
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the counter."""
+        with self._lock:
+            self.value += amount
+
+    def sample(self) -> float:
+        """The value of the counter."""
+        return self.value
+
+
+class Gauge:
+    """A value which can go up and down, such as the best score of a search."""
+    kind = "gauge"
+
+    def __init__(self):
+        """Initialize the gauge at zero."""
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        """Set the gauge."""
+        self.value = float(value)
+
+    def sample(self) -> float:
+        """The value of the gauge."""
+        return self.value
+
+
+class Histogram:
+    """The distribution of observed values, such as the durations of a stage, counted in buckets of the given upper bounds."""
+    kind = "histogram"
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        """Initialize an empty histogram with the given upper bounds of its buckets."""
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # The last bucket holds the values above every bound.
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Count the value in its bucket."""
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def sample(self) -> Dict[str, Any]:
+        """The cumulative count of each bucket (by its upper bound), along with the sum and the number of observations."""
+        cumulative, total = {}, 0
+        for (bound, count) in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            cumulative[bound] = total
+
+        return {"buckets": cumulative, "sum": self.sum, "count": self.count}
+
+
+class Registry:
+    """A registry of metrics, each given by its name and labels. Metrics are created when they are first used."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Tuple[type, str, Dict[Labels, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: type, name: str, help: str, labels: Dict[str, Any], **kwargs) -> Any:
+        """Fetch (or create) the metric of the given kind, name and labels."""
+        key = tuple(sorted((label, str(value)) for (label, value) in labels.items()))
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = (kind, help, {})
+            elif self._metrics[name][0] is not kind:
+                raise ValueError(f"The metric {name} is a {self._metrics[name][0].kind}, not a {kind.kind}")
+
+            samples = self._metrics[name][2]
+            if key not in samples:
+                samples[key] = kind(**kwargs)
+
+            return samples[key]
+
+    def counter(self, name: str, help: str = "", **labels) -> Counter:
+        """The counter of the given name and labels."""
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str = "", **labels) -> Gauge:
+        """The gauge of the given name and labels."""
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str = "", buckets: Tuple[float, ...] = DURATION_BUCKETS, **labels) -> Histogram:
+        """The histogram of the given name and labels."""
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def reset(self) -> None:
+        """Remove every metric."""
+        with self._lock:
+            self._metrics.clear()
+
+    def collect(self) -> Dict[str, Any]:
+        """The current value of every metric, as {name: {"type": .., "help": .., "samples": [{"labels": .., "value": ..}]}}."""
+        with self._lock:
+            metrics = {name: (kind, help, dict(samples)) for (name, (kind, help, samples)) in self._metrics.items()}
+
+        return {name: {"type": kind.kind, "help": help, "samples": [{"labels": dict(labels), "value": metric.sample()}
+                                                                   for (labels, metric) in samples.items()]}
+                for (name, (kind, help, samples)) in metrics.items()}
+
+    def to_prometheus(self) -> str:
+        """The current value of every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for (name, metric) in self.collect().items():
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for sample in metric["samples"]:
+                if metric["type"] != "histogram":
+                    lines.append(f"{name}{_format_labels(sample['labels'])} {_format_value(sample['value'])}")
+                    continue
+
+                for (bound, count) in sample["value"]["buckets"].items():
+                    lines.append(f"{name}_bucket{_format_labels({**sample['labels'], 'le': _format_value(bound)})} {count}")
+                lines.append(f"{name}_sum{_format_labels(sample['labels'])} {_format_value(sample['value']['sum'])}")
+                lines.append(f"{name}_count{_format_labels(sample['labels'])} {sample['value']['count']}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Format the labels of a sample, e.g. {stage="rs_decode"}."""
+    if not labels:
+        return ""
+
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{label}="{value}"' for (label, value) in zip(labels, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Format a value, as Prometheus expects (+Inf for infinity, and integers without a fraction.)"""
+    if value == float("inf"):
+        return "+Inf"
+
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# The registry the stages of the toolchain report to.
+REGISTRY = Registry()
+
+
+def count(name: str, amount: float = 1.0, help: str = "", **labels) -> None:
+    """Increase the counter of the given name and labels, if the instrumentation is enabled."""
+    if _enabled:
+        REGISTRY.counter(name, help, **labels).inc(amount)
+
+
+def observe(name: str, value: float, help: str = "", buckets: Tuple[float, ...] = DURATION_BUCKETS, **labels) -> None:
+    """Observe a value of the histogram of the given name and labels, if the instrumentation is enabled."""
+    if _enabled:
+        REGISTRY.histogram(name, help, buckets, **labels).observe(value)
+
+
+def set_gauge(name: str, value: float, help: str = "", **labels) -> None:
+    """Set the gauge of the given name and labels, if the instrumentation is enabled."""
+    if _enabled:
+        REGISTRY.gauge(name, help, **labels).set(value)
+
+
+class _Timer:
+    """Measures the duration of a stage, and observes it in the duration histogram of the stage."""
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        """Initialize a timer of the stage."""
+        self.stage = stage
+
+    def __enter__(self) -> _Timer:
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        REGISTRY.histogram(STAGE_DURATION, "The duration of each stage.", stage=self.stage).observe(perf_counter() - self.start)
+
+
+class _DisabledTimer:
+    """The timer used while the instrumentation is disabled, which does nothing."""
+    __slots__ = ()
+
+    def __enter__(self) -> _DisabledTimer:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_DISABLED_TIMER = _DisabledTimer()
+
+
+def timed(stage: str) -> _Timer | _DisabledTimer:
+    """A context manager measuring the duration of the stage, e.g. with timed("rs_decode"): ... (a shared no-op while disabled)."""
+    return _Timer(stage) if _enabled else _DISABLED_TIMER
+
+
+def instrumented(stage: str) -> Callable[[Callable], Callable]:
+    """A decorator measuring the duration of each call of the function as the given stage (only checking a flag while disabled)."""
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+
+            with _Timer(stage):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
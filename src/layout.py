@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+import numpy as np
+from dataclasses import dataclass
+from field import FieldTables, field_tables
+from functools import lru_cache
+from typing import List, Tuple
+
+# The maximal number of (field order, size) layouts which are kept in memory at once.
+LAYOUT_CACHE_SIZE = 32
+
+# The smallest size which leaves room for the parameter symbols between the locators.
+MINIMUM_SIZE = 23
+
+# The positions (rows, cols) of the calibration cells next to the locators, each holding the calibration symbols (red,
+# green and blue), negative positions are counted from the end of the matrix.
+CALIBRATION_POSITIONS = [((7, 7, 7), (-4, -3, -2)), ((6, 6, 6), (12, 13, 14)), ((12, 13, 14), (6, 6, 6)), ((-4, -3, -2), (7, 7, 7))]
+CALIBRATION_SYMBOLS = [2, 3, 5]
+
+
+@dataclass(frozen=True)
+class Layout:
+    """The parts of a HN code which only depend on the order of the field and the size of the code.
+       Every array is read only, and stored as plain numpy arrays of field elements, since the layout
+       only relies on field addition (which doesn't depend on the irreducible polynomial of the field)."""
+    order: int
+    size: int
+    template: np.ndarray                # (size + 2, size + 2), the fixed pattern on a white background.
+    fixed_region: np.ndarray            # (size + 2, size + 2), the cells of the fixed pattern, which aren't masked.
+    data_region: np.ndarray             # (size + 2, size + 2), the cells containing data.
+    fixed_index: np.ndarray             # Flat indicies of the fixed pattern.
+    data_index: np.ndarray              # Flat indicies of the data cells, in the order the data is placed.
+    error_correction_index: np.ndarray  # (3,) flat indicies of the error correction level.
+    mask_index: np.ndarray              # (3, 2) flat indicies of the masking symbols.
+    encoding_index: np.ndarray          # (3, 2) flat indicies of the encoding symbols.
+    masks: np.ndarray                   # (masks, size + 2, size + 2)
+
+
+def _construct_masks(order: int, size: int) -> np.ndarray:
+    """Construct the mask tensor for a code of the given size."""
+    idx = np.arange(size + 2)
+    return np.stack([
+        np.add.outer(idx, idx) % order,
+        np.multiply.outer(idx, idx) % order,
+        (np.multiply.outer(idx, idx) - np.add.outer(idx, idx)) % order,
+    ])
+
+
+def _add_locator_and_timing_pattern(matrix: np.ndarray, tables: FieldTables, size: int) -> None:
+    """Add the locator and timing patterns to the matrix."""
+    # 1. Add locators to matrix
+    large_locator = tables.subtract(np.pad(np.ones((3, 3), dtype=tables.dtype), 2), np.pad(np.ones((5, 5), dtype=tables.dtype), 1))
+    small_locator = tables.subtract(np.pad(np.ones((1, 1), dtype=tables.dtype), 2), np.pad(np.ones((3, 3), dtype=tables.dtype), 1))
+
+    # NOTE: Remember that we have padding around the edge of the code.
+    matrix[1:8, 1:8] = large_locator
+    matrix[1:6, -6:-1] = small_locator
+    matrix[-6:-1, 1:6] = small_locator
+
+    # 2. Add timing information
+    timing_pattern = np.arange(size - 8 - 6) % 2
+    matrix[7, 9:-7] = timing_pattern
+    matrix[9:-7, 7] = timing_pattern
+
+    # 3. Add calibration symbols
+    for pos in CALIBRATION_POSITIONS:
+        matrix[pos] = CALIBRATION_SYMBOLS
+
+
+def _add_white_separators(matrix: np.ndarray, size: int) -> None:
+    """Add white where it is needed."""
+    matrix[0, :] = 1
+    matrix[size + 1, :] = 1
+    matrix[:, 0] = 1
+    matrix[:, size + 1] = 1
+    # Arround the large indicator
+    matrix[:, 8] = 1
+    matrix[8, :] = 1
+
+    # Arround the small indicators
+    matrix[6, -7:] = 1
+    matrix[-7, :9] = 1
+    matrix[:9, -7] = 1
+    matrix[-7:, 6] = 1
+
+    # Arrund information patterns
+    matrix[9:-7, 5] = 1
+    matrix[5, 9:-7] = 1
+
+
+def _data_regions(size: int) -> List[Tuple[slice, slice, bool]]:
+    """The (rows, cols, transposed) regions which the data is placed in, in order. Given the size the regions are:
+       the (size - 8) x (size - 8) square in the lower right corner, followed by the two (size - 14) x 4 strips along
+       the left and top edges, between the locators (the top strip is filled column by column)."""
+    return [(slice(9, -1), slice(9, -1), False), (slice(9, -7), slice(1, 5), False), (slice(1, 5), slice(9, -7), True)]
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def placement_index(size: int) -> np.ndarray:
+    """Compute (or fetch the cached) flat indicies of the data cells of a code of the given size,
+       in the order the data is placed. The returned array is read only."""
+    if size < MINIMUM_SIZE:
+        raise ValueError(f"Expected the size of the code to be at least {MINIMUM_SIZE}, but got {size}")
+
+    cells = np.arange((size + 2) ** 2).reshape(size + 2, size + 2)
+    index = np.concatenate([(cells[rows, cols].T if transposed else cells[rows, cols]).reshape(-1)
+                            for (rows, cols, transposed) in _data_regions(size)])
+    _read_only(index)
+
+    return index
+
+
+def place_data(matrices: np.ndarray, data: np.ndarray) -> None:
+    """Place the data of shape (..., number_of_symbols) into the (contiguous) matrices of shape (..., size + 2, size + 2)."""
+    index = placement_index(matrices.shape[-1] - 2)
+    matrices.reshape(*matrices.shape[:-2], -1)[..., index] = data
+
+
+def gather_data(matrices: np.ndarray) -> np.ndarray:
+    """Read the data of shape (..., number_of_symbols) back from matrices of shape (..., size + 2, size + 2)."""
+    index = placement_index(matrices.shape[-1] - 2)
+    return matrices.reshape(*matrices.shape[:-2], -1)[..., index]
+
+
+def _flat_indicies(positions: list, size: int) -> np.ndarray:
+    """Convert a list of (rows, cols) positions (possibly negative) to flat indicies of the matrix."""
+    return np.array([np.ravel_multi_index(np.mod(pos, size + 2), (size + 2, size + 2)) for pos in positions])
+
+
+def _read_only(*arrays: np.ndarray) -> None:
+    """Mark the arrays as read only, so a cached layout can't be modified by accident."""
+    for array in arrays:
+        array.flags.writeable = False
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def layout_template(order: int, size: int) -> Layout:
+    """Construct (or fetch the cached) layout of a HN code of the given size, over a field of the given order."""
+    data_index = placement_index(size)
+
+    # 1. The fixed pattern is marked with its values, everything else is marked with -1.
+    pattern = np.full((size + 2, size + 2), -1, dtype=np.int16)
+    _add_locator_and_timing_pattern(pattern, field_tables(order), size)
+    _add_white_separators(pattern, size)
+    fixed_region = pattern >= 0
+
+    # 2. The data cells are given by the placement index.
+    data_region = np.zeros((size + 2, size + 2), dtype=bool)
+    data_region.flat[data_index] = True
+
+    template = np.where(fixed_region, pattern, 1).astype(np.uint8)
+    layout = Layout(
+        order=order,
+        size=size,
+        template=template,
+        fixed_region=fixed_region,
+        data_region=data_region,
+        fixed_index=np.flatnonzero(fixed_region),
+        data_index=data_index,
+        error_correction_index=_flat_indicies([(9, 6), (-8, 6), (6, 15)], size),
+        mask_index=_flat_indicies([((6, 6), (-8, -9)), ((10, 11), (6, 6)), ((-5, -6), (7, 7))], size),
+        encoding_index=_flat_indicies([((6, 6), (10, 11)), ((7, 7), (-5, -6)), ((-9, -10), (6, 6))], size),
+        masks=_construct_masks(order, size).astype(np.uint8),
+    )
+    _read_only(*(getattr(layout, field) for field in ("template", "fixed_region", "data_region", "fixed_index",
+                                                       "error_correction_index", "mask_index", "encoding_index", "masks")))
+
+    return layout
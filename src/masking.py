@@ -1,35 +1,32 @@
 #!/usr/bin/env python3
-import galois as gl
+from __future__ import annotations
 import numpy as np
+from typing import TYPE_CHECKING
 
-def compute_masking_score(mat: gl.FieldArray) -> int:
-    """Computes the masking score of the matrix."""
-    height, width = mat.shape
-    score = 0
+if TYPE_CHECKING:
+    import galois as gl
+
+def compute_masking_scores(mats: gl.FieldArray) -> np.ndarray:
+    """Computes the masking score of each matrix in a stack of shape (..., height, width).
 
-    # Top row & bottom row
-    for i in range(width):
-        if i == 0:
-            score += np.sum(mat[:1, :i + 1] == mat[0, i])
-            score += np.sum(mat[-2:, :i + 1] == mat[-1, i])
-        elif i == width - 1:
-            score += np.sum(mat[:1, i - 1:] == mat[0, i])
-            score += np.sum(mat[-2:, i - 1:] == mat[-1, i])
-        else:
-            score += np.sum(mat[:1, i - 1: i + 1] == mat[0, i])
-            score += np.sum(mat[-2:, i - 1: i + 1] == mat[-1, i])
+    Every pixel is compared against its left, upper and upper left neighbour (and itself),
+    which is exactly what the 2x2 windows of the original per pixel scan counted."""
+    mats = np.asarray(mats)
+    if mats.ndim < 2 or mats.shape[-2] < 2 or mats.shape[-1] < 2:
+        raise ValueError(f"Expected matrices of at least 2x2 pixels, but got shape {mats.shape}")
 
-    # Left and right most columns
-    for i in range(1, height - 1):
-        score += np.sum(mat[i - 1: i + 1, :1] == mat[i, 0])
-        score += np.sum(mat[i - 1: i + 1, -2:] == mat[i, -1])
+    height, width = mats.shape[-2:]
+    horizontal = np.count_nonzero(mats[..., :, 1:] == mats[..., :, :-1], axis=(-2, -1))
+    vertical = np.count_nonzero(mats[..., 1:, :] == mats[..., :-1, :], axis=(-2, -1))
+    diagonal = np.count_nonzero(mats[..., 1:, 1:] == mats[..., :-1, :-1], axis=(-2, -1))
 
-    # Middle
-    for i in range(1, height - 1):
-        for j in range(1, width - 1):
-            score += np.sum(mat[i - 1: i + 1, j - 1: j + 1] == mat[i, j])
+    return height * width + horizontal + vertical + diagonal
 
-    return score
+def compute_masking_score(mat: gl.FieldArray) -> int:
+    """Computes the masking score of the matrix."""
+    return int(compute_masking_scores(mat))
 
-def compute_mask (mat: gl.FieldArray) -> int:
-    pass
+def compute_mask(candidates: gl.FieldArray) -> np.ndarray:
+    """Computes the index of the best candidate (the lowest masking score) along the second to last matrix axis,
+       i.e. an int for a stack of shape (masks, height, width) and an array for shape (codes, masks, height, width)."""
+    return np.argmin(compute_masking_scores(candidates), axis=-1)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import numpy as np
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from multiprocessing import get_context
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Optional, Tuple
+from code import Code
+from compression.codebook import CodeBook
+from compression.compression import frame_payload, unframe_payload
+from compression.huffman import Huffman
+from error_correting.blocks import BlockCode, BlockStats
+from error_correting.reed_solomon import ReedSolomonCode
+from instrumentation import count, instrumented
+
+if TYPE_CHECKING:
+    import galois as gl
+
+# The pipeline of the worker processes, constructed by _build_pipeline.
+_pipeline: EncodePipeline | None = None
+
+
+def _build_pipeline(code_book: CodeBook, q: int, k: int, n: int, systematic: bool, error_correction_level: int,
+                    encoding: int, size: int) -> None:
+    """Construct the pipeline of a worker process, from the (picklable) parameters of the pipeline of the parent."""
+    global _pipeline
+    _pipeline = EncodePipeline(Huffman.from_code_book(code_book), ReedSolomonCode(q, k, n, systematic=systematic),
+                               error_correction_level, encoding, size)
+
+
+def _encode_batch(payloads: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode a batch of payloads in a worker process."""
+    return _pipeline.encode_batch(payloads)
+
+
+class EncodePipeline:
+    """Encodes payloads into HN codes, a batch at a time: the payloads are compressed (by the huffman code), packed into
+    symbols of GF(q) (preceded by their length), split into blocks which are encoded by the reed solomon code, and placed
+    and masked in the codes. The data of each code is its (interleaved) codewords, padded with zeros, see BlockCode.
+
+    The codes are constructed (and returned) as plain uint8 arrays of symbols, which can be viewed as arrays of rs.gf, such
+    that a short lived process encoding a few codes never compiles the field of galois."""
+
+    def __init__(self, huffman: Huffman, rs: ReedSolomonCode, error_correction_level: int, encoding: int, size: int = 23,
+                 batch_size: int = 64, workers: int = 0, executor: str = "thread"):
+        """Construct the pipeline. If workers is positive the batches are encoded by a pool of that many threads or
+           processes (executor is "thread" or "process"), otherwise they are encoded in the calling thread."""
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Expected the executor to be 'thread' or 'process', but got {executor!r}")
+
+        self.huffman = huffman
+        self.rs = rs
+        self.order = rs.tables.order
+        self.error_correction_level = error_correction_level
+        self.encoding = encoding
+        self.size = size
+        self.batch_size = batch_size
+        self.workers = workers
+        self.executor = executor
+
+        # Every code holds as many (whole) codewords as fit in its data cells.
+        self.number_of_symbols = Code.number_of_symbols(size)
+        self.block_code = BlockCode(rs, self.number_of_symbols)
+
+    @property
+    def blocks(self) -> int:
+        """The number of codewords of each code."""
+        return self.block_code.blocks
+
+    @property
+    def capacity(self) -> int:
+        """The number of symbols of GF(q) available for the framed payload of each code."""
+        return self.block_code.capacity
+
+    def frame(self, payloads: List[Any]) -> np.ndarray:
+        """Compress the payloads and pack them into the messages of the codes, of shape (N, capacity)."""
+        messages = np.zeros((len(payloads), self.capacity), dtype=np.uint8)
+        for (row, packed) in enumerate(self.huffman.compress_many_packed(payloads)):
+            symbols = frame_payload(packed, self.order)
+            if symbols.shape[0] > self.capacity:
+                raise ValueError(f"Payload {row} of the batch needs {symbols.shape[0]} symbols, but a code holds at most {self.capacity}")
+
+            messages[row, :symbols.shape[0]] = symbols
+
+        return messages
+
+    @instrumented("pipeline_encode")
+    def encode_batch(self, payloads: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode a batch of payloads, returning the index of the mask of each code along with the matrices of shape
+           (N, size + 2, size + 2)."""
+        data = self.block_code.encode_symbols(self.frame(payloads))
+        return Code.batch_symbols(data, self.order, self.error_correction_level, None, self.encoding, self.size)
+
+    def _batches(self, payloads: Iterable[Any]) -> Iterator[List[Any]]:
+        """Split the payloads into batches of the batch size."""
+        payloads = iter(payloads)
+        while batch := list(islice(payloads, self.batch_size)):
+            yield batch
+
+    def _pool(self) -> Executor:
+        """Start the pool of workers."""
+        if self.executor == "thread":
+            return ThreadPoolExecutor(self.workers)
+
+        # Forking a process after galois (and numba) has started its threads can leave the pool hanging at exit.
+        params = (CodeBook.from_huffman(self.huffman), self.order, self.rs.k, self.rs.n, self.rs.systematic,
+                  self.error_correction_level, self.encoding, self.size)
+        return ProcessPoolExecutor(self.workers, mp_context=get_context("spawn"), initializer=_build_pipeline, initargs=params)
+
+    def run(self, payloads: Iterable[Any]) -> Iterator[np.ndarray]:
+        """Encode the payloads (read lazily), yielding the matrix of each code in order. With a pool of workers at most
+           twice as many batches as there are workers are in flight, so the payloads are read as the codes are consumed."""
+        if self.workers <= 0:
+            for batch in self._batches(payloads):
+                yield from self.encode_batch(batch)[1]
+            return
+
+        encode = self.encode_batch if self.executor == "thread" else _encode_batch
+        with self._pool() as pool:
+            pending = deque()
+            for batch in self._batches(payloads):
+                pending.append(pool.submit(encode, batch))
+                if len(pending) >= 2 * self.workers:
+                    yield from pending.popleft().result()[1]
+
+            while pending:
+                yield from pending.popleft().result()[1]
+
+
+class DecodePipeline:
+    """Decodes HN codes (constructed by an EncodePipeline with the same huffman and reed solomon codes) back into payloads,
+    a batch at a time: the parameters are read, the mask is removed, the (interleaved) codewords are decoded by the reed
+    solomon code, and the framed payloads are unpacked and decompressed."""
+
+    def __init__(self, huffman: Huffman, rs: ReedSolomonCode, batch_size: int = 64):
+        """Construct the pipeline."""
+        self.huffman = huffman
+        self.rs = rs
+        self.order = rs.tables.order
+        self.batch_size = batch_size
+
+    def _decompress(self, message: np.ndarray) -> Optional[Any]:
+        """Unframe and decompress a single message, (returning a string if the symbols are strings.)"""
+        try:
+            symbols = self.huffman.decompress(unframe_payload(message, self.order, self.huffman.base))
+        except ValueError:
+            return None
+
+        return "".join(symbols) if all(isinstance(sym, str) for sym in symbols) else symbols
+
+    def decode_batch(self, matrices: np.ndarray | gl.FieldArray) -> List[Optional[Any]]:
+        """Decode a batch of matrices of shape (N, size + 2, size + 2), the payload of a code is None if it couldn't be
+           decoded (i.e. a codeword had too many errors, or the frame of the payload is invalid)."""
+        return self.decode_batch_with_stats(matrices)[0]
+
+    @instrumented("pipeline_decode")
+    def decode_batch_with_stats(self, matrices: np.ndarray | gl.FieldArray) -> Tuple[List[Optional[Any]], BlockStats]:
+        """Decode a batch of matrices like decode_batch, along with the number of symbols corrected in each block."""
+        data, _, _, _ = Code.read_symbols(np.asarray(matrices), self.order)
+        messages, stats = BlockCode(self.rs, data.shape[1]).decode_symbols(data)
+        payloads = [None if fail else self._decompress(message) for (fail, message) in zip(stats.failed, messages)]
+        count("hn_pipeline_decoding_failures_total", sum(payload is None for payload in payloads), "The number of codes which couldn't be decoded.")
+        return payloads, stats
+
+    def run(self, matrices: Iterable[np.ndarray | gl.FieldArray]) -> Iterator[Optional[Any]]:
+        """Decode the matrices (read lazily), yielding the payload of each code in order."""
+        matrices = iter(matrices)
+        while batch := list(islice(matrices, self.batch_size)):
+            yield from self.decode_batch(np.stack(batch))
@@ -1,76 +1,204 @@
 #!/usr/bin/env python3
+from __future__ import annotations
 import numpy as np
 from numpy.typing import ArrayLike
 from colorama import Back, Style
-import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Sequence
 
-def convert_int_to_symbol_string(n: int, maximum: int, base: int = 2) -> ArrayLike:
+# The maximal number of (size, base, locator size) layouts which are kept in memory at once.
+QR_LAYOUT_CACHE_SIZE = 32
+
+# The number of information symbols in each locator: the error correction level, the mask and the version (two symbols each).
+INFORMATION_SYMBOLS = 5
+
+
+def symbol_string_length(maximum: int, base: int = 2) -> int:
+    """The number of symbols of the given base needed to represent the integers below maximum, i.e. ceil(log_base(maximum))."""
+    length, capacity = 0, 1
+    while capacity < maximum:
+        length, capacity = length + 1, capacity * base
+
+    return length
+
+
+def convert_int_to_symbol_string(n: int | ArrayLike, maximum: int, base: int = 2) -> np.ndarray:
     """Takes an int and converts it to a, symbol string of the current base, of lengh ceil(log_base(maximum))
-       if no base is supplied the base will be two (meaning it will construct a bitstring.)"""
-    length = int(math.ceil(math.log(maximum, base)))
-    symbol_string = np.zeros(length)
-    for idx in range(length - 1, -1, -1):
-        symbol_string[idx] = n // (base ** idx)
-        n = n % base ** idx
+       if no base is supplied the base will be two (meaning it will construct a bitstring.) The symbols are least
+       significant first, and an array of integers of shape (...) is converted at once to symbol strings of shape (..., lengh)."""
+    length = symbol_string_length(maximum, base)
+    n = np.asarray(n, dtype=np.int64)
+    if np.any(n < 0) or np.any(n >= base ** length):
+        raise ValueError(f"Cannot convert {n} to {length} symbols of base {base}")
 
-    return symbol_string
+    return ((n[..., np.newaxis] // base ** np.arange(length, dtype=np.int64)) % base).astype(np.uint8)
 
 
-def construct_locator_with_information(error_correction_level: int,  mask: int, locator_size: int):
+def construct_locator_with_information(error_correction_level: int,  mask: int, locator_size: int, version: int = 0, base: int = 7) -> np.ndarray:
     """Constructs each locator and adds the information"""
     if locator_size < 5:
         raise ValueError(f"Expected locator size to be >= 5, got {locator_size}")
 
-    locator_with_information = np.ones(shape=(locator_size + 2, locator_size + 1))
-    locator = np.zeros(shape=(locator_size, locator_size)) + \
-              np.pad(np.ones(shape=(locator_size - 2, locator_size - 2)), pad_width=1) - \
-              np.pad(np.ones(shape=(locator_size - 4, locator_size- 4)), pad_width=2)
-    locator_with_information[:locator_size, :locator_size] = locator
+    locator_with_information = np.ones(shape=(locator_size + 2, locator_size + 1), dtype=np.uint8)
+    locator_with_information[:locator_size, :locator_size] = _locator(locator_size)
 
     # Error and masking information
-    locator_with_information[locator_size + 1, 0] = error_correction_level # NOTE: is encoded using two bits
-    locator_with_information[locator_size + 1, 1:3] = convert_int_to_symbol_string(mask, 7 ** 2,  base = 7)
-    locator_with_information[locator_size + 1, 3:5] = convert_int_to_symbol_string(0, 4, base = 7) # could include information about the version
+    locator_with_information[locator_size + 1, :INFORMATION_SYMBOLS] = _information(error_correction_level, mask, version, base)
 
     return locator_with_information
 
-class QRCode:
 
-    def __init__(self, data: str, k: int = 20, error_correction_level: int = 2, mask: int = 1, base: int = 7, locator_size: int = 5):
-        """Construct a QR code (version 1)."""
-        self.matrix = np.random.randint(0, base, size=(k, k))
-        #self.matrix = np.ones(shape=(k, k)) * 2
+def _locator(locator_size: int) -> np.ndarray:
+    """The square rings of a locator."""
+    idx = np.arange(locator_size)
+    ring = np.minimum.outer(np.minimum(idx, idx[::-1]), np.minimum(idx, idx[::-1]))
+    return (ring == 1).astype(np.uint8)
+
+
+def _information(error_correction_level: int, mask: int, version: int, base: int) -> np.ndarray:
+    """The information symbols of a locator."""
+    information = np.empty(INFORMATION_SYMBOLS, dtype=np.uint8)
+    information[0] = error_correction_level # NOTE: is encoded using two bits
+    information[1:3] = convert_int_to_symbol_string(mask, base ** 2, base=base)
+    information[3:5] = convert_int_to_symbol_string(version, base ** 2, base=base)
+    return information
+
+
+def minimum_size(locator_size: int) -> int:
+    """The smallest code which leaves room for (a single cell of) the timing pattern between the locators."""
+    return 2 * locator_size + 4
+
+
+@dataclass(frozen=True)
+class QRLayout:
+    """The parts of a QR style code which only depend on its size, base and locator size. Every array is read only."""
+    k: int
+    base: int
+    locator_size: int
+    template: np.ndarray            # (k, k), the locators (without information) and the timing patterns.
+    fixed_index: np.ndarray         # Flat indicies of the locators and timing patterns.
+    data_index: np.ndarray          # Flat indicies of the data cells, in the order the data is placed.
+    information_index: np.ndarray   # (3, INFORMATION_SYMBOLS) flat indicies of the information symbols of each locator.
+
+    @property
+    def version(self) -> int:
+        """The version of the code, i.e. the number of cells it exceeds the smallest code by (in each direction)."""
+        return self.k - minimum_size(self.locator_size)
+
+    @property
+    def capacity(self) -> int:
+        """The number of data symbols of the code."""
+        return self.data_index.shape[0]
+
+
+def _place_locators(matrix: np.ndarray, locator_with_information: np.ndarray, locator_size: int) -> None:
+    """Place the three locators (top left, and rotated in the bottom left and top right) in the matrix."""
+    matrix[:locator_size + 2, :locator_size + 1] = locator_with_information
+    matrix[-(locator_size + 1):, :(locator_size + 2)] = np.rot90(locator_with_information)
+    matrix[:locator_size + 1, -(locator_size + 2):] = np.rot90(locator_with_information, k = 3)
+
+
+@lru_cache(maxsize=QR_LAYOUT_CACHE_SIZE)
+def qr_layout(k: int, base: int = 7, locator_size: int = 5) -> QRLayout:
+    """Construct (or fetch the cached) layout of a QR style code of the given size."""
+    if k < minimum_size(locator_size):
+        raise ValueError(f"Expected a size of at least {minimum_size(locator_size)} for locators of size {locator_size}, got {k}")
+    if k - minimum_size(locator_size) >= base ** 2:
+        raise ValueError(f"The version of a code of size {k} doesn't fit in two symbols of base {base}")
+
+    template = np.zeros((k, k), dtype=np.uint8)
+    fixed = np.zeros((k, k), dtype=bool)
+    labels = np.full((k, k), -1, dtype=np.intp)
+
+    # 1. Add locators & seperators, labelling their information symbols such that their positions can be found.
+    locator_with_information = construct_locator_with_information(0, 0, locator_size, base=base)
+    _place_locators(template, locator_with_information, locator_size)
+    _place_locators(fixed, np.ones_like(locator_with_information, dtype=bool), locator_size)
+    locator_labels = np.full(locator_with_information.shape, -1, dtype=np.intp)
+    locator_labels[locator_size + 1, :INFORMATION_SYMBOLS] = np.arange(INFORMATION_SYMBOLS)
+    _place_locators(labels, locator_labels, locator_size)
+
+    # 2. Add timing pattern
+    idx = np.arange(locator_size + 2, k - (locator_size + 1))
+    timing_patterns, cyclic_pattern = idx % 2, idx % base
+    strip = slice(locator_size + 1, -(locator_size + 2))
+    for (line, pattern) in [(locator_size - 1, timing_patterns), (locator_size - 2, cyclic_pattern), (locator_size - 3, timing_patterns)]:
+        template[line, strip] = pattern
+        template[(locator_size + 2):-(locator_size + 1), line] = pattern
+        fixed[line, strip] = True
+        fixed[(locator_size + 2):-(locator_size + 1), line] = True
+
+    # The three locators are placed in the order of the flat indicies of their information symbols.
+    information_index = np.stack([np.flatnonzero(labels == label) for label in range(INFORMATION_SYMBOLS)], axis=1)
+    layout = QRLayout(k, base, locator_size, template, np.flatnonzero(fixed), np.flatnonzero(~fixed), information_index)
+    for array in [layout.template, layout.fixed_index, layout.data_index, layout.information_index]:
+        array.flags.writeable = False
+
+    return layout
+
+
+def payload_symbols(data: str | bytes | ArrayLike, base: int = 7) -> np.ndarray:
+    """Convert a payload to symbols of the given base: strings are encoded as utf-8, every byte is converted to its
+       (least significant first) symbol string, and arrays are taken to already hold symbols."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return convert_int_to_symbol_string(np.frombuffer(data, dtype=np.uint8), 256, base=base).reshape(-1)
+
+    symbols = np.asarray(data).reshape(-1)
+    if symbols.size and (np.min(symbols) < 0 or np.max(symbols) >= base):
+        raise ValueError(f"Expected symbols of base {base}")
+    return symbols.astype(np.uint8)
 
-        # 1. Add locators & seperators
-        locator_with_information = construct_locator_with_information(error_correction_level, mask, locator_size)
 
-        self.matrix[:locator_size + 2, :locator_size + 1] = locator_with_information
-        self.matrix[-(locator_size + 1):, :(locator_size + 2)] = np.rot90(locator_with_information)
-        self.matrix[:locator_size + 1, -(locator_size + 2):] = np.rot90(locator_with_information, k = 3)
+class QRCode:
 
-        # 2. Add timing pattern
-        timing_patterns = [i % 2 for i in range(locator_size + 2, k - (locator_size + 1))]
-        cyclic_pattern = [i % base for i in range(locator_size + 2, k - (locator_size + 1))]
-        self.matrix[locator_size - 1, locator_size + 1:-(locator_size + 2)] = timing_patterns
-        self.matrix[locator_size - 2, locator_size + 1:-(locator_size + 2)] = cyclic_pattern
-        self.matrix[locator_size - 3, locator_size + 1:-(locator_size + 2)] = timing_patterns
-        self.matrix[(locator_size + 2):-(locator_size + 1), locator_size - 1] = timing_patterns
-        self.matrix[(locator_size + 2):-(locator_size + 1), locator_size - 2] = cyclic_pattern
-        self.matrix[(locator_size + 2):-(locator_size + 1), locator_size - 3] = timing_patterns
+    def __init__(self, data: str | bytes | ArrayLike, k: int = 20, error_correction_level: int = 2, mask: int = 1, base: int = 7, locator_size: int = 5):
+        """Construct a QR code of size k (the version is k - minimum_size(locator_size)), whose data cells hold the
+           symbols of the payload (padded with zeros)."""
+        self.layout = qr_layout(k, base, locator_size)
+        self.error_correction_level = error_correction_level
+        self.mask = mask
+        self.matrix = QRCode.batch([data], k, error_correction_level, mask, base, locator_size)[0]
+
+    @staticmethod
+    def batch(payloads: Sequence[str | bytes | ArrayLike], k: int = 20, error_correction_level: int = 2, mask: int = 1,
+              base: int = 7, locator_size: int = 5) -> np.ndarray:
+        """Construct the matrices of a batch of QR codes (of shape (N, k, k)), whose payloads are converted by payload_symbols."""
+        layout = qr_layout(k, base, locator_size)
+        symbols: List[np.ndarray] = [payload_symbols(payload, base) for payload in payloads]
+        for payload in symbols:
+            if payload.shape[0] > layout.capacity:
+                raise ValueError(f"A payload of {payload.shape[0]} symbols exceeds the capacity of {layout.capacity} symbols")
+
+        data = np.zeros((len(symbols), layout.capacity), dtype=np.uint8)
+        for (row, payload) in zip(data, symbols):
+            row[:payload.shape[0]] = payload
+
+        matrices = np.empty((len(symbols), k * k), dtype=np.uint8)
+        matrices[:] = layout.template.reshape(-1)
+        matrices[:, layout.data_index] = data
+        matrices[:, layout.information_index] = _information(error_correction_level, mask, layout.version, base)
+        return matrices.reshape(len(symbols), k, k)
 
     def __repr__(self) -> str:
         """Allows us to print a QR code to the terminal."""
         return repr_matrix(self.matrix)
 
+
+# The terminal colors of each symbol (two characters wide).
+_COLORS = np.array([Style.RESET_ALL + "  ", Back.WHITE + "  ", Back.RED + "  ", Back.GREEN + "  ", Back.BLUE + "  ", Back.MAGENTA + "  ", Back.YELLOW + "  "])
+
+
 def repr_matrix(mat: ArrayLike) -> str:
     """Allows us to print a QR style code to the terminal."""
-    color_mapping = {0: Style.RESET_ALL + "  ", 1: Back.WHITE + "  ", 2: Back.RED + "  ", 3: Back.GREEN + "  ", 4: Back.BLUE + "  ", 5: Back.MAGENTA + "  ", 6: Back.YELLOW + "  "}
-    rows = ["".join((color_mapping[cell] for cell in row)) for row in mat]
+    rows = ["".join(row) for row in _COLORS[np.asarray(mat, dtype=np.intp)].tolist()]
     buffer = "\n " + f"{Style.RESET_ALL}\n ".join(rows) + f"{Style.RESET_ALL}\n"
 
     return buffer
 
 
 if __name__ == "__main__":
-    qr = QRCode("")
+    qr = QRCode("romeo, romeo, wherefore art thou romeo?")
     print(qr)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import signal
+import struct
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import count as counter
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from compression.codebook import CodeBook, load_codebook
+from compression.huffman import Huffman
+from error_correting.reed_solomon import ReedSolomonCode
+from pipeline import DecodePipeline, EncodePipeline
+
+# Every message (request or response) is a frame, i.e. the length of its body (uint32) followed by the body, and every integer
+# is big endian. A request body is its kind (uint8), its id (uint32) and a batch of items, and a response body is its status
+# (uint8), the id of the request and a batch of items. A batch is the number of items (uint32) followed by the length (uint32)
+# and the bytes of each item, where NO_ITEM as the length marks a missing item.
+#   ENCODE requests hold utf-8 payloads, and are answered by the (size + 2) x (size + 2) matrices of their codes (as uint8, row by row.)
+#   DECODE requests hold matrices, and are answered by the utf-8 payloads of the codes, or NO_ITEM if a code couldn't be decoded.
+# A request which fails is answered with the status ERROR and a single item holding the (utf-8) error message.
+ENCODE, DECODE = 1, 2
+OK, ERROR = 0, 1
+NO_ITEM = 0xFFFFFFFF
+
+# The largest frame which is accepted (64 MiB), so a corrupt length can't exhaust the memory of the worker.
+MAX_FRAME_SIZE = 1 << 26
+
+_FRAME = struct.Struct(">I")
+_HEADER = struct.Struct(">BI")
+_ITEM = struct.Struct(">I")
+
+# The pipelines of the worker processes, constructed by _build_workers.
+_encoder: EncodePipeline | None = None
+_decoder: DecodePipeline | None = None
+
+
+def pack_items(items: List[Optional[bytes]]) -> bytes:
+    """Pack a batch of items (None for a missing item)."""
+    parts = [_ITEM.pack(len(items))]
+    for item in items:
+        parts.append(_ITEM.pack(NO_ITEM) if item is None else _ITEM.pack(len(item)) + item)
+
+    return b"".join(parts)
+
+
+def unpack_items(buffer: bytes, offset: int = 0) -> List[Optional[bytes]]:
+    """Unpack a batch of items starting at the offset of the buffer. Raises a ValueError if the batch is truncated."""
+    view = memoryview(buffer)
+    if offset + _ITEM.size > len(view):
+        raise ValueError("The batch is truncated")
+
+    (number_of_items,), offset = _ITEM.unpack_from(view, offset), offset + _ITEM.size
+    items: List[Optional[bytes]] = []
+    for _ in range(number_of_items):
+        if offset + _ITEM.size > len(view):
+            raise ValueError("The batch is truncated")
+
+        (length,), offset = _ITEM.unpack_from(view, offset), offset + _ITEM.size
+        if length == NO_ITEM:
+            items.append(None)
+            continue
+        elif offset + length > len(view):
+            raise ValueError("The batch is truncated")
+
+        items.append(bytes(view[offset:offset + length]))
+        offset += length
+
+    return items
+
+
+def pack_message(kind: int, identifier: int, items: List[Optional[bytes]]) -> bytes:
+    """Pack a request (or response) of the given kind (or status) into a frame."""
+    body = _HEADER.pack(kind, identifier) + pack_items(items)
+    return _FRAME.pack(len(body)) + body
+
+
+def unpack_message(body: bytes) -> Tuple[int, int, List[Optional[bytes]]]:
+    """Unpack the kind (or status), the id and the items of the body of a frame."""
+    if len(body) < _HEADER.size:
+        raise ValueError("The message is truncated")
+
+    kind, identifier = _HEADER.unpack_from(body)
+    return kind, identifier, unpack_items(body, _HEADER.size)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """Read the body of the next frame, or None if the stream was closed between frames."""
+    try:
+        (length,) = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    except asyncio.IncompleteReadError as error:
+        if error.partial:
+            raise
+        return None
+
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Got a frame of {length} bytes, but at most {MAX_FRAME_SIZE} bytes are accepted")
+
+    return await reader.readexactly(length)
+
+
+def _build_workers(code_book: CodeBook, q: int, k: int, n: int, systematic: bool, error_correction_level: int,
+                   encoding: int, size: int) -> None:
+    """Construct the (warm) pipelines of a worker, from the (picklable) parameters of the server."""
+    global _encoder, _decoder
+    huffman, rs = Huffman.from_code_book(code_book), ReedSolomonCode(q, k, n, systematic=systematic)
+    _encoder = EncodePipeline(huffman, rs, error_correction_level, encoding, size)
+    _decoder = DecodePipeline(huffman, rs)
+
+    # Encoding (and decoding) a code fills the caches of the layout, the masks and the tables of the code.
+    _decode([matrix.tobytes() for matrix in _encoder.encode_batch([""])[1]])
+
+
+def _encode(payloads: List[str]) -> List[bytes]:
+    """Encode a batch of payloads in a worker, returning the matrix of each code as bytes."""
+    _, matrices = _encoder.encode_batch(payloads)
+    return [matrix.tobytes() for matrix in matrices]
+
+
+def _decode(matrices: List[bytes]) -> List[Optional[bytes]]:
+    """Decode a batch of matrices (given as bytes) in a worker, returning the utf-8 payload of each code (or None.)"""
+    side = int(round(np.sqrt(len(matrices[0])))) if matrices else 0
+    if any(len(matrix) != side * side for matrix in matrices):
+        raise ValueError("Expected every matrix of the batch to be square, and of the same size")
+
+    stacked = np.frombuffer(b"".join(matrices), dtype=np.uint8).reshape(len(matrices), side, side)
+    return [None if payload is None else payload.encode("utf-8") for payload in _decoder.decode_batch(stacked)]
+
+
+class WorkerServer:
+    """A long running worker, which encodes and decodes HN codes for the clients connected to its unix socket. Every
+    request is split into batches, which are handled by a pool of worker processes (or a single thread, if workers is
+    zero) holding warm pipelines, so the fields, layouts, code books and reed solomon tables are only constructed once."""
+
+    def __init__(self, code_book: CodeBook, rs: Tuple[int, int, int, bool], error_correction_level: int, encoding: int,
+                 size: int = 23, batch_size: int = 64, workers: int = 0):
+        """Construct the server, given the code book of the huffman code and the parameters (q, k, n, systematic) of the
+           reed solomon code."""
+        self.params = (code_book, *rs, error_correction_level, encoding, size)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.pool: Executor | None = None
+
+    def start(self) -> None:
+        """Start the pool of workers, and construct their pipelines."""
+        if self.workers <= 0:
+            _build_workers(*self.params)
+            self.pool = ThreadPoolExecutor(1)
+        else:
+            # Forking a process after galois (and numba) has started its threads can leave the pool hanging at exit.
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=get_context("spawn"), initializer=_build_workers, initargs=self.params)
+            for future in [self.pool.submit(len, "") for _ in range(self.workers)]:
+                future.result()
+
+    def close(self) -> None:
+        """Stop the pool of workers."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    async def handle_request(self, kind: int, items: List[Optional[bytes]]) -> List[Optional[bytes]]:
+        """Encode or decode the items of a request, whose batches are handled by the workers concurrently."""
+        if any(item is None for item in items):
+            raise ValueError("Requests can't hold missing items")
+
+        if kind == ENCODE:
+            work, arguments = _encode, [item.decode("utf-8") for item in items]
+        elif kind == DECODE:
+            work, arguments = _decode, items
+        else:
+            raise ValueError(f"Unknown request kind {kind}")
+
+        loop = asyncio.get_running_loop()
+        batches = [arguments[i:i + self.batch_size] for i in range(0, len(arguments), self.batch_size)]
+        results = await asyncio.gather(*(loop.run_in_executor(self.pool, work, batch) for batch in batches))
+        return [result for batch in results for result in batch]
+
+    async def _respond(self, writer: asyncio.StreamWriter, lock: asyncio.Lock, kind: int, identifier: int,
+                       items: List[Optional[bytes]]) -> None:
+        """Handle a request, and write its response (or the error it raised.)"""
+        try:
+            response = pack_message(OK, identifier, await self.handle_request(kind, items))
+        except Exception as error:
+            response = pack_message(ERROR, identifier, [f"{type(error).__name__}: {error}".encode("utf-8")])
+
+        async with lock:
+            writer.write(response)
+            await writer.drain()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve the requests of a connection, the requests are handled concurrently (so the responses may be out of order.)"""
+        lock, tasks = asyncio.Lock(), set()
+        try:
+            while (body := await read_frame(reader)) is not None:
+                kind, identifier, items = unpack_message(body)
+                task = asyncio.create_task(self._respond(writer, lock, kind, identifier, items))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            await asyncio.gather(*tasks)
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass  # The connection is dropped if it sends a malformed frame.
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def serve(self, path: str, ready: Optional[asyncio.Event] = None) -> None:
+        """Listen on the unix socket of the given path until cancelled, (the optional event is set once it's listening.)"""
+        if os.path.exists(path):
+            os.unlink(path)
+
+        server = await asyncio.start_unix_server(self.handle_connection, path)
+        try:
+            async with server:
+                if ready is not None:
+                    ready.set()
+                await server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def run(self, path: str) -> None:
+        """Start the workers and serve on the unix socket of the given path, until the process is interrupted or terminated."""
+        async def serve() -> None:
+            task = asyncio.current_task()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                asyncio.get_running_loop().add_signal_handler(signum, task.cancel)
+            await self.serve(path)
+
+        self.start()
+        try:
+            asyncio.run(serve())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.close()
+
+
+class WorkerClient:
+    """A client of a worker server, which may have several requests in flight at once over a single connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Construct a client of the connection, use WorkerClient.connect to connect to a server."""
+        self.reader = reader
+        self.writer = writer
+        self._identifiers = counter()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, path: str) -> WorkerClient:
+        """Connect to the server listening on the unix socket of the given path."""
+        return cls(*await asyncio.open_unix_connection(path))
+
+    async def _receive(self) -> None:
+        """Resolve the pending requests as their responses arrive."""
+        try:
+            while (body := await read_frame(self.reader)) is not None:
+                status, identifier, items = unpack_message(body)
+                future = self._pending.pop(identifier, None)
+                if future is None or future.done():
+                    continue  # A response to an unknown (or abandoned) request is skipped.
+                if status == OK:
+                    future.set_result(items)
+                else:
+                    future.set_exception(RuntimeError(items[0].decode("utf-8")))
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("The connection to the server was closed"))
+
+    async def request(self, kind: int, items: List[bytes]) -> List[Optional[bytes]]:
+        """Send a request, and wait for its items."""
+        identifier = next(self._identifiers) & 0xFFFFFFFF
+        self._pending[identifier] = future = asyncio.get_running_loop().create_future()
+        self.writer.write(pack_message(kind, identifier, items))
+        await self.writer.drain()
+        return await future
+
+    async def encode(self, payloads: List[str]) -> List[np.ndarray]:
+        """Encode the payloads, returning the matrix of each code."""
+        matrices = await self.request(ENCODE, [payload.encode("utf-8") for payload in payloads])
+        return [np.frombuffer(matrix, dtype=np.uint8).reshape(2 * (int(round(np.sqrt(len(matrix)))),)) for matrix in matrices]
+
+    async def decode(self, matrices: List[np.ndarray]) -> List[Optional[str]]:
+        """Decode the matrices, returning the payload of each code (or None if it couldn't be decoded.)"""
+        payloads = await self.request(DECODE, [np.ascontiguousarray(matrix, dtype=np.uint8).tobytes() for matrix in matrices])
+        return [None if payload is None else payload.decode("utf-8") for payload in payloads]
+
+    async def close(self) -> None:
+        """Close the connection."""
+        self.writer.close()
+        await self.writer.wait_closed()
+        self._receiver.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encode and decode HN codes for the clients of a unix socket.")
+    parser.add_argument("socket", help="The path of the unix socket to listen on.")
+    parser.add_argument("code_book", help="The (binary) code book of the huffman code.")
+    parser.add_argument("--rs", type=int, nargs=3, default=[8, 3, 7], metavar=("Q", "K", "N"), help="The reed solomon code.")
+    parser.add_argument("--systematic", action="store_true", help="Use the systematic form of the reed solomon code.")
+    parser.add_argument("--error-correction-level", type=int, default=2)
+    parser.add_argument("--encoding", type=int, default=2)
+    parser.add_argument("--size", type=int, default=23)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="The number of worker processes (0 for a single thread).")
+    args = parser.parse_args()
+
+    server = WorkerServer(load_codebook(args.code_book), (*args.rs, args.systematic), args.error_correction_level, args.encoding,
+                          args.size, args.batch_size, args.workers)
+    server.run(args.socket)
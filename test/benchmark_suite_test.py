@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+import json
+import os
+from benchmarks.suite import _corpus, compare, run_suite
+
+
+def test_suite_results(tmp_path):
+    source, corpus = _corpus(os.path.join(tmp_path, "missing.txt"), length=4096)
+    results = run_suite(source, corpus, only=["masking_scores", "convert_int_to_symbols"], repeats=1, profile_directory=str(tmp_path))
+
+    assert corpus.startswith("zipf") and len(source) == 4096
+    assert [result["name"] for result in results["results"]] == ["masking_scores", "convert_int_to_symbols"]
+    for result in results["results"]:
+        assert result["best"] > 0 and result["throughput"] > 0 and result["peak_memory"] > 0
+        assert result["hot_spots"] and os.path.exists(os.path.join(tmp_path, f"{result['name']}.prof"))
+
+    stored = json.loads(json.dumps(results))
+    assert [name for (name, _, _) in compare(results, stored)] == ["masking_scores", "convert_int_to_symbols"]
+
+
+def test_fixed_corpus():
+    assert _corpus("missing.txt", length=1000) == _corpus("missing.txt", length=1000)
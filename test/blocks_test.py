@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+from error_correting.blocks import BlockCode
+from error_correting.reed_solomon import ReedSolomonCode
+
+
+@pytest.fixture(scope="module")
+def rs():
+    return ReedSolomonCode(8, 3, 7)
+
+
+def _messages(block_code: BlockCode, count: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 8, size=(count, block_code.capacity), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("interleaved", [True, False])
+def test_round_trip(rs, interleaved):
+    block_code = BlockCode(rs, 60, interleaved=interleaved)
+    messages = _messages(block_code, 5)
+    data = block_code.encode_symbols(messages)
+
+    assert block_code.blocks == 8 and data.shape == (5, 60)
+    assert np.all(data[:, block_code.blocks * rs.n:] == 0)
+    assert np.array_equal(np.sort(block_code.index.reshape(-1)), np.arange(block_code.blocks * rs.n))
+
+    decoded, stats = block_code.decode_symbols(data)
+    assert np.array_equal(decoded, messages)
+    assert np.all(stats.corrected == 0) and not np.any(stats.failed)
+
+
+@pytest.mark.parametrize("interleaved", [True, False])
+def test_burst_errors(rs, interleaved):
+    # A burst of two symbols per block is spread over the blocks only if they are interleaved (each codeword corrects 2).
+    block_code = BlockCode(rs, 60, interleaved=interleaved)
+    messages = _messages(block_code, 3, seed=1)
+    data = block_code.encode_symbols(messages)
+    data[:, 10:10 + 2 * block_code.blocks] ^= 1 + np.arange(2 * block_code.blocks, dtype=np.uint8) % 7
+
+    decoded, stats = block_code.decode_symbols(data)
+    if interleaved:
+        assert np.array_equal(decoded, messages)
+        assert np.all(stats.corrected == 2) and np.all(stats.worst_block == 2)
+        assert np.all(stats.corrected_symbols == 2 * block_code.blocks)
+    else:
+        assert np.all(stats.failed) and np.all(stats.worst_block == -1)
+
+
+def test_erasures(rs):
+    # Four erased symbols of a codeword are corrected, which is more than its errors.
+    block_code = BlockCode(rs, 21)
+    messages = _messages(block_code, 4, seed=2)
+    data = block_code.encode_symbols(messages)
+    erasures = np.zeros(data.shape, dtype=bool)
+    erasures[:, block_code.index[1, :4]] = True
+    data[erasures] ^= 6
+
+    assert np.any(block_code.decode_symbols(data)[1].failed)
+    decoded, stats = block_code.decode_symbols(data, erasures)
+    assert np.array_equal(decoded, messages)
+    assert stats.corrected[:, 1].tolist() == [4] * 4
+
+
+def test_threaded_matches_serial(rs, monkeypatch):
+    monkeypatch.setattr("error_correting.blocks.MIN_WORDS_PER_WORKER", 16)
+    serial, threaded = BlockCode(rs, 60), BlockCode(rs, 60, workers=3)
+    messages = _messages(serial, 20, seed=3)
+    data = serial.encode_symbols(messages)
+    data[::2, 5] ^= 3
+
+    assert np.array_equal(threaded.encode_symbols(messages), serial.encode_symbols(messages))
+    (decoded, stats), (expected, expected_stats) = threaded.decode_symbols(data), serial.decode_symbols(data)
+    assert np.array_equal(decoded, expected)
+    assert np.array_equal(stats.corrected, expected_stats.corrected)
+
+
+def test_invalid_shapes(rs):
+    with pytest.raises(ValueError):
+        BlockCode(rs, 6)
+    block_code = BlockCode(rs, 21)
+    with pytest.raises(ValueError):
+        block_code.encode_symbols(np.zeros((2, 8), dtype=np.uint8))
+    with pytest.raises(ValueError):
+        block_code.decode_symbols(np.zeros((2, 20), dtype=np.uint8))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+import galois as gl
+import numpy as np
+import pytest
+from code import Code
+from helpers import convert_int_to_symbols
+from layout import layout_template
+
+
+def test_batch_matches_single_codes():
+    gf = gl.GF(8)
+    data = gf(np.random.default_rng(0).integers(0, 8, size=(5, Code.number_of_symbols(23))))
+    mask_indices, matrices = Code.batch(data, gf, error_correction_level=2, mask=None, encoding=2)
+
+    assert matrices.shape == (5, 25, 25)
+    for row, mask_idx, matrix in zip(data, mask_indices, matrices):
+        code = Code(row, gf, error_correction_level=2, mask=None, encoding=2)
+        assert code.mask_idx == mask_idx
+        assert np.array_equal(code.matrix, matrix)
+
+
+def test_batch_rejects_wrong_data_shape():
+    gf = gl.GF(8)
+    with pytest.raises(ValueError):
+        Code.batch(gf.Zeros((3, Code.number_of_symbols(23) - 1)), gf, error_correction_level=2, mask=None, encoding=2)
+
+
+def test_code_of_larger_size():
+    gf = gl.GF(8)
+    data = gf(np.random.default_rng(1).integers(0, 8, size=(2, Code.number_of_symbols(41))))
+    _, matrices = Code.batch(data, gf, error_correction_level=2, mask=None, encoding=2, size=41)
+
+    assert matrices.shape == (2, 43, 43)
+    assert np.array_equal(Code(data[1], gf, error_correction_level=2, mask=None, encoding=2, size=41).matrix, matrices[1])
+
+
+def test_mask_symbols_match_chosen_mask():
+    gf = gl.GF(8)
+    data = gf(np.random.default_rng(2).integers(0, 8, size=(40, Code.number_of_symbols(23))))
+    mask_indices, matrices = Code.batch(data, gf, error_correction_level=2, mask=None, encoding=2)
+
+    layout = layout_template(8, 23)
+    stored = np.asarray(matrices).reshape(40, -1)[:, layout.mask_index]
+    for mask_idx, symbols in zip(mask_indices, stored):
+        assert np.all(symbols == convert_int_to_symbols(int(mask_idx), gf, length=2))
+
+    # The stored symbols are those of the mask which was actually applied.
+    unmasked = np.asarray(matrices - gf(layout.masks[mask_indices])).reshape(40, -1)[:, layout.data_index]
+    assert np.array_equal(unmasked, data)
+
+
+def test_forced_mask():
+    gf = gl.GF(8)
+    data = gf(np.random.default_rng(3).integers(0, 8, size=(4, Code.number_of_symbols(23))))
+    mask_indices, _ = Code.batch(data, gf, error_correction_level=2, mask=1, encoding=2)
+    assert np.all(mask_indices == 1)
+
+    with pytest.raises(ValueError):
+        Code.batch(data, gf, error_correction_level=2, mask=4, encoding=2)
+
+
+def test_from_matrix_recovers_data_and_parameters():
+    gf = gl.GF(8)
+    data = gf(np.random.default_rng(4).integers(0, 8, size=Code.number_of_symbols(23)))
+    code = Code(data, gf, error_correction_level=3, mask=None, encoding=5)
+    read = Code.from_matrix(code.matrix, gf)
+
+    assert (read.error_correction_level, read.mask_idx, read.encoding) == (3, code.mask_idx, 5)
+    assert np.array_equal(read.data, data)
+
+
+def test_parameters_survive_a_corrupted_copy():
+    gf = gl.GF(8)
+    layout = layout_template(8, 23)
+    data = gf(np.random.default_rng(5).integers(0, 8, size=(6, Code.number_of_symbols(23))))
+    mask_indices, matrices = Code.batch(data, gf, error_correction_level=2, mask=None, encoding=10)
+
+    # Corrupt a different copy of each parameter of every code.
+    cells = matrices.view(np.ndarray).reshape(6, -1)
+    for row in range(6):
+        cells[row, layout.error_correction_index[row % 3]] ^= 1
+        cells[row, layout.mask_index[(row + 1) % 3]] ^= 4
+        cells[row, layout.encoding_index[(row + 2) % 3, 1]] ^= 7
+
+    read, error_correction_levels, read_masks, encodings = Code.read_batch(matrices, gf)
+    assert np.all(error_correction_levels == 2) and np.all(encodings == 10)
+    assert np.array_equal(read_masks, mask_indices)
+    assert np.array_equal(read, data)
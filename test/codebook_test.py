@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import json
+import numpy as np
+import pytest
+from compression.codebook import CodeBook, import_json_codebook, load_codebook, save_codebook
+from compression.huffman import Huffman, digits
+
+SOURCE = "romeo, romeo, wherefore art thou romeo? deny thy father and refuse thy name. ☃" * 3
+
+
+@pytest.mark.parametrize("base, symbol_length", [(2, 1), (3, 2), (8, 3)])
+def test_binary_round_trip(tmp_path, base, symbol_length):
+    huffman = Huffman(SOURCE, [], symbol_length, base=base)
+    save_codebook(str(tmp_path / "book.hncb"), CodeBook.from_huffman(huffman))
+    code_book = load_codebook(str(tmp_path / "book.hncb"))
+
+    assert isinstance(code_book.lengths, np.memmap) and not code_book.points.flags.writeable
+    loaded = Huffman.from_code_book(code_book)
+    assert loaded.symbols == huffman.symbols
+    assert np.array_equal(loaded.compress(SOURCE), huffman.compress(SOURCE))
+    assert "".join(loaded.decompress(huffman.compress(SOURCE))) == SOURCE[:len(SOURCE) - len(SOURCE) % symbol_length]
+
+
+def test_json_import_matches_binary(tmp_path):
+    huffman = Huffman(SOURCE, [], 1, base=3)
+    with open(tmp_path / "book.json", "w") as file:
+        json.dump({"base": 3, "code_book": {sym: digits(int(code), int(length), 3)
+                                            for (sym, length, code) in zip(huffman.symbols, huffman.lengths, huffman.codes)}}, file)
+
+    imported = import_json_codebook(str(tmp_path / "book.json"))
+    assert imported.base == 3 and imported.symbols == huffman.symbols
+    assert np.array_equal(Huffman.from_code_book(imported).codes, huffman.codes)
+
+
+def test_load_rejects_other_files(tmp_path):
+    (tmp_path / "book.hncb").write_bytes(b"PNG" + bytes(40))
+    with pytest.raises(ValueError):
+        load_codebook(str(tmp_path / "book.hncb"))
+
+    save_codebook(str(tmp_path / "book.hncb"), CodeBook.from_huffman(Huffman(SOURCE, [], 1)))
+    (tmp_path / "book.hncb").write_bytes((tmp_path / "book.hncb").read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        load_codebook(str(tmp_path / "book.hncb"))
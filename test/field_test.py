@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+import galois as gl
+import numpy as np
+import os
+import pytest
+from error_correting.reed_solomon import ReedSolomonCode
+from field import CACHED_CODES, CACHED_FIELDS, cache_path, compute_field_tables, field_tables
+
+
+@pytest.mark.parametrize("order", [2, 7, 8, 9, 16])
+def test_tables_match_galois(order):
+    gf = gl.GF(order)
+    tables = field_tables(order)
+    a, b = np.meshgrid(np.arange(order), np.arange(order))
+
+    assert np.array_equal(tables.add(a, b), gf(a) + gf(b))
+    assert np.array_equal(tables.subtract(a, b), gf(a) - gf(b))
+    assert np.array_equal(tables.multiply(a, b), gf(a) * gf(b))
+    assert np.array_equal(tables.inverse[1:], gf(np.arange(1, order)) ** -1)
+
+
+@pytest.mark.parametrize("order", [7, 8, 9])
+def test_matmul_matches_galois(order):
+    gf = gl.GF(order)
+    a, b = gf.Random((5, 4, 3)), gf.Random((3, 6))
+    assert np.array_equal(field_tables(order).matmul(a, b), a @ b)
+
+
+@pytest.mark.parametrize("order", CACHED_FIELDS)
+def test_cached_tables_match_computed(order):
+    tables = field_tables(order)
+    for (name, array) in compute_field_tables(order).items():
+        assert os.path.exists(cache_path(f"gf{order}_{name}"))
+        assert np.array_equal(getattr(tables, name), array)
+        assert getattr(tables, name).dtype == array.dtype
+        assert not getattr(tables, name).flags.writeable
+
+
+@pytest.mark.parametrize("systematic", [False, True])
+@pytest.mark.parametrize("q, k, n", CACHED_CODES)
+def test_cached_code_tables_match_computed(q, k, n, systematic):
+    code = ReedSolomonCode(q, k, n, systematic=systematic)
+    for (name, array) in code.compute_tables().items():
+        assert np.array_equal(np.load(cache_path(code.cache_name(q, k, n, systematic, name))), array)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+from collections import Counter
+from compression.frequencies import FrequencyIndex
+from compression.huffman import Huffman
+
+SOURCE = "romeo, romeo, wherefore art thou romeo? deny thy father and refuse thy name. " * 3
+
+
+def disjoint_counts(source: str, symbol_length: int) -> Counter:
+    return Counter(source[i:i + symbol_length] for i in range(0, len(source) - symbol_length + 1, symbol_length))
+
+
+@pytest.mark.parametrize("symbol_length", [1, 2, 3, 5])
+def test_counts_match_counter(symbol_length):
+    index = FrequencyIndex.from_source(SOURCE + "\x00é☃", symbol_length)
+    expected = disjoint_counts(SOURCE + "\x00é☃", symbol_length)
+
+    assert index.symbols == sorted(expected)
+    assert dict(zip(index.symbols, index.counts.tolist())) == expected
+    assert index.total == sum(expected.values())
+
+
+@pytest.mark.parametrize("symbol_length", [2, 4])
+def test_merge_matches_counting_everything(symbol_length):
+    first, second = SOURCE[:100], SOURCE[100:] + "juliet"
+    index = FrequencyIndex.from_source(first, symbol_length)
+    index.merge(FrequencyIndex.from_source(second, symbol_length))
+
+    expected = disjoint_counts(first, symbol_length) + disjoint_counts(second, symbol_length)
+    assert dict(zip(index.symbols, index.counts.tolist())) == expected
+
+    with pytest.raises(ValueError):
+        index.merge(FrequencyIndex(symbol_length + 1))
+
+
+def test_save_and_load(tmp_path):
+    index = FrequencyIndex.from_source(SOURCE, 2)
+    index.save(str(tmp_path / "index.npz"))
+    loaded = FrequencyIndex.load(str(tmp_path / "index.npz"))
+
+    assert loaded.symbol_length == 2
+    assert loaded.symbols == index.symbols
+    assert np.array_equal(loaded.counts, index.counts)
+
+
+def test_huffman_from_frequency_index():
+    index = FrequencyIndex.from_source(SOURCE, 1)
+    assert Huffman.from_frequency_index(index, base=3).code_book.keys() == Huffman(SOURCE, [], 1, base=3).code_book.keys()
+
+    # Symbols of the alphabeth are given codes even if they don't occur in the source.
+    huffman = Huffman(SOURCE, ["j", "q"], 1, base=3)
+    assert {"j", "q"} <= huffman.code_book.keys()
+    assert huffman.decompress(huffman.compress("jar")) == list("jar")
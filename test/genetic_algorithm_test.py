@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+import json
+import numpy as np
+from collections import Counter
+from compression.codebook import load_codebook
+from compression.genetic_algorithm import FitnessEvaluator, Genetic_Algorithm, kraft_sums
+from compression.huffman import HuffmanDecoder
+
+SOURCE = "romeo, romeo, wherefore art thou romeo? deny thy father and refuse thy name. " * 3
+
+
+def test_fitness_evaluator_counts_in_shared_memory():
+    ids = np.random.default_rng(0).integers(0, 300, size=10000)
+    evaluator = FitnessEvaluator(ids, 300, processes=2, chunk_size=1000)
+    assert np.array_equal(evaluator.frequencies, np.bincount(ids, minlength=300))
+
+    lengths = np.random.default_rng(1).integers(1, 10, size=(4, 300))
+    assert np.array_equal(evaluator(lengths), [np.sum(row[ids]) for row in lengths])
+
+
+def test_genetic_algorithm_finds_valid_code_book(tmp_path):
+    ga = Genetic_Algorithm(1, number_of_agents=10, permutation_prob=0.05, base=2, processes=1, seed=0)
+    code_book = ga.run(SOURCE, sorted(set(SOURCE)), str(tmp_path / "ga"), max_iter=20)
+
+    # The code book is a prefix code, and compresses better than the fixed length code.
+    assert kraft_sums(np.array([len(code) for code in code_book.values()]), 2) <= 1.0
+    counts = Counter(SOURCE)
+    assert sum(counts[sym] * len(code) for (sym, code) in code_book.items()) < len(SOURCE) * 5
+
+    with open(tmp_path / "ga.json") as file:
+        stored = json.load(file)
+    assert stored["base"] == 2 and stored["code_book"] == code_book
+
+    assert load_codebook(str(tmp_path / "ga.hncb")).symbols == sorted(code_book, key=lambda sym: (len(code_book[sym]), sym))
+
+    decoder = HuffmanDecoder(list(code_book.values()), list(code_book.keys()))
+    assert "".join(decoder.decode(np.concatenate([code_book[sym] for sym in SOURCE]))) == SOURCE
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+import galois as gl
+import numpy as np
+import pytest
+from colorama import Back, Style
+from helpers import convert_int_to_symbols, convert_symbols_to_int, int_to_symbols, repr_matrix
+
+
+@pytest.mark.parametrize("order", [7, 8, 9])
+def test_int_to_symbols_round_trip(order):
+    values = np.arange(order ** 2)
+    symbols = np.stack([int_to_symbols(int(value), order, length=2) for value in values])
+
+    assert symbols.dtype == np.uint8
+    assert np.array_equal(symbols[order + 2], [1, 2])
+    assert np.array_equal(convert_symbols_to_int(symbols, order), values)
+
+
+def test_int_to_symbols_out_of_range():
+    with pytest.raises(ValueError):
+        int_to_symbols(64, 8, length=2)
+    with pytest.raises(ValueError):
+        int_to_symbols(-1, 8, length=2)
+
+
+def test_convert_int_to_symbols_is_field_array():
+    gf = gl.GF(8)
+    symbols = convert_int_to_symbols(13, gf, length=2)
+
+    assert type(symbols) is gf
+    assert np.array_equal(symbols, gf([1, 5]))
+
+
+def test_repr_matrix():
+    matrix = np.array([[0, 1], [2, 7]], dtype=np.uint8)
+    expected = (f"\n {Style.RESET_ALL}  {Back.WHITE}  {Style.RESET_ALL}\n {Back.RED}  {Back.CYAN}  {Style.RESET_ALL}\n")
+
+    assert repr_matrix(matrix) == expected
+    assert repr_matrix(gl.GF(8)(matrix)) == expected
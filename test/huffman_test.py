@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+from compression.huffman import Huffman, HuffmanDecoder, canonical_codes, digits, huffman_code_lengths
+
+SOURCE = "romeo, romeo, wherefore art thou romeo? deny thy father and refuse thy name. " * 3
+
+
+def test_binary_code_lengths():
+    lengths = huffman_code_lengths(np.array([0.4, 0.2, 0.2, 0.1, 0.1]))
+    assert np.dot([0.4, 0.2, 0.2, 0.1, 0.1], lengths) == pytest.approx(2.2)
+    assert np.sum(2.0 ** -lengths) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("base", [2, 3, 7, 8])
+def test_code_lengths_satisfy_kraft(base):
+    frequencies = np.random.default_rng(base).random(50)
+    lengths = huffman_code_lengths(frequencies, base)
+    assert np.sum(float(base) ** -lengths) <= 1.0 + 1e-12
+
+
+@pytest.mark.parametrize("base", [2, 3, 8])
+def test_canonical_codes_are_prefix_free(base):
+    symbols = [chr(ord("a") + idx) for idx in range(20)]
+    lengths = huffman_code_lengths(np.random.default_rng(0).random(20), base)
+    ordered, ordered_lengths, codes = canonical_codes(symbols, lengths, base)
+
+    words = sorted(tuple(digits(code, length, base)) for (code, length) in zip(codes, ordered_lengths))
+    assert all(b[:len(a)] != a for (a, b) in zip(words, words[1:]))
+    assert list(ordered_lengths) == sorted(ordered_lengths)
+
+
+def test_code_book_is_determined_by_lengths():
+    huffman = Huffman(SOURCE, SOURCE, 1, base=3)
+    lengths = {sym: len(code) for (sym, code) in huffman.code_book.items()}
+    symbols, _, codes = canonical_codes(list(lengths.keys()), np.array(list(lengths.values())), 3)
+    assert symbols == huffman.symbols
+    assert np.array_equal(codes, huffman.codes)
+
+
+@pytest.mark.parametrize("base, symbol_length", [(2, 1), (3, 1), (8, 1), (2, 2), (8, 3)])
+def test_decompress_round_trip(base, symbol_length):
+    huffman = Huffman(SOURCE, SOURCE, symbol_length, base=base)
+    message = SOURCE[:len(SOURCE) - len(SOURCE) % symbol_length]
+    assert "".join(huffman.decompress(huffman.compress(message))) == message
+
+
+def test_compress_rejects_partial_symbols():
+    # A trailing partial symbol can't be compressed, so it's rejected rather than silently dropped.
+    huffman = Huffman(SOURCE, SOURCE, 2, base=2)
+    with pytest.raises(ValueError):
+        huffman.compress("abc")
+    with pytest.raises(ValueError):
+        huffman.compress_many_packed(["ro", "rom"])
+
+
+@pytest.mark.parametrize("chunks", [1, 7, 1000])
+def test_decompress_stream_matches_decompress(chunks):
+    huffman = Huffman(SOURCE, SOURCE, 1, base=3)
+    compressed = np.asarray(huffman.compress(SOURCE))
+    streamed = [sym for symbols in huffman.decompress_stream(np.array_split(compressed, chunks)) for sym in symbols]
+    assert streamed == huffman.decompress(compressed)
+
+
+def test_decoder_with_sub_tables():
+    # A code with words longer than the table forces lookups through the sub tables.
+    words = [[1] * idx + [0] for idx in range(9)] + [[1] * 9]
+    decoder = HuffmanDecoder(words, list(range(10)), base=2, table_digits=2)
+    message = np.concatenate([words[idx] for idx in [9, 0, 3, 8, 9, 1]])
+    assert decoder.decode(message) == [9, 0, 3, 8, 9, 1]
+
+
+def test_decode_rejects_truncated_messages():
+    huffman = Huffman(SOURCE, SOURCE, 1, base=2)
+    compressed = np.asarray(huffman.compress(SOURCE))
+    with pytest.raises(ValueError):
+        huffman.decompress(compressed[:-1])
+
+
+@pytest.mark.parametrize("base, symbol_length", [(2, 1), (3, 2), (8, 3)])
+def test_compress_concatenates_code_words(base, symbol_length):
+    huffman = Huffman(SOURCE, SOURCE, symbol_length, base=base)
+    message = SOURCE[:len(SOURCE) - len(SOURCE) % symbol_length]
+    symbols = [message[i:i + symbol_length] for i in range(0, len(message), symbol_length)]
+    expected = np.concatenate([huffman.code_book[sym] for sym in symbols])
+    assert np.array_equal(huffman.compress(message), expected)
+
+
+def test_compress_many_matches_compress():
+    huffman = Huffman(SOURCE, SOURCE, 1, base=2)
+    messages = ["romeo", "", SOURCE, "thy name"]
+    compressed = huffman.compress_many(messages)
+    assert len(compressed) == len(messages)
+    assert all(np.array_equal(a, huffman.compress(message)) for (a, message) in zip(compressed, messages))
+    assert all(type(a) is huffman.gf for a in compressed)
+
+
+def test_compress_rejects_unknown_symbols():
+    huffman = Huffman(SOURCE, SOURCE, 1, base=2)
+    with pytest.raises(ValueError):
+        huffman.compress("romeo & juliet")
+
+
+@pytest.mark.parametrize("base", [2, 3, 8])
+def test_packed_round_trip(base):
+    huffman = Huffman(SOURCE, SOURCE, 1, base=base)
+    packed = huffman.compress_packed(SOURCE)
+    compressed = huffman.compress(SOURCE)
+
+    assert len(packed) == compressed.shape[0]
+    assert packed.nbytes == -(-compressed.shape[0] * packed.bits // 8)
+    assert "".join(huffman.decompress(packed)) == SOURCE
+
+    many = huffman.compress_many_packed([SOURCE[:10], SOURCE])
+    assert [np.array_equal(buffer.digits(), huffman.compress(message)) for (buffer, message) in zip(many, [SOURCE[:10], SOURCE])] == [True, True]
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+import zlib
+from image_generator import PALETTE, encode_png, render, tile, write_ppm
+
+
+def test_render_scales_modules():
+    matrix = np.random.default_rng(0).integers(0, 8, size=(25, 25))
+    image = render(matrix, module_size=3, quiet_zone=2)
+
+    assert image.shape == (29 * 3, 29 * 3, 3)
+    assert np.array_equal(image[6::3, 6::3][:25, :25], PALETTE[matrix])
+    assert np.array_equal(image, np.kron(PALETTE[np.pad(matrix, 2, constant_values=1)], np.ones((3, 3, 1), dtype=np.uint8)))
+
+
+def test_render_batch_matches_single_codes():
+    matrices = np.random.default_rng(1).integers(0, 8, size=(4, 25, 25))
+    images = render(matrices, module_size=2)
+    assert all(np.array_equal(image, render(matrix, module_size=2)) for image, matrix in zip(images, matrices))
+
+
+def test_render_rejects_symbols_outside_palette():
+    with pytest.raises(ValueError):
+        render(np.full((25, 25), 8))
+
+
+def test_tile_fills_rows():
+    images = render(np.random.default_rng(2).integers(0, 8, size=(5, 25, 25)), module_size=1, quiet_zone=0)
+    sheet = tile(images, columns=3)
+
+    assert sheet.shape == (50, 75, 3)
+    assert np.array_equal(sheet[25:, 25:50], images[4])
+    assert np.all(sheet[25:, 50:] == 255)
+
+
+def test_png_scanlines():
+    image = render(np.random.default_rng(3).integers(0, 8, size=(25, 25)), module_size=2)
+    data = encode_png(image)
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+
+    # A single IDAT chunk follows the 25 byte IHDR chunk.
+    length = int.from_bytes(data[33:37], "big")
+    scanlines = np.frombuffer(zlib.decompress(data[41:41 + length]), dtype=np.uint8).reshape(image.shape[0], -1)
+    assert np.all(scanlines[:, 0] == 0)
+    assert np.array_equal(scanlines[:, 1:].reshape(image.shape), image)
+
+
+def test_ppm(tmp_path):
+    image = render(np.random.default_rng(4).integers(0, 8, size=(25, 25)), module_size=1)
+    write_ppm(tmp_path / "code.ppm", image)
+    data = (tmp_path / "code.ppm").read_bytes()
+
+    assert data.startswith(b"P6\n29 29\n255\n")
+    assert np.array_equal(np.frombuffer(data[13:], dtype=np.uint8).reshape(image.shape), image)
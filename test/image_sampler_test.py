@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+import galois as gl
+import numpy as np
+import pytest
+from code import Code
+from image_generator import render
+from image_sampler import LARGE_LOCATOR_RATIOS, find_locators, sample_code
+
+
+def _matrix(size, seed=0):
+    gf = gl.GF(8)
+    data = gf(np.random.default_rng(seed).integers(0, 8, size=(1, Code.number_of_symbols(size))))
+    return Code.batch(data, gf, error_correction_level=2, mask=None, encoding=2, size=size)[1][0].view(np.ndarray)
+
+
+def _frame(image, offset=(100, 300), shape=(1080, 1920)):
+    frame = np.full((*shape, 3), 200, dtype=np.uint8)
+    frame[offset[0]:offset[0] + image.shape[0], offset[1]:offset[1] + image.shape[1]] = image
+    return frame
+
+
+@pytest.mark.parametrize("size,module_size", [(23, 2), (23, 7), (41, 4)])
+def test_sample_rendered_code(size, module_size):
+    matrix = _matrix(size)
+    assert np.array_equal(sample_code(_frame(render(matrix, module_size=module_size))), matrix)
+
+
+def test_sample_noisy_code_with_fractional_modules():
+    matrix = _matrix(23, seed=1)
+    image = render(matrix, module_size=10)
+
+    # Scale the image to 5.5 pixels per module (by nearest neighbour), and darken it and add noise.
+    index = (np.arange(int(image.shape[0] * 0.55)) / 0.55).astype(np.intp)
+    scaled = image[index][:, index].astype(np.float64) * 0.8 + 20
+    noisy = np.clip(scaled + np.random.default_rng(2).normal(0, 15, scaled.shape), 0, 255).astype(np.uint8)
+
+    assert np.array_equal(sample_code(_frame(noisy, offset=(37, 411))), matrix)
+
+
+def test_locate_large_locator():
+    image = render(_matrix(23), module_size=4, quiet_zone=2)
+    locators = find_locators(image.max(axis=2) < 128, LARGE_LOCATOR_RATIOS)
+
+    # The center of the large locator is the center of module (4, 4), after the quiet zone of 2 modules.
+    assert np.allclose(locators[0][:2], (6.5 * 4, 6.5 * 4), atol=1.0)
+    assert locators[0][2] == pytest.approx(4, abs=0.5)
+
+
+def test_missing_code():
+    with pytest.raises(ValueError):
+        sample_code(np.full((480, 640, 3), 200, dtype=np.uint8))
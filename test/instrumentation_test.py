@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+import galois as gl
+import numpy as np
+import pytest
+import instrumentation
+from code import Code
+from error_correting.reed_solomon import ReedSolomonCode
+from instrumentation import REGISTRY, STAGE_DURATION, Registry, instrumented, timed
+
+
+@pytest.fixture
+def enabled():
+    instrumentation.enable()
+    REGISTRY.reset()
+    yield REGISTRY
+    instrumentation.enable(False)
+    REGISTRY.reset()
+
+
+def _value(metrics, name, **labels):
+    labels = {label: str(value) for (label, value) in labels.items()}
+    return next(sample["value"] for sample in metrics[name]["samples"] if sample["labels"] == labels)
+
+
+def test_disabled_records_nothing():
+    instrumentation.enable(False)
+    REGISTRY.reset()
+    with timed("stage"):
+        pass
+    instrumented("stage")(lambda: None)()
+
+    assert REGISTRY.collect() == {}
+
+
+def test_histogram_buckets():
+    registry = Registry()
+    histogram = registry.histogram("latency", "The latency.", buckets=(0.1, 1.0))
+    for value in [0.05, 0.1, 0.5, 2.0]:
+        histogram.observe(value)
+
+    sample = _value(registry.collect(), "latency")
+    assert sample["buckets"] == {0.1: 2, 1.0: 3, float("inf"): 4}
+    assert sample["count"] == 4 and sample["sum"] == pytest.approx(2.65)
+
+
+def test_metric_kinds_dont_mix():
+    registry = Registry()
+    registry.counter("codes").inc()
+    with pytest.raises(ValueError):
+        registry.histogram("codes")
+
+
+def test_prometheus_text():
+    registry = Registry()
+    registry.counter("hn_codes_total", "The codes.", stage='a "b"').inc(3)
+    registry.histogram("hn_seconds", "The durations.", buckets=(0.5,)).observe(0.25)
+
+    assert registry.to_prometheus().splitlines() == [
+        "# HELP hn_codes_total The codes.",
+        "# TYPE hn_codes_total counter",
+        'hn_codes_total{stage="a \\"b\\""} 3',
+        "# HELP hn_seconds The durations.",
+        "# TYPE hn_seconds histogram",
+        'hn_seconds_bucket{le="0.5"} 1',
+        'hn_seconds_bucket{le="+Inf"} 1',
+        "hn_seconds_sum 0.25",
+        "hn_seconds_count 1",
+    ]
+
+
+def test_stages_report(enabled):
+    gf = gl.GF(8)
+    Code.batch(gf.Random((5, Code.number_of_symbols(23)), seed=0), gf, error_correction_level=2, mask=None, encoding=2)
+    code = ReedSolomonCode(8, 3, 7)
+    recived = np.asarray(code.encode(gf.Random((4, 3), seed=1))).copy()
+    recived[:, 0] ^= 1
+    code.decode_batch(recived)
+
+    metrics = enabled.collect()
+    assert _value(metrics, "hn_codes_constructed_total") == 5
+    assert sum(sample["value"] for sample in metrics["hn_masks_selected_total"]["samples"]) == 5
+    assert _value(metrics, "hn_rs_symbols_corrected_total") == 4
+    for stage in ["code_construction", "mask_selection", "rs_encode", "rs_decode"]:
+        assert _value(metrics, STAGE_DURATION, stage=stage)["count"] == 1
+
+
+def test_code_doesnt_print(capsys):
+    gf = gl.GF(8)
+    Code(gf.Random(Code.number_of_symbols(23), seed=2), gf, error_correction_level=2, mask=None, encoding=2)
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+from code import Code
+from layout import CALIBRATION_POSITIONS, CALIBRATION_SYMBOLS, LAYOUT_CACHE_SIZE, gather_data, layout_template, place_data, placement_index
+
+
+def test_layout_is_cached_and_read_only():
+    layout = layout_template(8, 23)
+    assert layout_template(8, 23) is layout
+    with pytest.raises(ValueError):
+        layout.masks[0, 0, 0] = 1
+
+    with pytest.raises(ValueError):
+        layout.template[0, 0] = 0
+
+
+def test_layout_regions():
+    layout = layout_template(8, 23)
+    assert layout.data_index.shape == (Code.number_of_symbols(23),)
+    assert np.all(layout.data_region.flat[layout.data_index])
+    assert not np.any(layout.fixed_region & layout.data_region)
+    assert layout.masks.shape == (3, 25, 25)
+
+
+@pytest.mark.parametrize("size", [23, 31])
+def test_layout_calibration_cells(size):
+    layout = layout_template(8, size)
+    for (rows, cols) in CALIBRATION_POSITIONS:
+        assert np.array_equal(layout.template[rows, cols], CALIBRATION_SYMBOLS)
+        assert np.all(layout.fixed_region[rows, cols])
+
+
+def test_layout_cache_is_bounded():
+    assert layout_template.cache_info().maxsize == LAYOUT_CACHE_SIZE
+
+
+@pytest.mark.parametrize("size", [23, 24, 31, 57, 101])
+def test_placement_index_for_any_size(size):
+    index = placement_index(size)
+    assert index.shape == (Code.number_of_symbols(size),)
+    assert np.unique(index).shape == index.shape
+    assert not np.any(layout_template(8, size).fixed_region.flat[index])
+
+    data = np.random.default_rng(size).integers(0, 8, size=(3, index.shape[0]))
+    matrices = np.zeros((3, size + 2, size + 2), dtype=np.int64)
+    place_data(matrices, data)
+    assert np.array_equal(gather_data(matrices), data)
+
+
+def test_placement_index_rejects_small_sizes():
+    with pytest.raises(ValueError):
+        placement_index(21)
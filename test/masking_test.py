@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import galois as gl
+import numpy as np
+import pytest
+from masking import compute_mask, compute_masking_score, compute_masking_scores
+
+
+def reference_masking_score(mat: gl.FieldArray) -> int:
+    """The original per pixel implementation of the masking score."""
+    height, width = mat.shape
+    score = 0
+    for i in range(width):
+        if i == 0:
+            score += np.sum(mat[:1, :i + 1] == mat[0, i])
+            score += np.sum(mat[-2:, :i + 1] == mat[-1, i])
+        elif i == width - 1:
+            score += np.sum(mat[:1, i - 1:] == mat[0, i])
+            score += np.sum(mat[-2:, i - 1:] == mat[-1, i])
+        else:
+            score += np.sum(mat[:1, i - 1: i + 1] == mat[0, i])
+            score += np.sum(mat[-2:, i - 1: i + 1] == mat[-1, i])
+
+    for i in range(1, height - 1):
+        score += np.sum(mat[i - 1: i + 1, :1] == mat[i, 0])
+        score += np.sum(mat[i - 1: i + 1, -2:] == mat[i, -1])
+
+    for i in range(1, height - 1):
+        for j in range(1, width - 1):
+            score += np.sum(mat[i - 1: i + 1, j - 1: j + 1] == mat[i, j])
+
+    return score
+
+
+@pytest.mark.parametrize("order, shape", [(2, (2, 2)), (7, (5, 9)), (8, (25, 25)), (8, (31, 17))])
+def test_masking_score_matches_reference(order, shape):
+    gf = gl.GF(order)
+    rng = np.random.default_rng(order)
+    for _ in range(5):
+        mat = gf(rng.integers(0, order, size=shape))
+        assert compute_masking_score(mat) == reference_masking_score(mat)
+
+
+def test_masking_scores_of_stack():
+    gf = gl.GF(8)
+    mats = gf(np.random.default_rng(0).integers(0, 8, size=(4, 3, 25, 25)))
+    scores = compute_masking_scores(mats)
+    assert scores.shape == (4, 3)
+    for idx in np.ndindex(4, 3):
+        assert scores[idx] == reference_masking_score(mats[idx])
+
+    assert np.array_equal(compute_mask(mats), np.argmin(scores, axis=-1))
+
+
+def test_masking_score_rejects_degenerate_shapes():
+    with pytest.raises(ValueError):
+        compute_masking_scores(np.zeros((1, 5)))
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+from compression.packing import PackedBuffer, pack_fields, unpack_fields
+
+
+@pytest.mark.parametrize("bits", range(1, 9))
+def test_fields_match_packbits(bits):
+    values = np.random.default_rng(bits).integers(0, 2 ** bits, size=1001)
+    expected = np.packbits(((values[:, np.newaxis] >> np.arange(bits - 1, -1, -1)) & 1).astype(np.uint8))
+
+    assert np.array_equal(pack_fields(values, bits), expected)
+    assert np.array_equal(unpack_fields(expected, bits, values.shape[0]), values)
+
+
+@pytest.mark.parametrize("base", [2, 3, 4, 7, 8])
+def test_symbol_stream_round_trip(base):
+    digits = np.random.default_rng(base).integers(0, base, size=999)
+    packed = PackedBuffer.from_digits(digits, base)
+    assert np.array_equal(packed.digits(), digits)
+
+    for order in [2, 8, 16, 256]:
+        symbols = packed.symbols(order)
+        assert symbols.shape[0] == packed.number_of_symbols(order) and np.all(symbols < order)
+        assert np.array_equal(PackedBuffer.from_symbols(symbols, order, packed.length, base).digits(), digits)
+
+
+def test_binary_digits_to_gf8_symbols():
+    # 1 0 1 | 1 1 1 | 0 0 0 | 1 (padded with zeros)
+    packed = PackedBuffer.from_digits(np.array([1, 0, 1, 1, 1, 1, 0, 0, 0, 1]), 2)
+    assert packed.nbytes == 2
+    assert packed.symbols(8).tolist() == [5, 7, 0, 4]
+    assert np.shares_memory(packed.symbols(256), packed.data)
+
+
+def test_rejects_fields_which_are_not_powers_of_two():
+    with pytest.raises(ValueError):
+        PackedBuffer.from_digits(np.zeros(4, dtype=np.uint8), 2).symbols(7)
+
+
+def test_rejects_digits_wider_than_a_byte():
+    with pytest.raises(ValueError):
+        PackedBuffer.from_digits(np.array([300, 1]), 300)
+    with pytest.raises(ValueError):
+        pack_fields(np.array([300, 1]), 9)
+    with pytest.raises(ValueError):
+        unpack_fields(np.zeros(4, dtype=np.uint8), 9, 2)
+    assert np.array_equal(PackedBuffer.from_digits(np.array([255, 1]), 256).digits(), [255, 1])
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+import numpy as np
+import os
+import pytest
+import subprocess
+import sys
+from compression.compression import frame_payload, unframe_payload
+from compression.huffman import Huffman
+from compression.packing import PackedBuffer
+from error_correting.reed_solomon import ReedSolomonCode
+from layout import gather_data, layout_template
+from pipeline import DecodePipeline, EncodePipeline
+
+SOURCE = "romeo, romeo, wherefore art thou romeo? deny thy father and refuse thy name. "
+PAYLOADS = [SOURCE[i:i + 10 + i % 23] for i in range(0, 60, 3)]
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    huffman = Huffman(SOURCE, sorted(set(SOURCE)), 1, base=2)
+    return EncodePipeline(huffman, ReedSolomonCode(8, 3, 7), error_correction_level=2, encoding=2, batch_size=4)
+
+
+@pytest.mark.parametrize("order", [2, 8, 256])
+def test_frame_round_trip(order):
+    packed = PackedBuffer.from_digits(np.random.default_rng(order).integers(0, 3, size=101), 3)
+    symbols = np.concatenate([frame_payload(packed, order), np.zeros(5, dtype=np.uint8)])
+    unframed = unframe_payload(symbols, order, 3)
+
+    assert unframed.length == packed.length
+    assert np.array_equal(unframed.digits(), packed.digits())
+
+
+def test_unframe_rejects_truncated_stream():
+    symbols = frame_payload(PackedBuffer.from_digits(np.ones(100, dtype=np.uint8), 2), 8)
+    with pytest.raises(ValueError):
+        unframe_payload(symbols[:-3], 8, 2)
+
+
+def test_codes_decode_to_payloads(pipeline):
+    mask_indices, matrices = pipeline.encode_batch(PAYLOADS)
+    layout = layout_template(8, 23)
+
+    # Unmask the data (addition in GF(8) is xor), and read the messages back from the codewords.
+    data = gather_data(matrices.view(np.ndarray) ^ layout.masks[mask_indices])
+    codewords = data[:, pipeline.block_code.index]
+    messages = np.asarray(pipeline.rs.extract_message(codewords)).reshape(len(PAYLOADS), -1)
+
+    for payload, message in zip(PAYLOADS, messages):
+        assert "".join(pipeline.huffman.decompress(unframe_payload(message, 8, 2))) == payload
+
+
+def test_payload_exceeding_capacity(pipeline):
+    with pytest.raises(ValueError):
+        pipeline.encode_batch([SOURCE * 10])
+
+
+def test_payloads_of_partial_symbols(pipeline):
+    # With symbols of two characters, even payloads round trip and a trailing partial symbol is rejected (not dropped).
+    huffman = Huffman(SOURCE, SOURCE, 2, base=2)
+    encoder, decoder = EncodePipeline(huffman, pipeline.rs, 2, 2), DecodePipeline(huffman, pipeline.rs)
+    payloads = ["ro", "romeo,", ""]
+    assert list(decoder.run(encoder.run(payloads))) == payloads
+    with pytest.raises(ValueError):
+        encoder.encode_batch(["abc", "abcd", "a", ""])
+
+
+@pytest.mark.parametrize("executor, workers", [("thread", 2), ("process", 1)])
+def test_pooled_run_matches_serial(pipeline, executor, workers):
+    serial = list(pipeline.run(iter(PAYLOADS)))
+    pooled = list(EncodePipeline(pipeline.huffman, pipeline.rs, 2, 2, batch_size=3, workers=workers, executor=executor).run(iter(PAYLOADS)))
+
+    assert len(serial) == len(pooled) == len(PAYLOADS)
+    assert all(np.array_equal(a, b) for a, b in zip(serial, pooled))
+    assert list(DecodePipeline(pipeline.huffman, pipeline.rs).run(pooled)) == PAYLOADS
+
+
+def test_decode_pipeline_corrects_errors(pipeline):
+    matrices = list(pipeline.run(PAYLOADS))
+    decoder = DecodePipeline(pipeline.huffman, pipeline.rs, batch_size=8)
+    assert list(decoder.run(matrices)) == PAYLOADS
+
+    # A single error in each codeword is corrected, while a code with a destroyed codeword is reported as None.
+    damaged = np.stack([matrix.view(np.ndarray) for matrix in matrices])
+    layout = layout_template(8, 23)
+    cells = damaged.reshape(len(PAYLOADS), -1)
+    cells[:, layout.data_index[pipeline.block_code.index[:, 0]]] ^= 5
+    cells[0, layout.data_index[pipeline.block_code.index[0]]] ^= 3
+
+    payloads, stats = decoder.decode_batch_with_stats(damaged)
+    assert payloads == [None] + PAYLOADS[1:]
+    assert not np.any(stats.failed[1:])
+    assert np.all(stats.corrected[1:] == 1)
+
+
+def test_pipelines_run_without_galois():
+    # The fields of the default configurations are loaded from the field cache, so galois is never imported.
+    script = ("import sys\n"
+              "from compression.huffman import Huffman\n"
+              "from error_correting.reed_solomon import ReedSolomonCode\n"
+              "from pipeline import DecodePipeline, EncodePipeline\n"
+              f"huffman, rs = Huffman({SOURCE!r}, sorted(set({SOURCE!r})), 1, base=2), ReedSolomonCode(8, 3, 7)\n"
+              f"matrices = list(EncodePipeline(huffman, rs, 2, 2).run({PAYLOADS!r}))\n"
+              f"assert list(DecodePipeline(huffman, rs).run(matrices)) == {PAYLOADS!r}\n"
+              f"assert huffman.decompress(huffman.compress_packed({SOURCE!r})) == list({SOURCE!r})\n"
+              "assert 'galois' not in sys.modules\n")
+    source = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+    subprocess.run([sys.executable, "-c", script], cwd=source, env={**os.environ, "PYTHONPATH": source}, check=True)
@@ -1 +1,74 @@
 #!/usr/bin/env python3
+import numpy as np
+import pytest
+from qr_code import QRCode, construct_locator_with_information, convert_int_to_symbol_string, payload_symbols, qr_layout
+
+
+def test_symbol_string_is_little_endian():
+    assert np.array_equal(convert_int_to_symbol_string(5, 49, base=7), [5, 0])
+    assert np.array_equal(convert_int_to_symbol_string(23, 49, base=7), [2, 3])
+    assert np.array_equal(convert_int_to_symbol_string(6, 8), [0, 1, 1])
+
+
+def test_symbol_strings_are_vectorized():
+    values = np.arange(49).reshape(7, 7)
+    strings = convert_int_to_symbol_string(values, 49, base=7)
+
+    assert strings.shape == (7, 7, 2)
+    assert all(np.array_equal(strings[i, j], convert_int_to_symbol_string(values[i, j], 49, base=7)) for i in range(7) for j in range(7))
+    with pytest.raises(ValueError):
+        convert_int_to_symbol_string([3, 49], 49, base=7)
+
+
+def test_locator_with_information():
+    locator = construct_locator_with_information(error_correction_level=2, mask=3, locator_size=5)
+
+    assert locator.shape == (7, 6)
+    assert np.array_equal(locator[:5, 0], np.zeros(5)) and np.array_equal(locator[2, :5], [0, 1, 0, 1, 0])
+    assert locator[6, 0] == 2 and np.array_equal(locator[6, 1:3], [3, 0])
+
+
+def test_locator_too_small():
+    with pytest.raises(ValueError):
+        construct_locator_with_information(error_correction_level=2, mask=3, locator_size=4)
+
+
+def test_qr_code_patterns():
+    code = QRCode("", k=20)
+    locator = construct_locator_with_information(2, 1, 5, version=6)
+
+    assert code.matrix.shape == (20, 20)
+    assert np.array_equal(code.matrix[:7, :6], locator)
+    assert np.array_equal(code.matrix[4, 6:-7], np.arange(7, 14) % 2)
+
+
+@pytest.mark.parametrize("k", [14, 20, 33])
+def test_qr_code_holds_payload(k):
+    payload = "romeo"[:k // 4]
+    code = QRCode(payload, k=k, error_correction_level=1, mask=12)
+    layout = qr_layout(k)
+    symbols = payload_symbols(payload)
+
+    assert layout.version == k - 14 and layout.capacity == k * k - layout.fixed_index.shape[0]
+    assert np.array_equal(code.matrix.reshape(-1)[layout.data_index[:symbols.shape[0]]], symbols)
+    assert np.all(code.matrix.reshape(-1)[layout.data_index[symbols.shape[0]:]] == 0)
+    for rotation, corner in [(0, code.matrix[:7, :6]), (1, code.matrix[-6:, :7]), (3, code.matrix[:6, -7:])]:
+        assert np.array_equal(corner, np.rot90(construct_locator_with_information(1, 12, 5, version=k - 14), k=rotation))
+
+
+def test_qr_code_batch():
+    payloads = ["romeo", b"juliet", np.arange(7)]
+    matrices = QRCode.batch(payloads, k=20)
+
+    assert matrices.shape == (3, 20, 20) and matrices.dtype == np.uint8
+    assert all(np.array_equal(matrix, QRCode(payload).matrix) for (matrix, payload) in zip(matrices, payloads))
+    assert qr_layout(20) is qr_layout(20) and not qr_layout(20).template.flags.writeable
+
+
+def test_qr_code_invalid_parameters():
+    with pytest.raises(ValueError):
+        QRCode("romeo" * 100, k=14)
+    with pytest.raises(ValueError):
+        QRCode([7], k=20)
+    with pytest.raises(ValueError):
+        qr_layout(13)
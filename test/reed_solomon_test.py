@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import galois as gl
+import numpy as np
+import pytest
+from error_correting.reed_solomon import ReedSolomonCode
+
+
+@pytest.mark.parametrize("systematic", [False, True])
+@pytest.mark.parametrize("q, k, n", [(8, 3, 7), (7, 2, 6), (9, 4, 8)])
+def test_batched_encode_matches_generator_matrix(q, k, n, systematic):
+    code = ReedSolomonCode(q, k, n, systematic=systematic)
+    messages = code.gf.Random((50, k))
+    codewords = code.encode(messages)
+
+    assert codewords.shape == (50, n)
+    assert np.array_equal(codewords, messages @ code.G)
+    assert np.array_equal(code.encode(messages[0]), codewords[0])
+    assert np.array_equal(code.extract_message(codewords), messages)
+
+
+@pytest.mark.parametrize("q, k, n", [(8, 3, 7), (7, 2, 6), (16, 5, 15)])
+def test_systematic_codewords_are_multiples_of_the_generator_polynomial(q, k, n):
+    code = ReedSolomonCode(q, k, n, systematic=True)
+    messages = code.gf.Random((10, k))
+    for message, codeword in zip(messages, code.encode(messages)):
+        assert np.array_equal(codeword[:k], message)
+        assert (gl.Poly(codeword) % code.generator_polynomial) == 0
+
+
+def test_systematic_code_without_parity():
+    code = ReedSolomonCode(8, 7, 7, systematic=True)
+    message = code.gf(np.arange(1, 8))
+
+    assert np.array_equal(code.G, code.gf.Identity(7))
+    assert np.array_equal(code.encode(message), message)
+    assert np.array_equal(code.extract_message(code.encode(message)), message)
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        ReedSolomonCode(8, 3, 8)
+
+    with pytest.raises(ValueError):
+        ReedSolomonCode(8, 5, 4)
+
+
+def add_errata(code: ReedSolomonCode, codewords: np.ndarray, rng: np.random.Generator):
+    """Corrupt each codeword by random errors and erasures, such that 2 * errors + erasures <= n - k."""
+    recived, erasures = np.asarray(codewords).copy(), np.zeros(codewords.shape, dtype=bool)
+    for word, erased in zip(recived, erasures):
+        number_of_erasures = rng.integers(0, code.n - code.k + 1)
+        number_of_errors = rng.integers(0, (code.n - code.k - number_of_erasures) // 2 + 1)
+        positions = rng.permutation(code.n)[:number_of_erasures + number_of_errors]
+        erased[positions[:number_of_erasures]] = True
+        word[positions] = code.tables.add(word[positions], rng.integers(0, code.gf.order, size=positions.shape[0]))
+
+    return code.gf(recived), erasures
+
+
+@pytest.mark.parametrize("systematic", [False, True])
+@pytest.mark.parametrize("q, k, n", [(8, 3, 7), (7, 2, 6), (9, 3, 8), (16, 5, 15)])
+def test_decode_batch_corrects_errors_and_erasures(q, k, n, systematic):
+    code = ReedSolomonCode(q, k, n, systematic=systematic)
+    rng = np.random.default_rng(q + k + n)
+    codewords = code.encode(code.gf(rng.integers(0, q, size=(200, k))))
+    recived, erasures = add_errata(code, codewords, rng)
+
+    decoded, corrected = code.decode_batch(recived, erasures)
+    assert np.array_equal(decoded, codewords)
+    assert np.array_equal(corrected, np.count_nonzero(np.asarray(recived) != np.asarray(codewords), axis=1))
+
+
+def test_decode_reports_failures():
+    code = ReedSolomonCode(8, 3, 7)
+    codewords = np.asarray(code.encode(code.gf.Random((4, 3))))
+    recived = codewords.copy()
+    recived[1:, :4] ^= 5
+
+    decoded, corrected = code.decode_batch(recived)
+    assert corrected[0] == 0 and np.all(corrected[1:] == -1)
+    assert np.array_equal(decoded, recived)
+    with pytest.raises(ValueError):
+        code.decode(recived[1])
+
+
+def test_error_correcting_pair_agrees_with_berlekamp_massey():
+    code = ReedSolomonCode(8, 3, 7, compute_error_correcting_pair=True)
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        codeword = code.encode(code.gf(rng.integers(0, 8, size=3)))
+        recived = codeword.copy()
+        recived[rng.permutation(7)[:code.t]] += code.gf(rng.integers(1, 8, size=code.t))
+
+        assert np.array_equal(code.decode_with_error_correcting_pair(recived), codeword)
+        assert np.array_equal(code.decode(recived), codeword)
+
+
+@pytest.mark.parametrize("systematic", [False, True])
+def test_parity_check_matrix_is_cached_and_systematic(systematic):
+    code = ReedSolomonCode(8, 3, 7, systematic=systematic)
+    G = code.G.copy()
+    H = code.H
+
+    assert np.array_equal(code.G, G)
+    assert not np.any(code.G @ H.T)
+    assert np.array_equal(H[:, code.k:], code.gf.Identity(code.n - code.k))
+    assert np.shares_memory(ReedSolomonCode(8, 3, 7, systematic=systematic).H, H)
+
+
+def test_syndromes_of_a_batch():
+    code = ReedSolomonCode(8, 3, 7)
+    recived = np.asarray(code.encode(code.gf.Random((6, 3))))
+    recived[::2, 0] ^= 1
+
+    assert code.syndromes(recived).shape == (6, 4)
+    assert np.array_equal(code.syndromes(recived), code.gf(recived) @ code.H.T)
+    assert np.array_equal(code.is_codeword(recived), [False, True] * 3)
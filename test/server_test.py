@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+import asyncio
+import numpy as np
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from compression.codebook import CodeBook
+from compression.huffman import Huffman
+from server import DECODE, ENCODE, OK, WorkerClient, WorkerServer, pack_items, pack_message, read_frame, unpack_items, unpack_message
+
+SOURCE = "romeo, romeo, wherefore art thou romeo? deny thy father and refuse thy name. "
+PAYLOADS = [SOURCE[i:i + 10 + i % 23] for i in range(0, 60, 3)]
+
+
+def test_items_round_trip():
+    items = [b"", b"romeo", None, bytes(range(256))]
+    assert unpack_items(pack_items(items)) == items
+
+    frame = pack_message(DECODE, 7, items)
+    assert unpack_message(frame[4:]) == (DECODE, 7, items)
+
+
+def test_truncated_items():
+    with pytest.raises(ValueError):
+        unpack_items(pack_items([b"romeo"])[:-1])
+    with pytest.raises(ValueError):
+        unpack_message(b"\x01")
+
+
+def _server(workers: int = 0) -> WorkerServer:
+    return WorkerServer(CodeBook.from_huffman(Huffman(SOURCE, sorted(set(SOURCE)), 1, base=2)), (8, 3, 7, False), 2, 2, batch_size=4, workers=workers)
+
+
+def test_server_round_trip(tmp_path):
+    path = str(tmp_path / "server.sock")
+    server = _server()
+    server.start()
+
+    async def run():
+        ready = asyncio.Event()
+        serving = asyncio.create_task(server.serve(path, ready))
+        await ready.wait()
+
+        client = await WorkerClient.connect(path)
+        matrices, more = await asyncio.gather(client.encode(PAYLOADS), client.encode(PAYLOADS[:3]))
+        assert all(matrix.shape == (25, 25) for matrix in matrices)
+        assert all(np.array_equal(a, b) for (a, b) in zip(matrices, more))
+
+        # A destroyed code is reported as None, and a failed request raises the error of the server.
+        damaged = [matrix.copy() for matrix in matrices]
+        damaged[0][9:, 9:] = 0
+        assert await client.decode(damaged) == [None] + PAYLOADS[1:]
+        with pytest.raises(RuntimeError, match="Unknown request kind"):
+            await client.request(9, [b""])
+
+        await client.close()
+        serving.cancel()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.close()
+
+
+def test_worker_pool_matches_in_process():
+    # The batches of a pool of (spawned) worker processes are encoded and decoded like those of the server process.
+    local, pool = _server(), _server(workers=1)
+    local.start()
+    pool.start()
+    assert isinstance(pool.pool, ProcessPoolExecutor)
+
+    async def run():
+        matrices = await local.handle_request(ENCODE, [payload.encode("utf-8") for payload in PAYLOADS])
+        assert await pool.handle_request(ENCODE, [payload.encode("utf-8") for payload in PAYLOADS]) == matrices
+        assert await pool.handle_request(DECODE, matrices) == await local.handle_request(DECODE, matrices)
+
+    try:
+        asyncio.run(run())
+    finally:
+        local.close()
+        pool.close()
+
+
+def test_client_skips_unknown_responses(tmp_path):
+    path = str(tmp_path / "server.sock")
+
+    async def respond(reader, writer):
+        # A response to an unknown request precedes the response to the request.
+        _, identifier, items = unpack_message(await read_frame(reader))
+        writer.write(pack_message(OK, identifier + 1000, [b"juliet"]) + pack_message(OK, identifier, items))
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_unix_server(respond, path)
+        async with server:
+            client = await WorkerClient.connect(path)
+            assert await client.request(ENCODE, [b"romeo"]) == [b"romeo"]
+            await client.close()
+
+    asyncio.run(run())